@@ -1,10 +1,12 @@
 """SupportPilot Flask Application with Supabase and JWT Auth"""
 import os
 import sys
-from flask import Flask, jsonify, request
+import threading
+from flask import Flask, Response, g, jsonify, request, send_file
 from flask_cors import CORS
+from werkzeug.utils import secure_filename
 from functools import wraps
-from datetime import datetime
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
 # Ensure backend module is importable
@@ -19,62 +21,272 @@ from backend.config import get_config
 from backend.utils.supabase_client import SupabaseClient
 from backend.utils.jwt_utils import JWTUtils
 from backend.utils.error_handler import ErrorHandler
+from backend.utils.executors import MLExecutor
+from backend.utils.passwords import PasswordHasher
+from backend.utils.event_bus import EventBus
+from backend.utils.metrics import snapshot_all
+from backend.utils.json_provider import make_json_provider
+from backend.utils.compression import init_compression
+from backend.utils.http_cache import conditional, parse_timestamp, weak_etag
+from backend.utils.rate_limit import (
+    ADMISSION_EXEMPT, AdmissionController, RateLimiter, parse_route_costs
+)
+from backend.ml.inference_server import InferenceClient
 from backend.services.user_service import UserService
 from backend.services.ticket_service import TicketService
 from backend.services.comment_service import CommentService
+from backend.services.attachment_service import AttachmentService
 from backend.services.notification_service import NotificationService
+from backend.services.notification_buffer import NotificationDigestBuffer
+from backend.services.audit_service import AuditLogBuffer
+from backend.services.audit_store import AuditLogStore
+from backend.services.agent_metrics import AgentMetricsProcessor
+from backend.services.search_index import TicketSearchIndex, SearchIndexMaintainer
+from backend.services.duplicate_detector import DuplicateDetector
 from backend.services.analytics_service import AnalyticsService
 from backend.services.assignment_engine import TicketAssignmentEngine
 from backend.controllers.auth_controller import AuthController
 from backend.controllers.ticket_controller import TicketController
 from backend.controllers.analytics_controller import AnalyticsController
+from backend.controllers.event_controller import EventController, SSE_HEADERS
 
 
-def create_app():
-    """Application factory with full initialization"""
-    app = Flask(__name__)
-    config = get_config()
-    app.config.from_object(config)
-    
-    # Enable CORS
-    CORS(app, resources={r"/api/*": {"origins": app.config['CORS_ORIGINS']}})
-    
-    # Initialize Supabase
-    db = None
+def connect_database(reconnect: bool = False):
+    """Connect to Supabase, returning None (demo mode) when unavailable.
+    reconnect=True builds a fresh client, e.g. in a freshly forked worker.
+    """
     try:
         supabase_url = os.getenv('SUPABASE_URL', '').strip()
         supabase_key = os.getenv('SUPABASE_KEY', '').strip()
         
         if supabase_url and supabase_key:
             supabase_client = SupabaseClient(supabase_url, supabase_key)
-            db = supabase_client.get_client()
+            if reconnect:
+                supabase_client.init_client(supabase_url, supabase_key)
             print("✓ Supabase connected")
-        else:
-            print("⚠  Supabase credentials missing — running in demo mode")
+            return supabase_client.get_client()
+        print("⚠  Supabase credentials missing — running in demo mode")
     except Exception as e:
         print(f"⚠  Supabase error: {e} — continuing in demo mode")
         import traceback
         traceback.print_exc()
+    return None
+
+
+def reconnect_database(app):
+    """Give every database-backed component of the app a fresh Supabase client"""
+    db = connect_database(reconnect=True)
+    if db is None:
+        return
+    for component in app.extensions['supportpilot']['db_components']:
+        component.db = db
+
+
+def shutdown_app(app):
+    """Release background resources (worker pools) owned by the app"""
+    for closeable in app.extensions['supportpilot']['closeables']:
+        try:
+            closeable.shutdown()
+        except Exception as e:
+            app.logger.error(f"Shutdown error: {e}")
+
+
+def create_app():
+    """Application factory with full initialization"""
+    app = Flask(__name__)
+    config = get_config()
+    app.config.from_object(config)
+    
+    # Fast JSON encoding (orjson when installed) and compression of large responses
+    app.json = make_json_provider(app, app.config['JSON_PROVIDER'])
+    if app.config['RESPONSE_COMPRESSION']:
+        init_compression(app, app.config['COMPRESSION_MIN_SIZE'])
+    
+    # Enable CORS
+    CORS(app, resources={r"/api/*": {"origins": app.config['CORS_ORIGINS']}})
+    
+    # Initialize Supabase
+    db = connect_database()
     
     # Initialize JWT
     jwt_secret = os.getenv('JWT_SECRET_KEY', app.config['JWT_SECRET_KEY'])
     jwt_utils = JWTUtils(jwt_secret)
     
+    # In-process pub/sub for real-time pushes and derived state
+    event_bus = EventBus(app.config['EVENT_HISTORY_SIZE'], app.config['EVENT_QUEUE_SIZE'])
+    
     # Initialize services (graceful degradation if db unavailable)
-    user_service = UserService(db) if db else None
-    ticket_service = TicketService(db) if db else None
-    comment_service = CommentService(db) if db else None
-    notification_service = NotificationService(db) if db else None
+    user_service = UserService(
+        db, event_bus, app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL']
+    ) if db else None
+    ticket_service = TicketService(db, event_bus) if db else None
+    comment_service = CommentService(db, event_bus) if db else None
+    attachment_service = AttachmentService(db, app.config['UPLOAD_FOLDER'], event_bus) if db else None
+    notification_service = NotificationService(
+        db, event_bus, app.config['NOTIFICATION_INSERT_BATCH_SIZE'],
+        app.config['NOTIFICATION_UNREAD_CACHE_TTL']
+    ) if db else None
     analytics_service = AnalyticsService(db) if db else None
+    audit_store = AuditLogStore(db) if db else None
     assignment_engine = TicketAssignmentEngine(db, user_service, analytics_service) if db and user_service else None
     
+    # Write-behind notifications: bursts per user are coalesced into digests
+    notification_buffer = None
+    if notification_service:
+        notification_buffer = NotificationDigestBuffer(
+            notification_service,
+            app.config['NOTIFICATION_FLUSH_INTERVAL'],
+            app.config['NOTIFICATION_MAX_PENDING'],
+            app.config['NOTIFICATION_DIGEST_THRESHOLD']
+        )
+        notification_buffer.listen(event_bus)
+    
+    # Write-behind audit log of ticket, comment and user changes
+    audit_buffer = None
+    if db:
+        audit_buffer = AuditLogBuffer(
+            db,
+            app.config['AUDIT_FLUSH_INTERVAL'],
+            app.config['AUDIT_BATCH_SIZE'],
+            app.config['AUDIT_MAX_PENDING'],
+            app.config['AUDIT_SPILL_DIR'],
+            app.config['AUDIT_SLOW_FLUSH_SECONDS'],
+            app.config['AUDIT_RETRY_INTERVAL']
+        )
+        audit_buffer.listen(event_bus)
+    
+    # agent_performance kept current from assignment, comment and status events
+    agent_metrics = None
+    if db:
+        agent_metrics = AgentMetricsProcessor(db, app.config['AGENT_METRICS_FLUSH_INTERVAL'])
+        agent_metrics.listen(event_bus)
+    
+    # Full-text ticket search, updated from events and synced from the database
+    search_index = None
+    search_maintainer = None
+    if db:
+        index_path = app.config['SEARCH_INDEX_PATH']
+        search_index = TicketSearchIndex()
+        if index_path and os.path.exists(index_path):
+            try:
+                search_index = TicketSearchIndex.load(index_path)
+            except Exception as e:
+                print(f"⚠  Search index load failed: {e} — rebuilding from database")
+        search_index.listen(event_bus)
+        search_maintainer = SearchIndexMaintainer(
+            search_index, db, index_path, app.config['SEARCH_INDEX_SYNC_INTERVAL']
+        )
+    
+    # Near-duplicate detection over recent tickets (MinHash LSH)
+    duplicate_detector = None
+    if db:
+        duplicate_detector = DuplicateDetector(db, sync_interval=app.config['DUPLICATE_SYNC_INTERVAL'])
+        duplicate_detector.listen(event_bus)
+    
+    # CPU-bound ML scoring runs in a worker pool or the inference server when configured
+    if app.config['ML_EXECUTOR'] == 'server':
+        ml_executor = InferenceClient(
+            app.config['ML_INFERENCE_SOCKET'],
+            app.config['ML_INFERENCE_TIMEOUT'],
+            app.config['ML_INFERENCE_RETRY_INTERVAL']
+        )
+    else:
+        ml_executor = MLExecutor(
+            app.config['ML_EXECUTOR'],
+            app.config['ML_EXECUTOR_WORKERS'],
+            app.config['ML_EXECUTOR_TIMEOUT']
+        )
+    app.extensions['ml_executor'] = ml_executor
+    
+    # Per-client token buckets, and load shedding while the database is slow
+    rate_limiter = None
+    if app.config['RATE_LIMIT_ENABLED']:
+        rate_limiter = RateLimiter(
+            user_rate=app.config['RATE_LIMIT_USER_RATE'],
+            user_burst=app.config['RATE_LIMIT_USER_BURST'],
+            ip_rate=app.config['RATE_LIMIT_IP_RATE'],
+            ip_burst=app.config['RATE_LIMIT_IP_BURST'],
+            route_costs=parse_route_costs(app.config['RATE_LIMIT_ROUTE_COSTS'])
+        )
+    admission = None
+    if db and app.config['ADMISSION_CONTROL']:
+        admission = AdmissionController(
+            app.config['ADMISSION_LATENCY_THRESHOLD_MS'],
+            app.config['ADMISSION_MAX_CONCURRENCY'],
+            app.config['ADMISSION_MIN_CONCURRENCY']
+        )
+        admission.db = db
+    
     # Initialize controllers
-    auth_controller = AuthController(user_service, jwt_utils, db) if user_service else None
-    ticket_controller = TicketController(ticket_service) if ticket_service else None
+    password_hasher = PasswordHasher(
+        app.config['PASSWORD_SCRYPT_N'],
+        app.config['PASSWORD_SCRYPT_R'],
+        app.config['PASSWORD_SCRYPT_P'],
+        app.config['PASSWORD_HASH_WORKERS'],
+        app.config['PASSWORD_HASH_MAX_PENDING'],
+        app.config['PASSWORD_HASH_TIMEOUT']
+    )
+    auth_controller = AuthController(user_service, jwt_utils, db, password_hasher) if user_service else None
+    ticket_controller = TicketController(
+        ticket_service, ml_executor, search_index, duplicate_detector, comment_service
+    ) if ticket_service else None
     analytics_controller = AnalyticsController(analytics_service) if analytics_service else None
+    event_controller = EventController(
+        event_bus, jwt_utils, ticket_service, app.config['SSE_HEARTBEAT_SECONDS']
+    )
+    
+    # Registry used by server hooks (reconnect after fork, warm-up, shutdown)
+    app.extensions['supportpilot'] = {
+        'db_components': [c for c in (
+            user_service, ticket_service, comment_service, attachment_service, notification_service,
+            analytics_service, assignment_engine, auth_controller, search_maintainer,
+            duplicate_detector, audit_buffer, audit_store, agent_metrics, admission
+        ) if c is not None],
+        'closeables': [c for c in (
+            ml_executor, password_hasher, notification_buffer, audit_buffer, agent_metrics, search_maintainer,
+            duplicate_detector
+        ) if c is not None],
+        # Background threads must start in the serving process (after any fork)
+        'background': [c for c in (search_maintainer, duplicate_detector) if c is not None],
+        'event_controller': event_controller,
+        'rate_limiter': rate_limiter
+    }
     
     # ===== MIDDLEWARE =====
     
+    @app.before_request
+    def start_background_tasks():
+        for task in app.extensions['supportpilot']['background']:
+            task.start()
+    
+    def token_payload():
+        """The request's decoded bearer token (decoded once per request), or None"""
+        if 'jwt_payload' not in g:
+            auth = request.headers.get('Authorization', '')
+            g.jwt_payload = jwt_utils.decode_token(auth[7:]) if auth.startswith('Bearer ') else None
+        return g.jwt_payload
+    
+    @app.before_request
+    def admit_request():
+        if request.method == 'OPTIONS':
+            return None
+        if rate_limiter:
+            payload = token_payload() or {}
+            allowed, retry_after = rate_limiter.check(
+                request.endpoint, payload.get('user_id'), request.remote_addr
+            )
+            if not allowed:
+                return ErrorHandler.too_many_requests('Rate limit exceeded', retry_after)
+        if admission and request.endpoint not in ADMISSION_EXEMPT:
+            if not admission.try_acquire():
+                return ErrorHandler.service_unavailable()
+            g.admitted = True
+    
+    @app.teardown_request
+    def release_admission(error):
+        if g.pop('admitted', False):
+            admission.release()
+    
     def require_auth(f):
         """JWT authentication decorator"""
         @wraps(f)
@@ -82,8 +294,7 @@ def create_app():
             auth = request.headers.get('Authorization', '')
             if not auth.startswith('Bearer '):
                 return ErrorHandler.unauthorized('Missing Authorization header')
-            token = auth[7:]
-            payload = jwt_utils.decode_token(token)
+            payload = token_payload()
             if not payload:
                 return ErrorHandler.unauthorized('Invalid or expired token')
             request.user = payload
@@ -137,6 +348,23 @@ def create_app():
         if not auth_controller:
             return ErrorHandler.internal_error('Auth service unavailable')
         return auth_controller.refresh_token(request.get_json() or {})
+
+    @app.route('/api/auth/password-token', methods=['POST'])
+    @require_auth
+    @require_role('admin')
+    def password_token():
+        if not auth_controller:
+            return ErrorHandler.internal_error('Auth service unavailable')
+        user_id = (request.get_json() or {}).get('user_id')
+        if not user_id:
+            return ErrorHandler.bad_request('user_id required')
+        return auth_controller.issue_password_token(user_id)
+    
+    @app.route('/api/auth/set-password', methods=['POST'])
+    def set_password():
+        if not auth_controller:
+            return ErrorHandler.internal_error('Auth service unavailable')
+        return auth_controller.set_password(request.get_json() or {})
     
     # ===== TICKET ROUTES =====
     
@@ -145,10 +373,12 @@ def create_app():
     def create_ticket():
         if not ticket_controller:
             return ErrorHandler.internal_error('Ticket service unavailable')
-        return ticket_controller.create_ticket(request.get_json() or {}, request.user['user_id'])
+        return ticket_controller.create_ticket(request.get_json() or {}, request.user['user_id'],
+                                               request.user.get('role', 'customer'))
     
     @app.route('/api/tickets', methods=['GET'])
     @require_auth
+    @weak_etag
     def list_tickets():
         if not ticket_controller:
             return ErrorHandler.internal_error('Ticket service unavailable')
@@ -162,8 +392,56 @@ def create_app():
             offset = request.args.get('offset', 0, type=int)
             return ticket_controller.get_all_tickets({'limit': limit, 'offset': offset})
     
+    @app.route('/api/tickets/search', methods=['GET'])
+    @require_auth
+    def search_tickets():
+        if not ticket_controller:
+            return ErrorHandler.internal_error('Ticket service unavailable')
+        filters = {
+            'status': request.args.get('status'),
+            'priority': request.args.get('priority'),
+            'assigned_agent_id': request.args.get('assigned_agent_id')
+        }
+        return ticket_controller.search_tickets(
+            request.args.get('q', ''), filters, request.user,
+            request.args.get('limit', 20, type=int)
+        )
+    
+    @app.route('/api/tickets/duplicates', methods=['GET'])
+    @require_auth
+    @require_role('admin')
+    def duplicate_clusters():
+        if not ticket_controller:
+            return ErrorHandler.internal_error('Ticket service unavailable')
+        return ticket_controller.get_duplicate_clusters()
+    
+    @app.route('/api/tickets/<ticket_id>/similar', methods=['GET'])
+    @require_auth
+    @require_role('agent', 'admin')
+    def similar_tickets(ticket_id):
+        if not ticket_controller:
+            return ErrorHandler.internal_error('Ticket service unavailable')
+        return ticket_controller.get_similar_tickets(ticket_id, request.args.get('limit', 5, type=int))
+    
+    @app.route('/api/tickets/bulk/status', methods=['POST'])
+    @require_auth
+    @require_role('agent', 'admin')
+    def bulk_update_status():
+        if not ticket_controller:
+            return ErrorHandler.internal_error('Ticket service unavailable')
+        return ticket_controller.bulk_update_status(request.get_json() or {}, app.config['TICKET_BULK_MAX'])
+    
+    @app.route('/api/tickets/bulk/assign', methods=['POST'])
+    @require_auth
+    @require_role('admin', 'agent')
+    def bulk_assign():
+        if not ticket_controller:
+            return ErrorHandler.internal_error('Ticket service unavailable')
+        return ticket_controller.bulk_assign(request.get_json() or {}, app.config['TICKET_BULK_MAX'])
+    
     @app.route('/api/tickets/<ticket_id>', methods=['GET'])
     @require_auth
+    @conditional(lambda ticket_id: ticket_service.get_ticket_version(ticket_id) if ticket_service else None)
     def get_ticket(ticket_id):
         if not ticket_controller:
             return ErrorHandler.internal_error('Ticket service unavailable')
@@ -195,7 +473,8 @@ def create_app():
         
         data = request.get_json() or {}
         content = data.get('content', '').strip()
-        is_internal = data.get('is_internal', False)
+        # Internal notes are staff-only
+        is_internal = bool(data.get('is_internal', False)) and request.user['role'] != 'customer'
         
         if not content:
             return ErrorHandler.bad_request('Content required')
@@ -205,11 +484,192 @@ def create_app():
     
     @app.route('/api/tickets/<ticket_id>/comments', methods=['GET'])
     @require_auth
+    @conditional(lambda ticket_id: comment_service.get_comments_version(
+        ticket_id, include_internal=request.user['role'] != 'customer'
+    ) if comment_service else None)
     def list_comments(ticket_id):
         if not comment_service:
             return ErrorHandler.internal_error('Comment service unavailable')
-        comments = comment_service.get_ticket_comments(ticket_id)
-        return ErrorHandler.success_response({'comments': comments})
+        limit = min(max(request.args.get('limit', app.config['COMMENT_PAGE_SIZE'], type=int), 1), 500)
+        comments = comment_service.get_ticket_comments(
+            ticket_id,
+            include_internal=request.user['role'] != 'customer',
+            limit=limit,
+            cursor=request.args.get('cursor')
+        )
+        return ErrorHandler.success_response({
+            'comments': comments,
+            'next_cursor': comment_service.next_cursor(comments, limit)
+        })
+    
+    # ===== ATTACHMENT ROUTES =====
+    
+    @app.route('/api/tickets/<ticket_id>/attachments', methods=['POST'])
+    @require_auth
+    def upload_attachment(ticket_id):
+        if not attachment_service:
+            return ErrorHandler.internal_error('Attachment service unavailable')
+        # The file is the raw request body, streamed to disk as it arrives
+        if request.mimetype.startswith('multipart/'):
+            return ErrorHandler.bad_request('Send the file as the request body, not as a multipart form')
+        file_name = secure_filename(request.args.get('filename') or request.headers.get('X-File-Name', ''))
+        if not file_name:
+            return ErrorHandler.bad_request('filename required')
+        result = attachment_service.create_attachment(
+            ticket_id, request.user['user_id'], file_name, request.mimetype or None,
+            request.stream, app.config['MAX_CONTENT_LENGTH']
+        )
+        if result.get('error_code') == 'TOO_LARGE':
+            return ErrorHandler.handle_error(413, result['error'], 'TOO_LARGE')
+        if result.get('error_code') == 'NOT_FOUND':
+            return ErrorHandler.not_found(result['error'])
+        return ErrorHandler.created_response(result.get('data')) if result.get('success') else ErrorHandler.internal_error(result.get('error'))
+    
+    @app.route('/api/tickets/<ticket_id>/attachments', methods=['GET'])
+    @require_auth
+    def list_attachments(ticket_id):
+        if not attachment_service:
+            return ErrorHandler.internal_error('Attachment service unavailable')
+        return ErrorHandler.success_response({'attachments': attachment_service.get_ticket_attachments(ticket_id)})
+    
+    @app.route('/api/attachments/<attachment_id>/content', methods=['GET'])
+    @require_auth
+    def download_attachment(attachment_id):
+        if not attachment_service:
+            return ErrorHandler.internal_error('Attachment service unavailable')
+        attachment = attachment_service.get_attachment(attachment_id)
+        if not attachment or not attachment.get('content_sha256'):
+            return ErrorHandler.not_found('Attachment not found')
+        path = os.path.abspath(attachment_service.blob_path(attachment['content_sha256']))
+        if not os.path.exists(path):
+            return ErrorHandler.not_found('Attachment content missing')
+        # conditional: ETag/If-None-Match and Range requests; the body goes out
+        # through the server's file wrapper (sendfile) or X-Sendfile
+        response = send_file(
+            path, mimetype=attachment.get('mime_type') or 'application/octet-stream',
+            as_attachment=True, download_name=attachment.get('file_name') or attachment_id,
+            conditional=True, etag=attachment['content_sha256']
+        )
+        response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+        return response
+    
+    # ===== NOTIFICATION ROUTES =====
+    
+    @app.route('/api/notifications', methods=['GET'])
+    @require_auth
+    def list_notifications():
+        if not notification_service:
+            return ErrorHandler.internal_error('Notification service unavailable')
+        limit = min(request.args.get('limit', app.config['NOTIFICATION_PAGE_SIZE'], type=int), 200)
+        page = notification_service.get_user_notifications(
+            request.user['user_id'],
+            unread_only=request.args.get('unread_only', 'false').lower() == 'true',
+            limit=max(limit, 1),
+            cursor=request.args.get('cursor')
+        )
+        return ErrorHandler.success_response({
+            'notifications': page,
+            'next_cursor': notification_service.next_cursor(page, max(limit, 1))
+        })
+    
+    @app.route('/api/notifications/unread-count', methods=['GET'])
+    @require_auth
+    def unread_notification_count():
+        if not notification_service:
+            return ErrorHandler.internal_error('Notification service unavailable')
+        return ErrorHandler.success_response({
+            'unread_count': notification_service.get_unread_count(request.user['user_id'])
+        })
+    
+    @app.route('/api/notifications/<notification_id>/read', methods=['PUT'])
+    @require_auth
+    def read_notification(notification_id):
+        if not notification_service:
+            return ErrorHandler.internal_error('Notification service unavailable')
+        result = notification_service.mark_as_read(notification_id, request.user['user_id'])
+        return ErrorHandler.success_response(None, 'Marked as read') if result['success'] else ErrorHandler.internal_error(result.get('error'))
+    
+    @app.route('/api/notifications/read-all', methods=['PUT'])
+    @require_auth
+    def read_all_notifications():
+        if not notification_service:
+            return ErrorHandler.internal_error('Notification service unavailable')
+        result = notification_service.mark_all_as_read(request.user['user_id'])
+        return ErrorHandler.success_response(None, 'All marked as read') if result['success'] else ErrorHandler.internal_error(result.get('error'))
+    
+    @app.route('/api/notifications/broadcast', methods=['POST'])
+    @require_auth
+    @require_role('admin')
+    def broadcast_notification():
+        if not notification_service or not user_service:
+            return ErrorHandler.internal_error('Notification service unavailable')
+        data = request.get_json() or {}
+        title = data.get('title', '').strip()
+        message = data.get('message', '').strip()
+        if not title or not message:
+            return ErrorHandler.bad_request('Title and message required')
+        agent_ids = [agent['user_id'] for agent in user_service.get_agents()]
+        result = notification_service.notify_users(
+            agent_ids, title, message, data.get('notification_type', 'info')
+        )
+        if not result['success']:
+            return ErrorHandler.internal_error(result.get('error'))
+        return ErrorHandler.created_response({'recipients': len(result['data'])}, 'Broadcast sent')
+    
+    # ===== EVENT STREAM =====
+    
+    # Each WSGI stream occupies a server thread until the client disconnects
+    wsgi_streams = threading.BoundedSemaphore(app.config['SSE_MAX_WSGI_STREAMS'])
+    
+    @app.route('/api/events/stream', methods=['GET'])
+    def event_stream():
+        user = event_controller.authenticate(
+            request.headers.get('Authorization', ''), request.args.get('access_token')
+        )
+        if not user:
+            return ErrorHandler.unauthorized('Invalid or expired token')
+        ticket_ids = request.args.get('tickets', '').split(',')
+        error, channels = event_controller.resolve_channels(user, ticket_ids)
+        if error:
+            return error
+        if not wsgi_streams.acquire(blocking=False):
+            return ErrorHandler.service_unavailable(
+                'Too many open event streams on this worker', retry_after=5, error_code='STREAMS_FULL'
+            )
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        subscription = event_bus.subscribe(channels, last_event_id)
+        response = Response(event_controller.stream(subscription),
+                            mimetype='text/event-stream', headers=SSE_HEADERS)
+        
+        def release():
+            subscription.close()
+            wsgi_streams.release()
+        response.call_on_close(release)
+        return response
+    
+    # ===== AUDIT ROUTES =====
+    
+    @app.route('/api/audit-logs', methods=['GET'])
+    @require_auth
+    @require_role('admin')
+    def list_audit_logs():
+        if not audit_store:
+            return ErrorHandler.internal_error('Audit log unavailable')
+        now = datetime.utcnow()
+        start = parse_timestamp(request.args.get('start') or (now - timedelta(days=7)).isoformat())
+        end = parse_timestamp(request.args.get('end') or now.isoformat())
+        if start is None or end is None:
+            return ErrorHandler.bad_request('start and end must be ISO-8601 timestamps')
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 1000)
+        filters = {f: request.args.get(f) for f in AuditLogStore.FILTERS}
+        try:
+            logs, next_cursor = audit_store.page(start, end, limit, request.args.get('cursor'), **filters)
+        except Exception as e:
+            return ErrorHandler.internal_error(str(e))
+        return ErrorHandler.success_response({
+            'logs': [log.to_dict() for log in logs],
+            'next_cursor': next_cursor
+        })
     
     # ===== ANALYTICS ROUTES =====
     
@@ -258,6 +718,12 @@ def create_app():
             'database': 'connected' if db else 'demo_mode'
         })
     
+    @app.route('/api/metrics', methods=['GET'])
+    @require_auth
+    @require_role('admin')
+    def metrics():
+        return ErrorHandler.success_response(snapshot_all())
+    
     # ===== ERROR HANDLERS =====
     
     @app.errorhandler(404)
@@ -0,0 +1,149 @@
+"""SupportPilot ASGI entry point
+
+Serves the same Flask route table under an ASGI server:
+
+    uvicorn backend.asgi:asgi_app --workers 2
+
+The event loop owns the sockets, so idle keep-alive connections cost no
+thread; a request only borrows a thread from a bounded pool while its
+synchronous handler (and its blocking Supabase calls) runs. Responses keep
+the ErrorHandler contract because they come from the unchanged Flask app.
+
+The event stream (/api/events/stream) is served natively on the loop, so an
+idle SSE client holds no thread at all.
+"""
+import asyncio
+import functools
+import json
+from urllib.parse import parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgiInstance
+
+from backend.app import app, shutdown_app
+from backend.controllers.event_controller import SSE_HEADERS
+from backend.utils.error_handler import ErrorHandler
+
+EVENT_STREAM_PATH = '/api/events/stream'
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Await a blocking call (database I/O) on the handler thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(fn, *args, **kwargs))
+
+
+class _WsgiRequest(WsgiToAsgiInstance):
+    """
+    One Flask request, run on the loop's default executor (the ASGI_THREADS
+    pool). asgiref's own WsgiToAsgi is thread sensitive, which would run
+    every request on a single shared thread.
+    """
+
+    run_wsgi_app = sync_to_async(WsgiToAsgiInstance.__dict__['run_wsgi_app'].func, thread_sensitive=False)
+
+
+class SupportPilotASGI:
+    """ASGI adapter with lifespan handling for the Flask application"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self._handler_pool = None
+
+    async def wsgi(self, scope, receive, send):
+        await _WsgiRequest(self.flask_app)(scope, receive, send)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            if scope['path'] == EVENT_STREAM_PATH and scope['method'] == 'GET':
+                await self._event_stream(scope, receive, send)
+            else:
+                await self.wsgi(scope, receive, send)
+        else:
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Sync handlers run on the loop's default executor, so its size
+                # caps concurrent database work rather than open connections
+                self._handler_pool = ThreadPoolExecutor(
+                    max_workers=self.flask_app.config['ASGI_THREADS'],
+                    thread_name_prefix='asgi-handler'
+                )
+                asyncio.get_running_loop().set_default_executor(self._handler_pool)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                shutdown_app(self.flask_app)
+                if self._handler_pool is not None:
+                    self._handler_pool.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _event_stream(self, scope, receive, send):
+        """Native SSE endpoint mirroring the Flask route"""
+        controller = self.flask_app.extensions['supportpilot']['event_controller']
+        query = parse_qs(scope.get('query_string', b'').decode())
+        headers = {k.decode().lower(): v.decode() for k, v in scope['headers']}
+
+        user = controller.authenticate(headers.get('authorization', ''),
+                                       query.get('access_token', [None])[0])
+        if not user:
+            return await self._send_json(send, *ErrorHandler.unauthorized('Invalid or expired token'))
+        # This path skips Flask's before_request, so apply the rate limit here
+        rate_limiter = self.flask_app.extensions['supportpilot'].get('rate_limiter')
+        if rate_limiter:
+            client = scope.get('client') or (None,)
+            allowed, retry_after = rate_limiter.check('event_stream', user.get('user_id'), client[0])
+            if not allowed:
+                return await self._send_json(send, *ErrorHandler.too_many_requests('Rate limit exceeded', retry_after))
+        ticket_ids = query.get('tickets', [''])[0].split(',')
+        # Ownership checks hit the database, so run them on the handler pool
+        error, channels = await run_blocking(controller.resolve_channels, user, ticket_ids)
+        if error:
+            return await self._send_json(send, *error)
+
+        last_event_id = headers.get('last-event-id') or query.get('last_event_id', [None])[0]
+        subscription = controller.event_bus.subscribe(
+            channels, last_event_id, loop=asyncio.get_running_loop()
+        )
+        response_headers = [(b'content-type', b'text/event-stream; charset=utf-8')]
+        response_headers += [(k.lower().encode(), v.encode()) for k, v in SSE_HEADERS.items()]
+        origin = headers.get('origin')
+        allowed = self.flask_app.config['CORS_ORIGINS']
+        if origin and ('*' in allowed or origin in allowed):
+            response_headers.append((b'access-control-allow-origin', origin.encode()))
+        disconnected = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': response_headers})
+            await send({'type': 'http.response.body', 'body': controller.preamble(subscription).encode(),
+                        'more_body': True})
+            while not subscription.closed and not disconnected.done():
+                event = await subscription.get_async(timeout=controller.heartbeat_seconds)
+                message = event.to_sse() if event else ': keep-alive\n\n'
+                await send({'type': 'http.response.body', 'body': message.encode(), 'more_body': True})
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+            subscription.close()
+
+    @staticmethod
+    async def _wait_for_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    @staticmethod
+    async def _send_json(send, body, status, headers=None):
+        payload = json.dumps(body).encode()
+        response_headers = [(b'content-type', b'application/json'),
+                            (b'content-length', str(len(payload)).encode())]
+        response_headers += [(k.lower().encode(), str(v).encode()) for k, v in (headers or {}).items()]
+        await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+        await send({'type': 'http.response.body', 'body': payload})
+
+
+asgi_app = SupportPilotASGI(app)
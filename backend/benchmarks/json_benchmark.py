@@ -0,0 +1,89 @@
+"""JSON Benchmark - encoding and compressing a large ticket listing
+
+Encodes a payload shaped like GET /api/tickets (1000 tickets by default,
+wrapped the way ErrorHandler.success_response does) with the stdlib and the
+orjson providers, and reports gzip/brotli sizes and times. Prints one JSON
+report.
+
+    python backend/benchmarks/json_benchmark.py --tickets 1000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+# Ensure backend module is importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from flask import Flask  # noqa: E402
+from backend.utils import compression  # noqa: E402
+from backend.utils.json_provider import OrjsonProvider, StdlibJSONProvider, orjson  # noqa: E402
+
+
+def make_payload(count: int) -> Dict:
+    start = datetime(2024, 1, 1)
+    tickets = [{
+        'ticket_id': str(uuid.UUID(int=i)),
+        'customer_id': f'customer-{i % 500}',
+        'title': f'Cannot log in to the mobile app ({i})',
+        'description': 'After the latest update the app crashes on the login screen. ' * 3,
+        'priority': ('low', 'medium', 'high', 'urgent')[i % 4],
+        'status': 'open',
+        'assigned_agent_id': f'agent-{i % 20}' if i % 3 else None,
+        'sentiment_score': 0.25,
+        'tags': ['login', 'mobile'],
+        'created_at': start + timedelta(minutes=i),
+        'updated_at': (start + timedelta(minutes=i)).isoformat(),
+    } for i in range(count)]
+    return {'success': True, 'message': 'Success', 'data': {'tickets': tickets, 'total': count}}
+
+
+def best_of(fn: Callable, repeat: int) -> float:
+    """Fastest of repeat runs, in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3)
+
+
+def run(count: int, repeat: int) -> Dict:
+    app = Flask(__name__)
+    payload = make_payload(count)
+    providers = {'stdlib': StdlibJSONProvider(app)}
+    if orjson is not None:
+        providers['orjson'] = OrjsonProvider(app)
+
+    report = {'tickets': count, 'encode_ms': {}, 'response_ms': {}, 'compression': {}}
+    with app.app_context():
+        for name, provider in providers.items():
+            report['encode_ms'][name] = best_of(lambda: provider.dumps(payload), repeat)
+            report['response_ms'][name] = best_of(lambda: provider.response(payload), repeat)
+    body = providers['stdlib'].dumps(payload).encode()
+    report['body_bytes'] = len(body)
+    encodings: List[str] = ['gzip'] + (['br'] if compression.brotli is not None else [])
+    for encoding in encodings:
+        compressed = compression.compress(body, encoding)
+        report['compression'][encoding] = {
+            'bytes': len(compressed),
+            'ratio': round(len(compressed) / len(body), 3),
+            'ms': best_of(lambda: compression.compress(body, encoding), repeat),
+        }
+    return report
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='Benchmark API JSON encoding')
+    parser.add_argument('--tickets', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.tickets, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Models Benchmark - cost of materializing database rows as model objects
+
+Builds N ticket rows shaped like PostgREST results (ISO timestamp strings)
+and reports, per strategy, the time to materialize them and the memory held
+beyond the shared field values, plus the time to serialize them back with
+to_dict. Prints one JSON report.
+
+    python backend/benchmarks/models_benchmark.py --rows 100000
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+# Ensure backend module is importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.models.ticket import Ticket  # noqa: E402
+
+
+def make_rows(count: int) -> List[Dict]:
+    start = datetime(2024, 1, 1)
+    return [{
+        'ticket_id': f'ticket-{i:08d}',
+        'customer_id': f'customer-{i % 5000}',
+        'title': f'Ticket {i}',
+        'description': 'The app crashes when I try to log in from my phone',
+        'priority': ('low', 'medium', 'high', 'urgent')[i % 4],
+        'status': 'open',
+        'assigned_agent_id': None,
+        'sentiment_score': 0.42,
+        'category': None,
+        'tags': [],
+        'created_at': (start + timedelta(seconds=i)).isoformat(),
+        'updated_at': (start + timedelta(seconds=i)).isoformat(),
+    } for i in range(count)]
+
+
+def measure(build: Callable[[], List]) -> Dict:
+    """Time a build, then rebuild under tracemalloc (which slows allocation)
+    to get the memory it still holds afterwards"""
+    gc.collect()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = {'seconds': round(elapsed, 4), 'held_mb': round(held / 1024 / 1024, 2),
+             'bytes_per_row': round(held / len(result)) if result else 0}
+    return stats, result
+
+
+def run(count: int) -> Dict:
+    rows = make_rows(count)
+    report = {'rows': count, 'materialize': {}, 'to_dict_seconds': {}}
+    strategies = {
+        # Copies of the raw rows: what services hold today
+        'dict_copy': lambda: [dict(row) for row in rows],
+        'from_dict': lambda: [Ticket.from_dict(row) for row in rows],
+        'from_row': lambda: [Ticket.from_row(row) for row in rows],
+    }
+    objects = {}
+    for name, build in strategies.items():
+        report['materialize'][name], objects[name] = measure(build)
+
+    for name in ('from_dict', 'from_row'):
+        items = objects[name]
+        start = time.perf_counter()
+        for item in items:
+            item.to_dict()
+        report['to_dict_seconds'][name] = round(time.perf_counter() - start, 4)
+    dict_bytes = report['materialize']['dict_copy']['bytes_per_row']
+    report['from_row_vs_dict_memory'] = round(
+        report['materialize']['from_row']['bytes_per_row'] / dict_bytes, 3) if dict_bytes else None
+    return report
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='Benchmark model materialization')
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.rows), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Password Benchmark - login throughput versus scrypt cost
+
+For each cost factor n, hashes one password and then verifies it from
+--clients concurrent threads (the way request threads call
+AuthController.login) through a PasswordHasher pool for --seconds. Reports
+logins per second and latency percentiles, and the hash memory per call
+(128 * n * r bytes). Prints one JSON report.
+
+    python backend/benchmarks/password_benchmark.py --costs 12,13,14,15 --workers 4
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from typing import Dict, List
+
+# Ensure backend module is importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.utils.passwords import PasswordHasher, PasswordHasherBusy  # noqa: E402
+
+
+def measure(hasher: PasswordHasher, clients: int, seconds: float) -> Dict:
+    encoded = hasher.hash('correct horse battery staple')
+    hasher.verify('correct horse battery staple', encoded)  # start the pool
+    latencies: List[float] = []
+    rejected = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                hasher.verify('correct horse battery staple', encoded)
+            except PasswordHasherBusy:
+                with lock:
+                    rejected[0] += 1
+                time.sleep(0.001)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    pct = lambda q: round(latencies[min(int(q * len(latencies)), len(latencies) - 1)] * 1000, 2)
+    return {
+        'logins_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': pct(0.5) if latencies else None,
+        'p99_ms': pct(0.99) if latencies else None,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+        'rejected': rejected[0],
+    }
+
+
+def run(costs: List[int], r: int, p: int, workers: int, clients: int, max_pending: int,
+        seconds: float) -> Dict:
+    report = {'workers': workers, 'clients': clients, 'max_pending': max_pending, 'costs': {}}
+    for log_n in costs:
+        hasher = PasswordHasher(2 ** log_n, r, p, workers, max_pending, timeout=60)
+        try:
+            result = measure(hasher, clients, seconds)
+        finally:
+            hasher.shutdown()
+        result['memory_mib'] = round(128 * 2 ** log_n * r / 2 ** 20, 1)
+        report['costs'][f'n=2^{log_n}'] = result
+    return report
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='Benchmark login throughput per scrypt cost')
+    parser.add_argument('--costs', default='12,13,14,15', help='comma-separated log2(n) values')
+    parser.add_argument('--r', type=int, default=8)
+    parser.add_argument('--p', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='pool processes (0 hashes on the client threads)')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--max-pending', type=int, default=32)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args(argv)
+    costs = [int(c) for c in args.costs.split(',') if c.strip()]
+    print(json.dumps(run(costs, args.r, args.p, args.workers, args.clients,
+                         args.max_pending, args.seconds), indent=2))
+
+
+if __name__ == '__main__':
+    main()
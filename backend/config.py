@@ -17,13 +17,100 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=24)
     
+    # Login user cache (per worker; other workers see user changes within the TTL)
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', 10000))
+    USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 60))  # seconds
+    # scrypt cost for new hashes; existing hashes are upgraded on their next login
+    PASSWORD_SCRYPT_N = int(os.getenv('PASSWORD_SCRYPT_N', 2 ** 14))  # power of two
+    PASSWORD_SCRYPT_R = int(os.getenv('PASSWORD_SCRYPT_R', 8))
+    PASSWORD_SCRYPT_P = int(os.getenv('PASSWORD_SCRYPT_P', 1))
+    # Hash processes per API worker: the total is GUNICORN_WORKERS * PASSWORD_HASH_WORKERS
+    # (0 hashes on the request thread)
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 1))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 32))  # per process; then 503
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+    
     # Supabase
     SUPABASE_URL = os.getenv('SUPABASE_URL', '')
     SUPABASE_KEY = os.getenv('SUPABASE_KEY', '')
     
     # File Upload
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
-    UPLOAD_FOLDER = 'uploads'
+    UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')  # content-addressed attachment blobs
+    # Let a fronting nginx/Apache send attachment files (X-Sendfile) instead of the worker
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', '0') == '1'
+    
+    # Real-time events
+    EVENT_HISTORY_SIZE = int(os.getenv('EVENT_HISTORY_SIZE', 200))  # replayable events per channel
+    EVENT_QUEUE_SIZE = int(os.getenv('EVENT_QUEUE_SIZE', 500))  # per-subscriber backlog
+    SSE_HEARTBEAT_SECONDS = float(os.getenv('SSE_HEARTBEAT_SECONDS', 15))
+    # Under WSGI (gunicorn gthread) each open stream holds a worker thread, so
+    # streams per worker are capped below GUNICORN_THREADS; serve them from the
+    # ASGI entry point (backend/asgi.py), where idle streams hold no thread
+    SSE_MAX_WSGI_STREAMS = int(os.getenv('SSE_MAX_WSGI_STREAMS', 4))
+    
+    # Notifications
+    NOTIFICATION_INSERT_BATCH_SIZE = int(os.getenv('NOTIFICATION_INSERT_BATCH_SIZE', 500))  # rows per insert
+    NOTIFICATION_FLUSH_INTERVAL = float(os.getenv('NOTIFICATION_FLUSH_INTERVAL', 2))  # seconds
+    NOTIFICATION_MAX_PENDING = int(os.getenv('NOTIFICATION_MAX_PENDING', 10000))
+    NOTIFICATION_DIGEST_THRESHOLD = int(os.getenv('NOTIFICATION_DIGEST_THRESHOLD', 3))  # per user per flush
+    NOTIFICATION_UNREAD_CACHE_TTL = float(os.getenv('NOTIFICATION_UNREAD_CACHE_TTL', 30))  # seconds
+    NOTIFICATION_PAGE_SIZE = 50
+    
+    # Audit log
+    AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', 2))  # seconds
+    AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', 500))  # rows per insert
+    AUDIT_MAX_PENDING = int(os.getenv('AUDIT_MAX_PENDING', 20000))  # ring buffer size
+    AUDIT_SPILL_DIR = os.getenv('AUDIT_SPILL_DIR', 'audit_spill')  # empty: drop instead of spilling
+    AUDIT_SLOW_FLUSH_SECONDS = float(os.getenv('AUDIT_SLOW_FLUSH_SECONDS', 2))
+    AUDIT_RETRY_INTERVAL = float(os.getenv('AUDIT_RETRY_INTERVAL', 10))  # seconds spilling after a failure
+    
+    # Agent performance
+    AGENT_METRICS_FLUSH_INTERVAL = float(os.getenv('AGENT_METRICS_FLUSH_INTERVAL', 30))  # seconds
+    
+    # Tickets
+    TICKET_BULK_MAX = int(os.getenv('TICKET_BULK_MAX', 500))  # tickets per bulk status/assign request
+    
+    # Comments
+    COMMENT_PAGE_SIZE = int(os.getenv('COMMENT_PAGE_SIZE', 100))  # comments per thread page
+    
+    # Search
+    SEARCH_INDEX_PATH = os.getenv('SEARCH_INDEX_PATH', '')  # empty: keep the index in memory only
+    SEARCH_INDEX_SYNC_INTERVAL = float(os.getenv('SEARCH_INDEX_SYNC_INTERVAL', 60))  # seconds
+    
+    DUPLICATE_SYNC_INTERVAL = float(os.getenv('DUPLICATE_SYNC_INTERVAL', 60))  # seconds
+    
+    # Responses
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'auto')  # 'auto' (orjson if installed), 'orjson', 'stdlib'
+    RESPONSE_COMPRESSION = os.getenv('RESPONSE_COMPRESSION', '1') == '1'  # gzip/brotli large responses
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))  # bytes
+    
+    # Rate limiting (token buckets per user and per IP, in each worker process)
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '1') == '1'
+    RATE_LIMIT_USER_RATE = float(os.getenv('RATE_LIMIT_USER_RATE', 10))  # tokens per second
+    RATE_LIMIT_USER_BURST = float(os.getenv('RATE_LIMIT_USER_BURST', 60))
+    RATE_LIMIT_IP_RATE = float(os.getenv('RATE_LIMIT_IP_RATE', 20))
+    RATE_LIMIT_IP_BURST = float(os.getenv('RATE_LIMIT_IP_BURST', 120))
+    RATE_LIMIT_ROUTE_COSTS = os.getenv('RATE_LIMIT_ROUTE_COSTS', '')  # e.g. 'dashboard=20,list_tickets=2'
+    
+    # Admission control: shed requests with 503 while database latency is high
+    ADMISSION_CONTROL = os.getenv('ADMISSION_CONTROL', '1') == '1'
+    ADMISSION_LATENCY_THRESHOLD_MS = float(os.getenv('ADMISSION_LATENCY_THRESHOLD_MS', 500))
+    ADMISSION_MAX_CONCURRENCY = int(os.getenv('ADMISSION_MAX_CONCURRENCY', 64))  # requests per process
+    ADMISSION_MIN_CONCURRENCY = int(os.getenv('ADMISSION_MIN_CONCURRENCY', 4))
+    
+    # Serving
+    ASGI_THREADS = int(os.getenv('ASGI_THREADS', 64))  # threads running sync handlers under ASGI
+    ML_EXECUTOR = os.getenv('ML_EXECUTOR', 'inline')  # 'inline', 'thread', 'process' or 'server'
+    ML_EXECUTOR_WORKERS = int(os.getenv('ML_EXECUTOR_WORKERS', 0)) or None  # default: cpu count
+    ML_EXECUTOR_TIMEOUT = float(os.getenv('ML_EXECUTOR_TIMEOUT', 10))
+    # ML_EXECUTOR=server: score via backend/ml/inference_server.py, in-process if it is down
+    ML_INFERENCE_SOCKET = os.getenv('ML_INFERENCE_SOCKET', '/tmp/supportpilot-ml.sock')
+    ML_INFERENCE_TIMEOUT = float(os.getenv('ML_INFERENCE_TIMEOUT', 2))
+    ML_INFERENCE_RETRY_INTERVAL = float(os.getenv('ML_INFERENCE_RETRY_INTERVAL', 5))
+    # Load models in the server master before forking; disable for fast-starting
+    # API workers that leave ML scoring to ML_EXECUTOR=process
+    ML_WARM_UP = os.getenv('ML_WARM_UP', '1') == '1'
 
 
 class DevelopmentConfig(Config):
@@ -35,6 +122,7 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     """Production configuration"""
     DEBUG = False
+    ML_EXECUTOR = os.getenv('ML_EXECUTOR', 'process')
 
 
 class TestingConfig(Config):
@@ -1,11 +1,27 @@
-"""Auth Controller - authentication endpoints with Supabase integration"""
+"""Auth Controller - authentication endpoints with Supabase integration
+
+Users created before password hashes were stored have none and cannot log
+in. They (or anyone an admin resets) set a password with a one-time token:
+
+    python backend/controllers/auth_controller.py password-tokens --missing
+    python backend/controllers/auth_controller.py password-tokens --user-id <id>
+"""
+import argparse
+import os
+import sys
 from flask import request, Blueprint
 from functools import wraps
+from typing import List
 import uuid
-from backend.utils.jwt_utils import JWTUtils
-from backend.utils.validators import Validators
-from backend.utils.error_handler import ErrorHandler
-from backend.services.user_service import UserService
+
+# Ensure backend module is importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.utils.jwt_utils import JWTUtils  # noqa: E402
+from backend.utils.validators import Validators  # noqa: E402
+from backend.utils.error_handler import ErrorHandler  # noqa: E402
+from backend.utils.passwords import PasswordHasher, PasswordHasherBusy, hash_fingerprint  # noqa: E402
+from backend.services.user_service import UserService  # noqa: E402
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
@@ -13,10 +29,12 @@ auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 class AuthController:
     """Handles authentication operations with Supabase integration"""
     
-    def __init__(self, user_service: UserService, jwt_utils: JWTUtils, db=None):
+    def __init__(self, user_service: UserService, jwt_utils: JWTUtils, db=None,
+                 password_hasher: PasswordHasher = None):
         self.user_service = user_service
         self.jwt_utils = jwt_utils
         self.db = db
+        self.password_hasher = password_hasher or PasswordHasher()
     
     def register(self, request_data: dict):
         """Register a new user with Supabase Auth and create user profile"""
@@ -42,18 +60,15 @@ class AuthController:
         if not valid:
             return ErrorHandler.bad_request(msg)
         
-        # Check if user exists in database
-        existing = self.user_service.get_user_by_email(email)
-        if existing:
-            return ErrorHandler.conflict('Email already registered')
-        
         try:
-            # In production: Use Supabase Auth to create user with password
-            # For now, create user profile with generated user_id
             user_id = str(uuid.uuid4())
+            password_hash = self.password_hasher.hash(password)
             
-            result = self.user_service.create_user(user_id, email, name, role)
+            # One insert; a taken email is caught by the unique constraint
+            result = self.user_service.create_user(user_id, email, name, role, password_hash)
             
+            if result.get('error_code') == 'CONFLICT':
+                return ErrorHandler.conflict(result['error'])
             if result['success']:
                 # Generate JWT token
                 token = self.jwt_utils.generate_token(user_id, email, role)
@@ -66,6 +81,8 @@ class AuthController:
                 }, 'User registered successfully')
             else:
                 return ErrorHandler.internal_error(result.get('error'))
+        except PasswordHasherBusy:
+            return ErrorHandler.service_unavailable('Too many sign-ins in progress')
         except Exception as e:
             return ErrorHandler.internal_error(f'Registration failed: {str(e)}')
     
@@ -78,15 +95,21 @@ class AuthController:
             return ErrorHandler.bad_request('Email and password required')
         
         try:
-            # In production: Verify password against Supabase Auth
-            # For demo: simple lookup and validation
-            user = self.user_service.get_user_by_email(email)
-            if not user:
+            user = self.user_service.get_auth_user(email)
+            stored_hash = user.get('password_hash') if user else None
+            if not stored_hash:
+                # Same cost as a wrong password, so unknown emails are not revealed
+                self.password_hasher.dummy_verify(password)
+                return ErrorHandler.unauthorized('Invalid credentials')
+            if not self.password_hasher.verify(password, stored_hash):
                 return ErrorHandler.unauthorized('Invalid credentials')
             
             if not user.get('is_active'):
                 return ErrorHandler.forbidden('User account is inactive')
             
+            if self.password_hasher.needs_rehash(stored_hash):
+                self._rehash(user['user_id'], password)
+            
             # Generate JWT token
             token = self.jwt_utils.generate_token(
                 user['user_id'],
@@ -101,9 +124,70 @@ class AuthController:
                 'role': user['role'],
                 'token': token
             }, 'Login successful')
+        except PasswordHasherBusy:
+            return ErrorHandler.service_unavailable('Too many sign-ins in progress')
         except Exception as e:
             return ErrorHandler.internal_error(f'Login failed: {str(e)}')
     
+    def _rehash(self, user_id: str, password: str):
+        """Upgrade a hash made with older cost parameters; failures wait for the next login"""
+        try:
+            result = self.user_service.set_password_hash(user_id, self.password_hasher.hash(password))
+            if not result['success']:
+                print(f"[AuthController] Password rehash failed: {result.get('error')}")
+        except Exception as e:
+            print(f"[AuthController] Password rehash failed: {e}")
+    
+    def issue_password_token(self, user_id: str, expires_in_hours: int = 72):
+        """
+        One-time token for a user to set a new password (admin reset, or a
+        user created before password hashes were stored). It is pinned to
+        the current hash, so it stops working once a password is set.
+        """
+        user = self.user_service.get_auth_user_by_id(user_id)
+        if not user:
+            return ErrorHandler.not_found('User not found')
+        token = self.jwt_utils.generate_password_token(
+            user_id, hash_fingerprint(user.get('password_hash')), expires_in_hours)
+        return ErrorHandler.success_response({
+            'user_id': user_id,
+            'email': user['email'],
+            'token': token,
+            'expires_in_hours': expires_in_hours
+        }, 'Password token issued')
+    
+    def set_password(self, request_data: dict):
+        """Set a password with a one-time token from issue_password_token"""
+        token = request_data.get('token', '').strip()
+        password = request_data.get('password', '')
+        
+        payload = self.jwt_utils.decode_password_token(token) if token else None
+        if payload is None:
+            return ErrorHandler.unauthorized('Invalid or expired token')
+        
+        valid, msg = Validators.validate_password(password)
+        if not valid:
+            return ErrorHandler.bad_request(msg)
+        
+        try:
+            user = self.user_service.get_auth_user_by_id(payload['user_id'])
+            if not user or hash_fingerprint(user.get('password_hash')) != payload.get('fingerprint'):
+                return ErrorHandler.unauthorized('Invalid or expired token')
+            if not user.get('is_active'):
+                return ErrorHandler.forbidden('User account is inactive')
+            
+            result = self.user_service.set_password_hash(user['user_id'], self.password_hasher.hash(password))
+            if not result['success']:
+                return ErrorHandler.internal_error(result.get('error'))
+            return ErrorHandler.success_response({
+                'user_id': user['user_id'],
+                'email': user['email']
+            }, 'Password set')
+        except PasswordHasherBusy:
+            return ErrorHandler.service_unavailable('Too many sign-ins in progress')
+        except Exception as e:
+            return ErrorHandler.internal_error(f'Set password failed: {str(e)}')
+    
     def validate_token(self, token: str):
         """Validate JWT token and return payload"""
         payload = self.jwt_utils.decode_token(token)
@@ -151,14 +235,12 @@ class AuthController:
         if not valid:
             return ErrorHandler.bad_request(msg)
 
-        # Check if user exists in database
-        existing = self.user_service.get_user_by_email(email)
-        if existing:
-            return ErrorHandler.conflict('Email already registered')
-
         try:
             user_id = str(uuid.uuid4())
-            result = self.user_service.create_user(user_id, email, name, role)
+            password_hash = self.password_hasher.hash(password)
+            result = self.user_service.create_user(user_id, email, name, role, password_hash)
+            if result.get('error_code') == 'CONFLICT':
+                return ErrorHandler.conflict(result['error'])
             if result['success']:
                 # Return created user object WITHOUT token
                 return ErrorHandler.created_response({
@@ -169,6 +251,8 @@ class AuthController:
                 }, 'Agent created successfully')
             else:
                 return ErrorHandler.internal_error(result.get('error'))
+        except PasswordHasherBusy:
+            return ErrorHandler.service_unavailable('Too many sign-ins in progress')
         except Exception as e:
             return ErrorHandler.internal_error(f'Create agent failed: {str(e)}')
 
@@ -195,3 +279,35 @@ def require_role(*roles):
             return f(*args, **kwargs)
         return decorated_function
     return decorator
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='SupportPilot password setup')
+    commands = parser.add_subparsers(dest='command', required=True)
+    tokens = commands.add_parser('password-tokens', help='issue one-time set-password tokens')
+    who = tokens.add_mutually_exclusive_group(required=True)
+    who.add_argument('--user-id', help='one user (e.g. an admin reset)')
+    who.add_argument('--missing', action='store_true', help='every active user without a password')
+    tokens.add_argument('--hours', type=int, default=72, help='token lifetime')
+    args = parser.parse_args(argv)
+
+    from backend.app import connect_database
+    from backend.config import Config
+    db = connect_database()
+    if db is None:
+        parser.error('SUPABASE_URL and SUPABASE_KEY are required')
+    user_service = UserService(db)
+    controller = AuthController(user_service, JWTUtils(os.getenv('JWT_SECRET_KEY', Config.JWT_SECRET_KEY)),
+                                db, PasswordHasher(workers=0))
+    user_ids = [args.user_id] if args.user_id else \
+        [user['user_id'] for user in user_service.get_users_without_password()]
+    for user_id in user_ids:
+        body, status = controller.issue_password_token(user_id, args.hours)
+        if status != 200:
+            print(f'{user_id}\t{body.get("error")}')
+            continue
+        print(f"{body['data']['email']}\t{body['data']['token']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Event Controller - real-time event streams (Server-Sent Events)"""
+from typing import Dict, Iterator, List, Optional, Tuple
+from backend.utils.error_handler import ErrorHandler
+from backend.utils.event_bus import EventBus, Subscription
+from backend.utils.jwt_utils import JWTUtils
+from backend.services.ticket_service import TicketService
+
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'X-Accel-Buffering': 'no'  # disable proxy buffering (nginx)
+}
+
+
+class EventController:
+    """Authorizes and serves per-user event streams"""
+
+    MAX_TICKET_CHANNELS = 20
+
+    def __init__(self, event_bus: EventBus, jwt_utils: JWTUtils,
+                 ticket_service: TicketService = None, heartbeat_seconds: float = 15):
+        self.event_bus = event_bus
+        self.jwt_utils = jwt_utils
+        self.ticket_service = ticket_service
+        self.heartbeat_seconds = heartbeat_seconds
+
+    def authenticate(self, auth_header: str, access_token: str = None) -> Optional[Dict]:
+        """Decode the JWT from the Authorization header or, because EventSource
+        cannot send headers, from the access_token query parameter"""
+        token = auth_header[7:] if auth_header.startswith('Bearer ') else access_token
+        if not token:
+            return None
+        return self.jwt_utils.decode_token(token)
+
+    def resolve_channels(self, user: Dict, ticket_ids: List[str]) -> Tuple[Optional[tuple], List[str]]:
+        """
+        Channels the user may follow: their own, staff-wide events for agents
+        and admins, and the requested tickets they are allowed to see.
+        Returns (error_response, channels).
+        """
+        ticket_ids = [t for t in dict.fromkeys(ticket_ids) if t]
+        if len(ticket_ids) > self.MAX_TICKET_CHANNELS:
+            return ErrorHandler.bad_request(
+                f'At most {self.MAX_TICKET_CHANNELS} tickets per stream'), []
+
+        channels = [f"user:{user['user_id']}"]
+        is_staff = user.get('role') in ('agent', 'admin')
+        if is_staff:
+            channels.append('staff')
+
+        for ticket_id in ticket_ids:
+            if is_staff:
+                channels.extend([f'ticket:{ticket_id}', f'ticket:{ticket_id}:internal'])
+                continue
+            ticket = self.ticket_service.get_ticket(ticket_id) if self.ticket_service else None
+            if not ticket or ticket.get('customer_id') != user['user_id']:
+                return ErrorHandler.forbidden(f'Cannot follow ticket {ticket_id}'), []
+            channels.append(f'ticket:{ticket_id}')
+        return None, channels
+
+    def preamble(self, subscription: Subscription) -> str:
+        """First message of a stream: reconnect delay, and a resync hint when
+        the requested Last-Event-ID can no longer be replayed"""
+        message = 'retry: 3000\n\n'
+        if subscription.resync_required:
+            message += 'event: resync\ndata: {}\n\n'
+        return message
+
+    def stream(self, subscription: Subscription) -> Iterator[str]:
+        """Blocking SSE generator for WSGI servers (holds one thread per client)"""
+        try:
+            yield self.preamble(subscription)
+            while not subscription.closed:
+                event = subscription.get(timeout=self.heartbeat_seconds)
+                yield event.to_sse() if event else ': keep-alive\n\n'
+        finally:
+            subscription.close()
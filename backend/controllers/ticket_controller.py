@@ -3,7 +3,11 @@ from flask import request, Blueprint
 from backend.utils.validators import Validators
 from backend.utils.error_handler import ErrorHandler
 from backend.services.ticket_service import TicketService
-from backend.ml.predictor import SentimentAnalyzer, PriorityPredictor, KeywordExtractor
+from backend.services.comment_service import CommentService
+from backend.services.search_index import TicketSearchIndex
+from backend.services.duplicate_detector import DuplicateDetector
+from backend.utils.executors import MLExecutor, MLExecutorTimeout
+from backend.ml.predictor import score_ticket
 
 ticket_bp = Blueprint('tickets', __name__, url_prefix='/api/tickets')
 
@@ -11,13 +15,19 @@ ticket_bp = Blueprint('tickets', __name__, url_prefix='/api/tickets')
 class TicketController:
     """Handles ticket operations"""
     
-    def __init__(self, ticket_service: TicketService):
+    VALID_STATUSES = ['open', 'in_progress', 'pending', 'resolved', 'closed']
+    
+    def __init__(self, ticket_service: TicketService, ml_executor: MLExecutor = None,
+                 search_index: TicketSearchIndex = None,
+                 duplicate_detector: DuplicateDetector = None,
+                 comment_service: CommentService = None):
         self.ticket_service = ticket_service
-        self.sentiment_analyzer = SentimentAnalyzer()
-        self.priority_predictor = PriorityPredictor()
-        self.keyword_extractor = KeywordExtractor()
+        self.comment_service = comment_service
+        self.ml_executor = ml_executor or MLExecutor('inline')
+        self.search_index = search_index
+        self.duplicate_detector = duplicate_detector
     
-    def create_ticket(self, request_data: dict, customer_id: str):
+    def create_ticket(self, request_data: dict, customer_id: str, role: str = 'customer'):
         """Create a new ticket"""
         title = request_data.get('title', '').strip()
         description = request_data.get('description', '').strip()
@@ -36,12 +46,19 @@ class TicketController:
         if not valid:
             return ErrorHandler.bad_request(msg)
         
-        # ML: Analyze sentiment and predict priority
-        sentiment = self.sentiment_analyzer.analyze(description)
-        predicted_priority = self.priority_predictor.predict_priority(
-            description, sentiment['score']
-        )
-        keywords = self.keyword_extractor.extract(description)
+        # ML: Analyze sentiment and predict priority (off the request thread if configured)
+        try:
+            enrichment = self.ml_executor.run(score_ticket, description)
+        except MLExecutorTimeout:
+            return ErrorHandler.service_unavailable('Ticket analysis is overloaded, try again shortly')
+        sentiment = enrichment['sentiment']
+        predicted_priority = enrichment['predicted_priority']
+        keywords = enrichment['keywords']
+        
+        # Look up likely duplicates before the new ticket joins the index
+        similar = self.duplicate_detector.find_similar(description) if self.duplicate_detector else []
+        if similar and role not in ('agent', 'admin'):
+            similar = self._own_tickets_only(similar, customer_id)
         
         # Create ticket
         result = self.ticket_service.create_ticket(
@@ -55,11 +72,20 @@ class TicketController:
             ticket['sentiment_label'] = sentiment['label']
             ticket['predicted_priority'] = predicted_priority
             ticket['keywords'] = keywords
+            ticket['similar_tickets'] = [
+                {'ticket_id': ticket_id, 'similarity': similarity} for ticket_id, similarity in similar
+            ]
             
             return ErrorHandler.created_response(ticket, 'Ticket created successfully')
         else:
             return ErrorHandler.internal_error(result.get('error'))
     
+    def _own_tickets_only(self, similar: list, customer_id: str) -> list:
+        """Customers may only learn about their own tickets"""
+        tickets = self.ticket_service.get_tickets_by_ids([ticket_id for ticket_id, _ in similar])
+        own = {t['ticket_id'] for t in tickets if t.get('customer_id') == customer_id}
+        return [(ticket_id, similarity) for ticket_id, similarity in similar if ticket_id in own]
+    
     def get_ticket(self, ticket_id: str):
         """Get ticket details"""
         ticket = self.ticket_service.get_ticket(ticket_id)
@@ -67,22 +93,31 @@ class TicketController:
             return ErrorHandler.not_found('Ticket not found')
         return ErrorHandler.success_response(ticket)
     
+    def _with_comment_counts(self, tickets: list, include_internal: bool = True) -> list:
+        """Attach comment_count to each ticket with one batched lookup"""
+        if self.comment_service and tickets:
+            counts = self.comment_service.comment_counts(
+                [t['ticket_id'] for t in tickets], include_internal
+            )
+            for ticket in tickets:
+                ticket['comment_count'] = counts.get(ticket['ticket_id'], 0)
+        return tickets
+    
     def get_my_tickets(self, customer_id: str):
         """Get all tickets for customer"""
         tickets = self.ticket_service.get_customer_tickets(customer_id)
-        return ErrorHandler.success_response({'tickets': tickets})
+        return ErrorHandler.success_response({'tickets': self._with_comment_counts(tickets, False)})
     
     def get_assigned_tickets(self, agent_id: str):
         """Get assigned tickets for agent"""
         tickets = self.ticket_service.get_agent_tickets(agent_id)
-        return ErrorHandler.success_response({'tickets': tickets})
+        return ErrorHandler.success_response({'tickets': self._with_comment_counts(tickets)})
     
     def update_ticket_status(self, ticket_id: str, request_data: dict):
         """Update ticket status"""
         status = request_data.get('status', '').lower()
         
-        valid_statuses = ['open', 'in_progress', 'pending', 'resolved', 'closed']
-        if status not in valid_statuses:
+        if status not in self.VALID_STATUSES:
             return ErrorHandler.bad_request(f'Invalid status: {status}')
         
         result = self.ticket_service.update_ticket_status(ticket_id, status)
@@ -106,10 +141,85 @@ class TicketController:
         else:
             return ErrorHandler.internal_error(result.get('error'))
     
+    @staticmethod
+    def _bulk_ticket_ids(request_data: dict, max_tickets: int):
+        """(ticket_ids, error message) from a bulk request body"""
+        ticket_ids = request_data.get('ticket_ids')
+        if not isinstance(ticket_ids, list) or not ticket_ids:
+            return None, 'ticket_ids must be a non-empty list'
+        if not all(isinstance(t, str) and t.strip() for t in ticket_ids):
+            return None, 'ticket_ids must be strings'
+        if len(ticket_ids) > max_tickets:
+            return None, f'At most {max_tickets} tickets per request'
+        return [t.strip() for t in ticket_ids], None
+    
+    def bulk_update_status(self, request_data: dict, max_tickets: int = 500):
+        """Update the status of many tickets at once"""
+        status = request_data.get('status', '').lower()
+        if status not in self.VALID_STATUSES:
+            return ErrorHandler.bad_request(f'Invalid status: {status}')
+        ticket_ids, error = self._bulk_ticket_ids(request_data, max_tickets)
+        if error:
+            return ErrorHandler.bad_request(error)
+        
+        result = self.ticket_service.bulk_update_status(ticket_ids, status)
+        return ErrorHandler.success_response(result['data'], 'Status updated')
+    
+    def bulk_assign(self, request_data: dict, max_tickets: int = 500):
+        """Assign many tickets to an agent at once"""
+        agent_id = request_data.get('agent_id', '').strip()
+        if not agent_id:
+            return ErrorHandler.bad_request('Agent ID required')
+        ticket_ids, error = self._bulk_ticket_ids(request_data, max_tickets)
+        if error:
+            return ErrorHandler.bad_request(error)
+        
+        result = self.ticket_service.bulk_assign(ticket_ids, agent_id)
+        return ErrorHandler.success_response(result['data'], 'Tickets assigned')
+    
     def get_all_tickets(self, request_data: dict = None):
         """Get all tickets with pagination"""
         limit = request_data.get('limit', 50) if request_data else 50
         offset = request_data.get('offset', 0) if request_data else 0
         
         tickets = self.ticket_service.get_all_tickets(limit, offset)
+        return ErrorHandler.success_response({'tickets': self._with_comment_counts(tickets)})
+
+    def search_tickets(self, query: str, filters: dict, user: dict, limit: int = 20):
+        """Full-text search over tickets and their public comments"""
+        if not self.search_index:
+            return ErrorHandler.internal_error('Search unavailable')
+        query = (query or '').strip()
+        if not query:
+            return ErrorHandler.bad_request('Query (q) required')
+        limit = min(max(limit, 1), 100)
+        if user['role'] == 'customer':
+            filters = dict(filters, customer_id=user['user_id'])
+        
+        hits = self.search_index.search(query, limit, **filters)
+        scores = dict(hits)
+        tickets = self.ticket_service.get_tickets_by_ids([ticket_id for ticket_id, _ in hits])
+        for ticket in tickets:
+            ticket['search_score'] = scores[ticket['ticket_id']]
+        return ErrorHandler.success_response({'tickets': tickets, 'total': len(tickets)})
+
+    def get_similar_tickets(self, ticket_id: str, limit: int = 5):
+        """Likely duplicates of an existing ticket"""
+        if not self.duplicate_detector:
+            return ErrorHandler.internal_error('Duplicate detection unavailable')
+        ticket = self.ticket_service.get_ticket(ticket_id)
+        if not ticket:
+            return ErrorHandler.not_found('Ticket not found')
+        similar = self.duplicate_detector.find_similar_to_ticket(ticket, min(max(limit, 1), 50))
+        scores = dict(similar)
+        tickets = self.ticket_service.get_tickets_by_ids([t for t, _ in similar])
+        for t in tickets:
+            t['similarity'] = scores[t['ticket_id']]
         return ErrorHandler.success_response({'tickets': tickets})
+    
+    def get_duplicate_clusters(self):
+        """Group the open backlog into clusters of likely duplicates"""
+        if not self.duplicate_detector:
+            return ErrorHandler.internal_error('Duplicate detection unavailable')
+        clusters = self.duplicate_detector.cluster_open_tickets()
+        return ErrorHandler.success_response({'clusters': clusters, 'total': len(clusters)})
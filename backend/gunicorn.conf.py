@@ -0,0 +1,58 @@
+"""Gunicorn configuration for production serving
+
+    gunicorn -c backend/gunicorn.conf.py
+
+The app is preloaded in the master so model memory is shared copy-on-write
+by the workers. Each worker then opens its own Supabase client, since HTTP
+connection pools must not be shared across a fork.
+
+Server-Sent Events (/api/events/stream) hold a gthread thread per client, so
+each worker serves at most SSE_MAX_WSGI_STREAMS of them; run the event stream
+from the ASGI entry point (backend/asgi.py) instead.
+"""
+import gc
+import os
+import multiprocessing
+
+wsgi_app = 'backend.app:app'
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+preload_app = True
+
+# Drain in-flight requests before a worker exits (deploys, scale-down)
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+keepalive = 5
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 1000))
+
+
+def when_ready(server):
+    """Master: warm the models once, then freeze the heap before forking"""
+    from backend.app import app
+    if app.config['ML_WARM_UP']:
+        from backend.ml.predictor import warm_up
+        elapsed = warm_up()
+        server.log.info(f"ML models warmed in {elapsed * 1000:.0f} ms")
+    # Objects created so far are shared with workers; keep the GC from
+    # touching (and un-sharing) their pages
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Worker: replace the database client inherited from the master"""
+    from backend.app import app, reconnect_database
+    reconnect_database(app)
+    server.log.info(f"Worker {worker.pid} reconnected to the database")
+
+
+def worker_exit(server, worker):
+    """Worker: release pools and flush background work before exiting"""
+    from backend.app import app, shutdown_app
+    shutdown_app(app)
@@ -0,0 +1,230 @@
+"""ML Benchmark - quality and latency of the predictor variants
+
+Runs SentimentAnalyzer, PriorityPredictor and KeywordExtractor over a
+labeled dataset and prints one JSON report: accuracy and macro-F1 per
+task, per-item latency percentiles, single vs batch throughput, model load
+time and peak RSS. With --baseline the run fails (exit code 1) when
+quality drops by more than --tolerance, so performance work on the ML path
+can be checked for regressions.
+
+    python backend/ml/benchmark.py --variant compact --size 5000
+    python backend/ml/benchmark.py --baseline baseline.json --output run.json
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import time
+from typing import Callable, Dict, List, Tuple
+
+# Ensure backend module is importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.ml.predictor import (  # noqa: E402
+    CompactNBModel, KeywordExtractor, PriorityPredictor, SentimentAnalyzer,
+    _load_model, compact_model_path
+)
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_DATASET = os.path.join(ML_DIR, 'sample_dataset.csv')
+VARIANTS = ('auto', 'heuristic', 'pickle', 'compact')
+
+# Label-neutral filler used to scale the sample dataset up
+PREFIXES = ['', 'Hi team,', 'Hello,', 'Quick question:', 'Following up:', 'Ticket from mobile:']
+SUFFIXES = ['', 'Order #{n}.', 'Sent from my phone.', 'Account id {n}.', 'See attached screenshot.',
+            'This happened on {day}.']
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+
+
+def load_dataset(path: str = SAMPLE_DATASET) -> List[Dict]:
+    """Rows of a text,label,priority CSV"""
+    with open(path, newline='') as f:
+        return [{'text': row['text'] or '', 'label': row['label'], 'priority': row['priority']}
+                for row in csv.DictReader(f)]
+
+
+def generate_dataset(size: int, seed: int = 42, base: List[Dict] = None) -> List[Dict]:
+    """Scale a labeled dataset up to size rows by wrapping each text in
+    label-neutral prefixes and suffixes (deterministic for a given seed)"""
+    base = base or load_dataset()
+    rng = random.Random(seed)
+    rows = []
+    for i in range(size):
+        row = base[i % len(base)]
+        parts = [rng.choice(PREFIXES), row['text'],
+                 rng.choice(SUFFIXES).format(n=rng.randint(1000, 99999), day=rng.choice(DAYS))]
+        rows.append({'text': ' '.join(p for p in parts if p), 'label': row['label'],
+                     'priority': row['priority']})
+    return rows
+
+
+def classification_report(expected: List[str], predicted: List[str]) -> Dict:
+    """Accuracy and macro-averaged F1"""
+    labels = sorted(set(expected) | set(predicted))
+    f1_scores = []
+    for label in labels:
+        tp = sum(1 for e, p in zip(expected, predicted) if e == label and p == label)
+        fp = sum(1 for e, p in zip(expected, predicted) if e != label and p == label)
+        fn = sum(1 for e, p in zip(expected, predicted) if e == label and p != label)
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1_scores.append(2 * precision * recall / (precision + recall) if precision + recall else 0.0)
+    correct = sum(1 for e, p in zip(expected, predicted) if e == p)
+    return {
+        'accuracy': round(correct / len(expected), 4) if expected else 0.0,
+        'macro_f1': round(sum(f1_scores) / len(f1_scores), 4) if f1_scores else 0.0,
+    }
+
+
+def percentiles(samples: List[float]) -> Dict:
+    """Latency percentiles in milliseconds"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 4)
+    return {'p50_ms': pick(0.5), 'p90_ms': pick(0.9), 'p99_ms': pick(0.99),
+            'max_ms': round(ordered[-1] * 1000, 4)}
+
+
+def time_single(fn: Callable, texts: List[str]) -> Tuple[List, Dict]:
+    """Call fn per item; returns the outputs and latency/throughput stats"""
+    outputs, samples = [], []
+    start = time.perf_counter()
+    for text in texts:
+        t0 = time.perf_counter()
+        outputs.append(fn(text))
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    stats = percentiles(samples)
+    stats['items_per_sec'] = round(len(texts) / elapsed, 1) if elapsed else None
+    return outputs, stats
+
+
+def time_batch(fn: Callable, texts: List[str], batch_size: int) -> Tuple[List, Dict]:
+    """Call fn on batches; returns the outputs and throughput"""
+    outputs = []
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        outputs.extend(fn(texts[i:i + batch_size]))
+    elapsed = time.perf_counter() - start
+    return outputs, {'batch_size': batch_size,
+                     'items_per_sec': round(len(texts) / elapsed, 1) if elapsed else None}
+
+
+def load_variant(variant: str, models_dir: str = ML_DIR) -> Tuple[Dict, Dict]:
+    """Build the analyzers for a variant; returns (models, load times in ms)"""
+    def load(file_name, owner):
+        path = os.path.join(models_dir, file_name)
+        if variant == 'heuristic':
+            return None
+        if variant == 'compact':
+            return CompactNBModel(compact_model_path(path))
+        if variant == 'pickle':
+            import joblib
+            return joblib.load(path)
+        if models_dir != ML_DIR:
+            raise ValueError("--models-dir needs an explicit --variant")
+        return _load_model(file_name, owner)
+
+    models, load_ms = {}, {}
+    for key, cls, file_name in (('sentiment', SentimentAnalyzer, 'sentiment_model.pkl'),
+                                ('priority', PriorityPredictor, 'priority_model.pkl')):
+        start = time.perf_counter()
+        model = cls()
+        model.model = load(file_name, cls.__name__)
+        load_ms[key] = round((time.perf_counter() - start) * 1000, 3)
+        models[key] = model
+    start = time.perf_counter()
+    models['keywords'] = KeywordExtractor()
+    models['keywords'].idf_table  # noqa: B018 - force the lazy load
+    load_ms['keywords'] = round((time.perf_counter() - start) * 1000, 3)
+    return models, load_ms
+
+
+def run_benchmark(rows: List[Dict], variant: str = 'auto', models_dir: str = ML_DIR,
+                  batch_size: int = 64) -> Dict:
+    """Benchmark one variant over labeled rows"""
+    models, load_ms = load_variant(variant, models_dir)
+    sentiment, priority, keywords = models['sentiment'], models['priority'], models['keywords']
+    texts = [row['text'] for row in rows]
+
+    sentiments, sentiment_single = time_single(sentiment.analyze, texts)
+    _, sentiment_batch = time_batch(sentiment.analyze_batch, texts, batch_size)
+    scores = [s['score'] for s in sentiments]
+    _, priority_single = time_single(priority.predict_priority, texts)
+    _, priority_batch = time_batch(priority.predict_batch, texts, batch_size)
+    _, keyword_single = time_single(keywords.extract, texts)
+
+    # Quality uses the sentiment score the API would pass along
+    priorities = priority.predict_batch(texts, scores)
+    return {
+        'variant': variant,
+        'items': len(rows),
+        'python': platform.python_version(),
+        'model_types': {key: type(models[key].model).__name__ for key in ('sentiment', 'priority')},
+        'load_ms': load_ms,
+        'sentiment': {
+            **classification_report([row['label'] for row in rows], [s['label'] for s in sentiments]),
+            'single': sentiment_single, 'batch': sentiment_batch,
+        },
+        'priority': {
+            **classification_report([row['priority'] for row in rows], priorities),
+            'single': priority_single, 'batch': priority_batch,
+        },
+        'keywords': {'single': keyword_single},
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                             / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1),
+    }
+
+
+def quality_regressions(report: Dict, baseline: Dict, tolerance: float = 0.01) -> List[str]:
+    """Metrics that dropped more than tolerance below the baseline"""
+    failures = []
+    for task in ('sentiment', 'priority'):
+        for metric in ('accuracy', 'macro_f1'):
+            before, after = baseline[task][metric], report[task][metric]
+            if after < before - tolerance:
+                failures.append(f'{task}.{metric}: {before} -> {after}')
+    return failures
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the SupportPilot ML predictors')
+    parser.add_argument('--variant', choices=VARIANTS, default='auto')
+    parser.add_argument('--models-dir', default=ML_DIR)
+    parser.add_argument('--data', help='labeled CSV to use instead of the generated dataset')
+    parser.add_argument('--size', type=int, default=2000, help='rows to generate')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', help='JSON report to compare quality against')
+    parser.add_argument('--tolerance', type=float, default=0.01)
+    args = parser.parse_args(argv)
+
+    rows = load_dataset(args.data) if args.data else generate_dataset(args.size, args.seed)
+    # Keep stdout clean for the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = run_benchmark(rows, args.variant, args.models_dir, args.batch_size)
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['regressions'] = quality_regressions(report, json.load(f), args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""IDF - document frequencies over the ticket corpus for TF-IDF keyword scoring
+
+A DocumentFrequencyCounter streams over documents (the training CSV or the
+tickets table) counting in how many documents each unigram and bigram
+appears. Its state is saved as JSON so it can keep growing incrementally;
+IDFTable loads that file once into a plain dict of smoothed IDF weights.
+"""
+import heapq
+import json
+import math
+import os
+from typing import Dict, Iterable, Optional
+from backend.ml.preprocessor import MLPreprocessor
+
+DEFAULT_IDF_PATH = os.path.join(os.path.dirname(__file__), 'idf_table.json')
+
+
+class DocumentFrequencyCounter:
+    """Streaming document-frequency counter for unigrams and bigrams"""
+
+    def __init__(self, preprocessor: MLPreprocessor = None, max_terms: int = 50000):
+        self.preprocessor = preprocessor or MLPreprocessor()
+        self.max_terms = max_terms
+        self.n_docs = 0
+        self.df: Dict[str, int] = {}
+
+    def add(self, text: str):
+        """Count one document"""
+        self.n_docs += 1
+        df = self.df
+        for term in set(self.preprocessor.ngrams(self.preprocessor.preprocess(text))):
+            df[term] = df.get(term, 0) + 1
+        # Prune lazily so the counter stays bounded on large corpora
+        if len(df) > self.max_terms * 2:
+            self.prune()
+
+    def add_all(self, texts: Iterable[str]) -> 'DocumentFrequencyCounter':
+        for text in texts:
+            self.add(text or '')
+        return self
+
+    def prune(self):
+        """Keep only the max_terms most frequent terms"""
+        if len(self.df) > self.max_terms:
+            self.df = dict(heapq.nlargest(self.max_terms, self.df.items(), key=lambda item: item[1]))
+
+    def save(self, path: str = DEFAULT_IDF_PATH):
+        self.prune()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'n_docs': self.n_docs, 'df': self.df}, f, separators=(',', ':'), sort_keys=True)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_IDF_PATH, **kwargs) -> 'DocumentFrequencyCounter':
+        """Resume counting from a saved table"""
+        counter = cls(**kwargs)
+        with open(path) as f:
+            state = json.load(f)
+        counter.n_docs = state['n_docs']
+        counter.df = state['df']
+        return counter
+
+
+class IDFTable:
+    """Smoothed IDF weights: idf(t) = ln((1 + N) / (1 + df(t))) + 1"""
+
+    __slots__ = ('n_docs', 'idf', 'default_idf')
+
+    def __init__(self, n_docs: int, df: Dict[str, int]):
+        self.n_docs = n_docs
+        log_n = math.log(1 + n_docs)
+        self.idf = {term: log_n - math.log(1 + count) + 1 for term, count in df.items()}
+        # Terms never seen in the corpus are treated as the rarest
+        self.default_idf = log_n + 1
+
+    def __len__(self) -> int:
+        return len(self.idf)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self.idf
+
+    def get(self, term: str) -> float:
+        return self.idf.get(term, self.default_idf)
+
+    @classmethod
+    def from_counter(cls, counter: DocumentFrequencyCounter) -> 'IDFTable':
+        return cls(counter.n_docs, counter.df)
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_IDF_PATH) -> Optional['IDFTable']:
+        """Load a saved table, or None if there is none"""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                state = json.load(f)
+            table = cls(state['n_docs'], state['df'])
+            print(f"[IDFTable] Loaded {len(table)} terms over {table.n_docs} documents")
+            return table
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[IDFTable] Failed to load {path}: {e}")
+            return None
+
+
+def build_idf_table(texts: Iterable[str], out_path: str = DEFAULT_IDF_PATH,
+                    max_terms: int = 50000) -> DocumentFrequencyCounter:
+    """Count document frequencies over texts and save the table"""
+    counter = DocumentFrequencyCounter(max_terms=max_terms).add_all(texts)
+    counter.save(out_path)
+    return counter
+
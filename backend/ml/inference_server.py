@@ -0,0 +1,319 @@
+"""Inference Server - ML scoring in a separate pool of processes
+
+Keeps CPU-heavy scoring off the API worker's GIL. The server loads the
+predictor models once, forks one worker per core (models shared
+copy-on-write) and listens on a local Unix socket. Each worker collects the
+requests that arrive within a few milliseconds of each other into one
+vectorized score_tickets call.
+
+Wire format: 4-byte big-endian length + JSON, both ways.
+  request  {"texts": ["...", ...]}
+  response {"results": [{sentiment, predicted_priority, keywords}, ...]}
+           or {"error": "..."}
+
+    python backend/ml/inference_server.py --socket /tmp/supportpilot-ml.sock
+
+The API uses InferenceClient (ML_EXECUTOR=server), which falls back to
+in-process scoring whenever the server is unavailable.
+"""
+import argparse
+import gc
+import json
+import os
+import queue
+import signal
+import socket
+import struct
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Ensure backend module is importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.ml.predictor import score_tickets, warm_up  # noqa: E402
+from backend.utils.metrics import get_metrics  # noqa: E402
+
+DEFAULT_SOCKET_PATH = '/tmp/supportpilot-ml.sock'
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+_HEADER = struct.Struct('>I')
+
+
+def send_frame(sock: socket.socket, payload: Dict):
+    data = json.dumps(payload, separators=(',', ':')).encode()
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 65536))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_frame(sock: socket.socket) -> Optional[Dict]:
+    """Read one frame; None when the peer closed the connection"""
+    header = _recv_exactly(sock, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f'Frame too large: {size} bytes')
+    data = _recv_exactly(sock, size)
+    if data is None:
+        return None
+    return json.loads(data)
+
+
+class _PendingRequest:
+    __slots__ = ('texts', 'results', 'error', 'done')
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.results = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class InferenceServer:
+    """Prefork Unix-socket server with per-worker micro-batching"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, workers: int = None,
+                 batch_window_ms: float = 3.0, max_batch: int = 64):
+        self.socket_path = socket_path
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch = max_batch
+        self._children: Dict[int, int] = {}  # pid -> worker slot
+        self._stopping = False
+
+    # ---- parent ----
+
+    def serve_forever(self):
+        """Bind, load the models, fork the workers and supervise them"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        listener.listen(128)
+
+        # Load once before forking so every worker shares the model pages
+        print(f"[InferenceServer] Models warmed up in {warm_up():.2f}s")
+        gc.collect()
+        gc.freeze()
+
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        for slot in range(self.workers):
+            self._spawn(listener, slot)
+        print(f"[InferenceServer] {self.workers} workers listening on {self.socket_path}")
+        try:
+            while not self._stopping:
+                try:
+                    pid, _ = os.waitpid(-1, os.WNOHANG)
+                except ChildProcessError:
+                    pid = 0
+                if pid and pid in self._children:
+                    slot = self._children.pop(pid)
+                    if not self._stopping:
+                        print(f"[InferenceServer] Worker {pid} exited; restarting")
+                        self._spawn(listener, slot)
+                else:
+                    time.sleep(0.2)
+        finally:
+            self._shutdown_children()
+            listener.close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+    def _request_stop(self, signum, frame):
+        self._stopping = True
+
+    def _spawn(self, listener: socket.socket, slot: int):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            try:
+                self._worker_main(listener)
+            finally:
+                os._exit(0)
+        self._children[pid] = slot
+
+    def _shutdown_children(self, timeout: float = 5.0):
+        for pid in list(self._children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + timeout
+        while self._children and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self._children.pop(pid, None)
+            else:
+                time.sleep(0.05)
+        for pid in self._children:
+            os.kill(pid, signal.SIGKILL)
+
+    # ---- worker ----
+
+    def _worker_main(self, listener: socket.socket):
+        requests: 'queue.Queue[_PendingRequest]' = queue.Queue()
+        threading.Thread(target=self._batch_loop, args=(requests,), daemon=True).start()
+        while True:
+            conn, _ = listener.accept()
+            threading.Thread(target=self._handle_connection, args=(conn, requests), daemon=True).start()
+
+    def _handle_connection(self, conn: socket.socket, requests: queue.Queue):
+        with conn:
+            try:
+                while True:
+                    message = recv_frame(conn)
+                    if message is None:
+                        return
+                    texts = message.get('texts')
+                    if not isinstance(texts, list):
+                        send_frame(conn, {'error': 'texts must be a list'})
+                        continue
+                    pending = _PendingRequest([str(text or '') for text in texts])
+                    requests.put(pending)
+                    pending.done.wait()
+                    if pending.error:
+                        send_frame(conn, {'error': pending.error})
+                    else:
+                        send_frame(conn, {'results': pending.results})
+            except (OSError, ValueError) as e:
+                print(f"[InferenceServer] Connection error: {e}")
+
+    def _batch_loop(self, requests: queue.Queue):
+        """Coalesce requests arriving within batch_window into one model call"""
+        while True:
+            batch = [requests.get()]
+            size = len(batch[0].texts)
+            deadline = time.monotonic() + self.batch_window
+            while size < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    pending = requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(pending)
+                size += len(pending.texts)
+            try:
+                results = score_tickets([text for pending in batch for text in pending.texts])
+                offset = 0
+                for pending in batch:
+                    pending.results = results[offset:offset + len(pending.texts)]
+                    offset += len(pending.texts)
+            except Exception as e:
+                for pending in batch:
+                    pending.error = str(e)
+            for pending in batch:
+                pending.done.set()
+
+
+class InferenceClient:
+    """
+    Synchronous client for the inference server. Drop-in for MLExecutor:
+    run(score_ticket, text) is scored remotely, anything else runs inline.
+    Each thread keeps its own connection. When the server is unreachable
+    or fails, scoring falls back to in-process and the server is not
+    retried for retry_interval seconds.
+    """
+
+    REMOTE_FUNCTIONS = ('score_ticket', 'score_tickets')
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: float = 2.0,
+                 retry_interval: float = 5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.metrics = get_metrics('inference_client')
+        self._local = threading.local()
+        self._retry_at = 0.0
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None and self._local.pid == os.getpid():
+            return sock
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self._local.sock, self._local.pid = sock, os.getpid()
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, 'sock', None)
+        self._local.sock = None
+        if sock is not None and self._local.pid == os.getpid():
+            sock.close()
+
+    def score_batch(self, texts: List[str]) -> List[Dict]:
+        """Score texts on the server, or in-process if it is unavailable"""
+        if time.monotonic() >= self._retry_at:
+            try:
+                sock = self._connection()
+                send_frame(sock, {'texts': texts})
+                response = recv_frame(sock)
+                if response is None:
+                    raise ConnectionError('server closed the connection')
+                if 'error' in response:
+                    raise RuntimeError(response['error'])
+                self.metrics.incr('remote_requests')
+                return response['results']
+            except (OSError, ValueError, RuntimeError) as e:
+                # A timed-out connection may still get a late reply; never reuse it
+                self._close()
+                self._retry_at = time.monotonic() + self.retry_interval
+                self.metrics.incr('server_errors')
+                print(f"[InferenceClient] Server unavailable, scoring in-process: {e}")
+        self.metrics.incr('fallback_requests')
+        return score_tickets(texts)
+
+    def score(self, text: str) -> Dict:
+        return self.score_batch([text])[0]
+
+    def run(self, fn, *args):
+        """MLExecutor-compatible entry point"""
+        name = getattr(fn, '__name__', None)
+        if name == 'score_ticket':
+            return self.score(*args)
+        if name == 'score_tickets':
+            return self.score_batch(*args)
+        return fn(*args)
+
+    def shutdown(self, wait: bool = True):
+        """Close this thread's connection"""
+        self._close()
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='SupportPilot ML inference server')
+    parser.add_argument('--socket', default=os.getenv('ML_INFERENCE_SOCKET', DEFAULT_SOCKET_PATH))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('ML_INFERENCE_WORKERS', 0)) or None,
+                        help='worker processes (default: cpu count)')
+    parser.add_argument('--batch-window-ms', type=float,
+                        default=float(os.getenv('ML_INFERENCE_BATCH_WINDOW_MS', 3)))
+    parser.add_argument('--max-batch', type=int, default=int(os.getenv('ML_INFERENCE_MAX_BATCH', 64)))
+    args = parser.parse_args(argv)
+    InferenceServer(args.socket, args.workers, args.batch_window_ms, args.max_batch).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
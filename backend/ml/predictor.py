@@ -1,8 +1,167 @@
 """ML Predictor - sentiment analysis and priority prediction"""
 from backend.ml.preprocessor import MLPreprocessor
-from typing import Dict, Tuple
+from backend.ml.idf import IDFTable
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+import json
 import os
-import joblib
+import re
+import time
+
+COMPACT_FORMAT = 'compact-nb-1'
+
+
+def compact_model_path(model_path: str) -> str:
+    """Directory holding the compact export of a pickled pipeline"""
+    return os.path.splitext(model_path)[0] + '_compact'
+
+
+def murmurhash3_32(data: bytes, seed: int = 0) -> int:
+    """Signed 32-bit MurmurHash3 (x86), matching sklearn.utils.murmurhash3_32"""
+    mask = 0xFFFFFFFF
+    c1, c2 = 0xcc9e2d51, 0x1b873593
+    h = seed & mask
+    length = len(data)
+    tail_start = length - length % 4
+    for i in range(0, tail_start, 4):
+        k = int.from_bytes(data[i:i + 4], 'little')
+        k = (k * c1) & mask
+        k = ((k << 15) | (k >> 17)) & mask
+        h ^= (k * c2) & mask
+        h = ((h << 13) | (h >> 19)) & mask
+        h = (h * 5 + 0xe6546b64) & mask
+    k = 0
+    tail = data[tail_start:]
+    if len(tail) == 3:
+        k ^= tail[2] << 16
+    if len(tail) >= 2:
+        k ^= tail[1] << 8
+    if tail:
+        k ^= tail[0]
+        k = (k * c1) & mask
+        k = ((k << 15) | (k >> 17)) & mask
+        h ^= (k * c2) & mask
+    h ^= length
+    h ^= h >> 16
+    h = (h * 0x85ebca6b) & mask
+    h ^= h >> 13
+    h = (h * 0xc2b2ae35) & mask
+    h ^= h >> 16
+    return h - (1 << 32) if h & 0x80000000 else h
+
+
+class CompactNBModel:
+    """
+    NumPy-only MultinomialNB over TF-IDF or hashed word n-grams, loaded from
+    a compact export (see train_models.export_compact). The vocabulary is a
+    sorted string table searched with bisect; the IDF vector and the
+    feature-major log-probability matrix are memory-mapped .npy files, so
+    loading reads almost nothing and a prediction only touches the rows of
+    the features present in the text. Mirrors the sklearn pipeline's
+    predict/predict_proba/classes_ interface.
+    """
+    
+    def __init__(self, path: str):
+        import numpy as np
+        self._np = np
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('format') != COMPACT_FORMAT:
+            raise ValueError(f"Unsupported compact model format: {meta.get('format')}")
+        self.classes_ = np.array(meta['classes'])
+        self.kind = meta['vectorizer']
+        self.lowercase = meta['lowercase']
+        self.min_n, self.max_n = meta['ngram_range']
+        self.norm = meta['norm']
+        self.sublinear_tf = meta.get('sublinear_tf', False)
+        self.n_features = meta['n_features']
+        self.token_re = re.compile(meta['token_pattern'])
+        self.feature_log_prob = np.load(os.path.join(path, 'feature_log_prob.npy'), mmap_mode='r')
+        self.class_log_prior = np.load(os.path.join(path, 'class_log_prior.npy'))
+        self.idf = None
+        self.vocabulary: List[str] = []
+        if self.kind == 'tfidf':
+            with open(os.path.join(path, 'vocab.txt'), encoding='utf-8') as f:
+                self.vocabulary = f.read().split('\n')
+            if meta.get('use_idf'):
+                self.idf = np.load(os.path.join(path, 'idf.npy'), mmap_mode='r')
+    
+    def _terms(self, text: str) -> List[str]:
+        """Word n-grams exactly as sklearn's 'word' analyzer produces them"""
+        tokens = self.token_re.findall(text.lower() if self.lowercase else text)
+        terms = list(tokens) if self.min_n == 1 else []
+        for n in range(max(self.min_n, 2), min(self.max_n, len(tokens)) + 1):
+            terms.extend(' '.join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terms
+    
+    def _column(self, term: str):
+        if self.kind == 'hashing':
+            return abs(murmurhash3_32(term.encode('utf-8'))) % self.n_features
+        i = bisect_left(self.vocabulary, term)
+        if i < len(self.vocabulary) and self.vocabulary[i] == term:
+            return i
+        return None
+    
+    def joint_log_likelihood(self, text: str):
+        np = self._np
+        counts: Dict[int, int] = {}
+        for term in self._terms(text or ''):
+            col = self._column(term)
+            if col is not None:
+                counts[col] = counts.get(col, 0) + 1
+        if not counts:
+            return np.array(self.class_log_prior)
+        cols = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        if self.sublinear_tf:
+            weights = np.log(weights) + 1
+        if self.idf is not None:
+            weights = weights * self.idf[cols]
+        if self.norm == 'l2':
+            weights = weights / np.sqrt(np.dot(weights, weights))
+        elif self.norm == 'l1':
+            weights = weights / np.abs(weights).sum()
+        return self.class_log_prior + weights @ self.feature_log_prob[cols]
+    
+    def predict_proba(self, texts: List[str]):
+        np = self._np
+        rows = []
+        for text in texts:
+            jll = self.joint_log_likelihood(text)
+            jll = jll - jll.max()
+            proba = np.exp(jll)
+            rows.append(proba / proba.sum())
+        return np.array(rows)
+    
+    def predict(self, texts: List[str]):
+        return self.classes_[[int(self.joint_log_likelihood(text).argmax()) for text in texts]]
+
+
+def _load_model(file_name: str, owner: str):
+    """
+    Load a model, preferring the compact export (NumPy only, milliseconds)
+    over the pickled pipeline; joblib (and scikit-learn) are imported only
+    for the pickle
+    """
+    model_path = os.path.join(os.path.dirname(__file__), file_name)
+    compact_path = compact_model_path(model_path)
+    if os.path.isdir(compact_path):
+        try:
+            model = CompactNBModel(compact_path)
+            print(f"[{owner}] Loaded compact model")
+            return model
+        except Exception as e:
+            print(f"[{owner}] Failed to load compact model: {e}")
+    if not os.path.exists(model_path):
+        return None
+    try:
+        import joblib
+        model = joblib.load(model_path)
+        print(f"[{owner}] Loaded trained model")
+        return model
+    except Exception as e:
+        print(f"[{owner}] Failed to load model: {e}")
+        return None
 
 
 class SentimentAnalyzer:
@@ -10,14 +169,21 @@ class SentimentAnalyzer:
     
     def __init__(self):
         self.preprocessor = MLPreprocessor()
-        model_path = os.path.join(os.path.dirname(__file__), 'sentiment_model.pkl')
-        self.model = None
-        if os.path.exists(model_path):
-            try:
-                self.model = joblib.load(model_path)
-                print("[SentimentAnalyzer] Loaded trained model")
-            except Exception as e:
-                print(f"[SentimentAnalyzer] Failed to load model: {e}")
+        self._model = None
+        self._model_loaded = False
+    
+    @property
+    def model(self):
+        """Trained pipeline, loaded on first use to keep imports cheap"""
+        if not self._model_loaded:
+            self._model = _load_model('sentiment_model.pkl', 'SentimentAnalyzer')
+            self._model_loaded = True
+        return self._model
+    
+    @model.setter
+    def model(self, model):
+        self._model = model
+        self._model_loaded = True
         
     def analyze(self, text: str) -> Dict:
         """
@@ -30,10 +196,7 @@ class SentimentAnalyzer:
         # Use trained model if available
         if self.model:
             try:
-                label = self.model.predict([text])[0]
-                proba = self.model.predict_proba([text])[0]
-                score = max(proba)
-                return {'score': round(float(score), 3), 'label': str(label)}
+                return self._model_results([text])[0]
             except Exception as e:
                 print(f"[SentimentAnalyzer] Model prediction failed: {e}")
         
@@ -73,6 +236,27 @@ class SentimentAnalyzer:
             label = 'neutral'
         
         return {'score': round(score, 3), 'label': label}
+    
+    def _model_results(self, texts: List[str]) -> List[Dict]:
+        # One predict_proba call; the label is the class with the top probability
+        classes = self.model.classes_
+        return [{'score': round(float(row.max()), 3), 'label': str(classes[int(row.argmax())])}
+                for row in self.model.predict_proba(texts)]
+    
+    def analyze_batch(self, texts: List[str]) -> List[Dict]:
+        """Analyze many texts with one vectorized model call"""
+        results = [{'score': 0.5, 'label': 'neutral'} for _ in texts]
+        todo = [i for i, text in enumerate(texts) if text]
+        if self.model and todo:
+            try:
+                for i, result in zip(todo, self._model_results([texts[i] for i in todo])):
+                    results[i] = result
+                return results
+            except Exception as e:
+                print(f"[SentimentAnalyzer] Batch prediction failed: {e}")
+        for i in todo:
+            results[i] = self.analyze(texts[i])
+        return results
 
 
 class PriorityPredictor:
@@ -80,14 +264,21 @@ class PriorityPredictor:
     
     def __init__(self):
         self.preprocessor = MLPreprocessor()
-        model_path = os.path.join(os.path.dirname(__file__), 'priority_model.pkl')
-        self.model = None
-        if os.path.exists(model_path):
-            try:
-                self.model = joblib.load(model_path)
-                print("[PriorityPredictor] Loaded trained model")
-            except Exception as e:
-                print(f"[PriorityPredictor] Failed to load model: {e}")
+        self._model = None
+        self._model_loaded = False
+    
+    @property
+    def model(self):
+        """Trained pipeline, loaded on first use to keep imports cheap"""
+        if not self._model_loaded:
+            self._model = _load_model('priority_model.pkl', 'PriorityPredictor')
+            self._model_loaded = True
+        return self._model
+    
+    @model.setter
+    def model(self, model):
+        self._model = model
+        self._model_loaded = True
         
     def predict_priority(self, ticket_text: str, sentiment_score: float = 0.5) -> str:
         """
@@ -138,6 +329,20 @@ class PriorityPredictor:
             return 'medium'
         else:
             return 'low'
+    
+    def predict_batch(self, texts: List[str], sentiment_scores: List[float] = None) -> List[str]:
+        """Predict priorities for many texts with one vectorized model call"""
+        scores = sentiment_scores or [0.5] * len(texts)
+        todo = [i for i, text in enumerate(texts) if text]
+        if self.model and todo:
+            try:
+                results = ['medium'] * len(texts)
+                for i, priority in zip(todo, self.model.predict([texts[i] for i in todo])):
+                    results[i] = str(priority).lower()
+                return results
+            except Exception as e:
+                print(f"[PriorityPredictor] Batch prediction failed: {e}")
+        return [self.predict_priority(text, score) for text, score in zip(texts, scores)]
 
 
 class KeywordExtractor:
@@ -145,7 +350,60 @@ class KeywordExtractor:
     
     def __init__(self):
         self.preprocessor = MLPreprocessor()
+        self._idf_table = None
+        self._idf_loaded = False
+    
+    @property
+    def idf_table(self):
+        """Corpus IDF weights (idf_table.json), loaded once on first use"""
+        if not self._idf_loaded:
+            self._idf_table = IDFTable.load()
+            self._idf_loaded = True
+        return self._idf_table
+    
+    @idf_table.setter
+    def idf_table(self, idf_table):
+        self._idf_table = idf_table
+        self._idf_loaded = True
         
     def extract(self, text: str, num_keywords: int = 5) -> list:
         """Extract top keywords from text"""
-        return self.preprocessor.extract_keywords(text, num_keywords)
+        return self.preprocessor.extract_keywords(text, num_keywords, self.idf_table)
+
+
+_default_models = None
+
+
+def _get_default_models() -> Tuple['SentimentAnalyzer', 'PriorityPredictor', 'KeywordExtractor']:
+    """Get the per-process model instances used by score_ticket"""
+    global _default_models
+    if _default_models is None:
+        _default_models = (SentimentAnalyzer(), PriorityPredictor(), KeywordExtractor())
+    return _default_models
+
+
+def score_ticket(text: str) -> Dict:
+    """
+    Run the full ML enrichment for a ticket description.
+    Module-level so it can be shipped to an executor process.
+    """
+    return score_tickets([text])[0]
+
+
+def score_tickets(texts: List[str]) -> List[Dict]:
+    """Batch form of score_ticket: one vectorized call per model"""
+    sentiment_analyzer, priority_predictor, keyword_extractor = _get_default_models()
+    sentiments = sentiment_analyzer.analyze_batch(texts)
+    priorities = priority_predictor.predict_batch(texts, [s['score'] for s in sentiments])
+    return [{
+        'sentiment': sentiment,
+        'predicted_priority': priority,
+        'keywords': keyword_extractor.extract(text)
+    } for text, sentiment, priority in zip(texts, sentiments, priorities)]
+
+
+def warm_up() -> float:
+    """Load the default models and run one dummy inference; returns seconds taken"""
+    start = time.perf_counter()
+    score_ticket('Warm-up request: the app crashes when I try to log in')
+    return time.perf_counter() - start
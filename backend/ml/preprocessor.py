@@ -1,4 +1,5 @@
 """ML Preprocessor - text preprocessing for ML models"""
+import heapq
 import re
 from typing import List
 import string
@@ -56,17 +57,45 @@ class MLPreprocessor:
         tokens = self.remove_stopwords(tokens)
         return tokens
     
-    def extract_keywords(self, text: str, num_keywords: int = 5) -> List[str]:
-        """Extract top keywords using TF-IDF concept"""
+    def ngrams(self, tokens: List[str]) -> List[str]:
+        """Unigrams followed by bigrams of a token list"""
+        return tokens + [f'{a} {b}' for a, b in zip(tokens, tokens[1:])]
+    
+    def extract_keywords(self, text: str, num_keywords: int = 5, idf_table=None) -> List[str]:
+        """
+        Extract top keywords by TF-IDF.
+        idf_table (see backend.ml.idf.IDFTable) supplies corpus IDF weights;
+        bigrams are only scored when the corpus has seen them. Without a
+        table keywords are ranked by term frequency alone.
+        """
         tokens = self.preprocess(text)
         
         if not tokens:
             return []
         
-        # Simple frequency-based keyword extraction
+        terms = tokens
+        if idf_table is not None:
+            # Bigrams go first so they win ties against their own words
+            terms = [b for b in self.ngrams(tokens)[len(tokens):] if b in idf_table] + tokens
+        
         freq = {}
-        for token in tokens:
-            freq[token] = freq.get(token, 0) + 1
+        for term in terms:
+            freq[term] = freq.get(term, 0) + 1
+        
+        if idf_table is not None:
+            scores = {term: count * idf_table.get(term) for term, count in freq.items()}
+        else:
+            scores = freq
         
-        sorted_freq = sorted(freq.items(), key=lambda x: x[1], reverse=True)
-        return [word for word, _ in sorted_freq[:num_keywords]]
+        # Oversample so terms overlapping an already chosen keyword can be skipped
+        ranked = heapq.nlargest(num_keywords * 3, scores.items(), key=lambda x: x[1])
+        keywords = []
+        covered = set()
+        for term, _ in ranked:
+            if covered.issuperset(term.split(' ')):
+                continue
+            keywords.append(term)
+            covered.update(term.split(' '))
+            if len(keywords) == num_keywords:
+                break
+        return keywords
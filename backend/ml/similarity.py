@@ -0,0 +1,164 @@
+"""Similarity - near-duplicate ticket detection with MinHash LSH
+
+Descriptions are normalized with MLPreprocessor, split into word shingles
+and summarized by a MinHash signature, whose positions agree with
+probability equal to the Jaccard similarity of the shingle sets. Signatures
+are split into bands; tickets sharing any band bucket become candidates,
+so a lookup touches a handful of buckets instead of every ticket.
+"""
+import random
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from backend.ml.preprocessor import MLPreprocessor
+
+MERSENNE_PRIME = (1 << 61) - 1
+
+
+class MinHasher:
+    """Computes MinHash signatures over word shingles of normalized text"""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 7,
+                 preprocessor: MLPreprocessor = None):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.preprocessor = preprocessor or MLPreprocessor()
+        # Fixed seed and crc32 (not hash()) keep signatures stable across processes
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+                       for _ in range(num_perm)]
+
+    def shingles(self, text: str) -> set:
+        """Hashed word n-grams of the normalized text"""
+        tokens = self.preprocessor.preprocess(text)
+        k = self.shingle_size
+        if len(tokens) < k:
+            grams = [' '.join(tokens)] if tokens else []
+        else:
+            grams = [' '.join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)]
+        return {zlib.crc32(gram.encode()) for gram in grams}
+
+    def signature(self, text: str) -> Optional[Tuple[int, ...]]:
+        """MinHash signature, or None for text without content words"""
+        hashes = self.shingles(text)
+        if not hashes:
+            return None
+        p = MERSENNE_PRIME
+        return tuple(min((a * h + b) % p for h in hashes) for a, b in self._perms)
+
+    @staticmethod
+    def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class MinHashLSH:
+    """
+    Banded LSH index over MinHash signatures.
+    With b bands of r rows, pairs of similarity s collide with probability
+    1 - (1 - s^r)^b; the defaults (16 x 4) put the 50% point near s = 0.5.
+    Holds at most max_items tickets, evicting the oldest first.
+    """
+
+    def __init__(self, hasher: MinHasher = None, bands: int = 16, threshold: float = 0.5,
+                 max_items: int = 200000):
+        self.hasher = hasher or MinHasher()
+        if self.hasher.num_perm % bands:
+            raise ValueError('num_perm must be a multiple of bands')
+        self.bands = bands
+        self.rows = self.hasher.num_perm // bands
+        self.threshold = threshold
+        self.max_items = max_items
+        self._signatures: 'OrderedDict[str, Tuple[int, ...]]' = OrderedDict()
+        self._buckets: List[Dict[int, set]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._signatures
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[int]:
+        r = self.rows
+        return [hash(signature[i * r:(i + 1) * r]) for i in range(self.bands)]
+
+    def insert(self, key: str, text: str = None,
+               signature: Tuple[int, ...] = None) -> Optional[Tuple[int, ...]]:
+        """Index a ticket by its text (or a precomputed signature)"""
+        signature = signature or self.hasher.signature(text or '')
+        if signature is None:
+            return None
+        with self._lock:
+            if key in self._signatures:
+                self._remove(key)
+            self._signatures[key] = signature
+            for band, band_key in zip(self._buckets, self._band_keys(signature)):
+                band.setdefault(band_key, set()).add(key)
+            while len(self._signatures) > self.max_items:
+                self._remove(next(iter(self._signatures)))
+        return signature
+
+    def _remove(self, key: str):
+        signature = self._signatures.pop(key)
+        for band, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket = band.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del band[band_key]
+
+    def remove(self, key: str):
+        """Drop a ticket from the index"""
+        with self._lock:
+            if key in self._signatures:
+                self._remove(key)
+
+    def query(self, text: str = None, signature: Tuple[int, ...] = None,
+              limit: int = 5, exclude: str = None) -> List[Tuple[str, float]]:
+        """Likely duplicates as [(key, estimated similarity)], most similar first"""
+        signature = signature or self.hasher.signature(text or '')
+        if signature is None:
+            return []
+        with self._lock:
+            candidates = set()
+            for band, band_key in zip(self._buckets, self._band_keys(signature)):
+                candidates.update(band.get(band_key, ()))
+            candidates.discard(exclude)
+            scored = [(key, MinHasher.similarity(signature, self._signatures[key]))
+                      for key in candidates]
+        matches = [(key, round(sim, 3)) for key, sim in scored if sim >= self.threshold]
+        matches.sort(key=lambda item: item[1], reverse=True)
+        return matches[:limit]
+
+    def cluster(self, items: Iterable[Tuple[str, str]]) -> List[List[str]]:
+        """
+        Batch mode: group (key, text) items into clusters of likely duplicates
+        (connected components of the candidate pairs above the threshold).
+        Only clusters with more than one member are returned.
+        """
+        batch = MinHashLSH(self.hasher, self.bands, self.threshold, max_items=float('inf'))
+        parent: Dict[str, str] = {}
+
+        def find(key):
+            while parent[key] != key:
+                parent[key] = parent[parent[key]]
+                key = parent[key]
+            return key
+
+        for key, text in items:
+            signature = self.hasher.signature(text)
+            if signature is None:
+                continue
+            parent[key] = key
+            for other, _ in batch.query(signature=signature, limit=len(batch) or 1):
+                root_a, root_b = find(key), find(other)
+                if root_a != root_b:
+                    parent[root_a] = root_b
+            batch.insert(key, signature=signature)
+
+        groups: Dict[str, List[str]] = {}
+        for key in parent:
+            groups.setdefault(find(key), []).append(key)
+        return sorted((g for g in groups.values() if len(g) > 1), key=len, reverse=True)
@@ -1,13 +1,121 @@
-"""Train simple ML models and save them as pickles"""
+"""Train simple ML models and save them as pickles, plus the IDF table
+used for keyword extraction
+
+pandas and scikit-learn are imported inside the training functions so that
+importing this module (e.g. from the API process) stays cheap.
+
+Two modes:
+- full: fit TF-IDF + MultinomialNB pipelines on a CSV loaded in memory
+- streaming: read labeled tickets in chunks (CSV or the tickets table),
+  hash each chunk once and partial_fit both classifiers off that one
+  matrix, so memory stays bounded however large the corpus is
+
+Every saved pipeline is also exported in the compact format loaded by
+predictor.CompactNBModel.
+"""
+import argparse
+import csv
+import json
 import os
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.naive_bayes import MultinomialNB
-from sklearn.pipeline import Pipeline
-import joblib
+import shutil
+import sys
+from typing import Dict, Iterable, Iterator, List
+
+# Ensure backend module is importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.ml.idf import DocumentFrequencyCounter, build_idf_table
+from backend.ml.predictor import COMPACT_FORMAT, compact_model_path
+from backend.utils.pagination import after_keyset
+
+SENTIMENT_CLASSES = ['negative', 'neutral', 'positive']
+PRIORITY_CLASSES = ['low', 'medium', 'high', 'urgent']
+DEFAULT_N_FEATURES = 2 ** 20
+
+
+def train_idf_table(data_path: str, out_dir: str):
+    """Count document frequencies over the corpus in one streaming pass"""
+    with open(data_path, newline='') as f:
+        counter = build_idf_table((row.get('text') or '' for row in csv.DictReader(f)),
+                                  os.path.join(out_dir, 'idf_table.json'))
+    print(f'IDF table built over {counter.n_docs} documents ({len(counter.df)} terms)')
+
+
+def export_compact(pipeline, model_path: str) -> str:
+    """
+    Write a TF-IDF/hashing + MultinomialNB pipeline in the compact format:
+    meta.json, a sorted vocab.txt string table (TF-IDF only), idf.npy and a
+    feature-major feature_log_prob.npy that the predictor memory-maps.
+    """
+    import numpy as np
+
+    vectorizer, clf = pipeline.steps[0][1], pipeline.steps[-1][1]
+    if not hasattr(clf, 'feature_log_prob_'):
+        raise ValueError('Only MultinomialNB heads can be exported')
+    params = vectorizer.get_params()
+    if params['analyzer'] != 'word' or params['tokenizer'] or params['preprocessor'] \
+            or params['strip_accents'] or params['stop_words']:
+        raise ValueError('Only the default word analyzer can be exported')
+
+    out_path = compact_model_path(model_path)
+    tmp_path = out_path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    try:
+        os.makedirs(tmp_path)
+        meta = {
+            'format': COMPACT_FORMAT,
+            'classes': [str(c) for c in clf.classes_],
+            'lowercase': params['lowercase'],
+            'token_pattern': params['token_pattern'],
+            'ngram_range': list(params['ngram_range']),
+            'norm': params['norm'],
+        }
+        feature_log_prob = clf.feature_log_prob_
+        kind = type(vectorizer).__name__
+        if kind == 'TfidfVectorizer':
+            terms = sorted(vectorizer.vocabulary_)
+            order = [vectorizer.vocabulary_[term] for term in terms]
+            feature_log_prob = feature_log_prob[:, order]
+            with open(os.path.join(tmp_path, 'vocab.txt'), 'w', encoding='utf-8') as f:
+                f.write('\n'.join(terms))
+            if vectorizer.use_idf:
+                np.save(os.path.join(tmp_path, 'idf.npy'), vectorizer.idf_[order].astype(np.float64))
+            meta.update(vectorizer='tfidf', n_features=len(terms), use_idf=vectorizer.use_idf,
+                        sublinear_tf=vectorizer.sublinear_tf)
+        elif kind == 'HashingVectorizer':
+            if params['alternate_sign']:
+                raise ValueError('Hashed models must use alternate_sign=False')
+            meta.update(vectorizer='hashing', n_features=params['n_features'])
+        else:
+            raise ValueError(f'Unsupported vectorizer: {kind}')
+
+        # Feature-major so a prediction reads one contiguous row per feature present
+        np.save(os.path.join(tmp_path, 'feature_log_prob.npy'),
+                np.ascontiguousarray(feature_log_prob.T, dtype=np.float64))
+        np.save(os.path.join(tmp_path, 'class_log_prior.npy'), clf.class_log_prior_.astype(np.float64))
+        with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+    except Exception:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    shutil.rmtree(out_path, ignore_errors=True)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def save_model(pipeline, model_path: str):
+    """Pickle a pipeline and write its compact export next to it"""
+    import joblib
+    joblib.dump(pipeline, model_path)
+    export_compact(pipeline, model_path)
 
 
 def train_and_save_models(data_path: str, out_dir: str):
+    import pandas as pd
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    
     df = pd.read_csv(data_path)
     texts = df['text'].fillna('')
     labels = df['label'].fillna('neutral')
@@ -21,7 +129,7 @@ def train_and_save_models(data_path: str, out_dir: str):
         ('clf', MultinomialNB())
     ])
     sentiment_pipeline.fit(texts, labels)
-    joblib.dump(sentiment_pipeline, os.path.join(out_dir, 'sentiment_model.pkl'))
+    save_model(sentiment_pipeline, os.path.join(out_dir, 'sentiment_model.pkl'))
     
     # Priority model (low/medium/high/urgent)
     priority_pipeline = Pipeline([
@@ -29,10 +137,154 @@ def train_and_save_models(data_path: str, out_dir: str):
         ('clf', MultinomialNB())
     ])
     priority_pipeline.fit(texts, priorities)
-    joblib.dump(priority_pipeline, os.path.join(out_dir, 'priority_model.pkl'))
+    save_model(priority_pipeline, os.path.join(out_dir, 'priority_model.pkl'))
+    
+    train_idf_table(data_path, out_dir)
     
     print('Models trained and saved to', out_dir)
 
 
+def iter_csv_chunks(data_path: str, chunk_size: int = 10000) -> Iterator[List[Dict]]:
+    """Yield rows of a text,label,priority CSV in chunks"""
+    with open(data_path, newline='') as f:
+        chunk = []
+        for row in csv.DictReader(f):
+            chunk.append({'text': row.get('text') or '', 'label': row.get('label'),
+                          'priority': row.get('priority')})
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def iter_ticket_chunks(db, chunk_size: int = 5000) -> Iterator[List[Dict]]:
+    """
+    Yield tickets from the tickets table in keyset-paginated chunks,
+    labeled with priority only: sentiment_score was produced by the
+    sentiment model itself, so training on it would only echo the model.
+    """
+    after = None
+    while True:
+        query = db.table('tickets').select('ticket_id, title, description, priority, created_at')
+        if after:
+            query = after_keyset(query, 'created_at', 'ticket_id', *after)
+        rows = query.order('created_at').order('ticket_id').limit(chunk_size).execute().data or []
+        if not rows:
+            return
+        yield [{'text': f"{row.get('title') or ''} {row.get('description') or ''}".strip(),
+                'label': None,
+                'priority': row.get('priority')} for row in rows]
+        if len(rows) < chunk_size:
+            return
+        after = (rows[-1]['created_at'], rows[-1]['ticket_id'])
+
+
+def _load_or_create_head(path: str, vectorizer, resume: bool):
+    """Resume a hashed pipeline's classifier, or start a fresh one"""
+    from sklearn.naive_bayes import MultinomialNB
+    from sklearn.pipeline import Pipeline
+    import joblib
+
+    if resume and os.path.exists(path):
+        pipeline = joblib.load(path)
+        if type(pipeline.steps[0][1]).__name__ == 'HashingVectorizer' \
+                and pipeline.steps[0][1].get_params() == vectorizer.get_params():
+            return pipeline
+        print(f'{os.path.basename(path)} was not trained in streaming mode; starting fresh')
+    return Pipeline([('hash', vectorizer), ('clf', MultinomialNB(alpha=0.1))])
+
+
+def train_streaming(chunks: Iterable[List[Dict]], out_dir: str,
+                    n_features: int = DEFAULT_N_FEATURES, resume: bool = False) -> Dict:
+    """
+    Fit both heads incrementally. Each chunk is vectorized once with a
+    stateless HashingVectorizer; the sentiment and priority classifiers
+    partial_fit on the rows that carry their label. Rows with labels outside
+    the fixed class lists are skipped. The saved pipelines keep the same
+    predict/predict_proba interface as the full-mode ones.
+    """
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    # Non-negative, l2-normalized hashed counts suit MultinomialNB
+    vectorizer = HashingVectorizer(n_features=n_features, ngram_range=(1, 2),
+                                   alternate_sign=False, norm='l2')
+    os.makedirs(out_dir, exist_ok=True)
+    sentiment_path = os.path.join(out_dir, 'sentiment_model.pkl')
+    priority_path = os.path.join(out_dir, 'priority_model.pkl')
+    idf_path = os.path.join(out_dir, 'idf_table.json')
+    sentiment_pipeline = _load_or_create_head(sentiment_path, vectorizer, resume)
+    priority_pipeline = _load_or_create_head(priority_path, vectorizer, resume)
+    doc_counter = DocumentFrequencyCounter.load(idf_path) if resume and os.path.exists(idf_path) \
+        else DocumentFrequencyCounter()
+
+    heads = (
+        (sentiment_pipeline.named_steps['clf'], 'label', SENTIMENT_CLASSES),
+        (priority_pipeline.named_steps['clf'], 'priority', PRIORITY_CLASSES),
+    )
+    stats = {'rows': 0, 'label': 0, 'priority': 0}
+    for chunk in chunks:
+        texts = [row['text'] for row in chunk]
+        matrix = vectorizer.transform(texts)
+        doc_counter.add_all(texts)
+        stats['rows'] += len(chunk)
+        for clf, field, classes in heads:
+            labels = [(row.get(field) or '').lower() for row in chunk]
+            keep = [i for i, label in enumerate(labels) if label in classes]
+            if not keep:
+                continue
+            clf.partial_fit(matrix[keep], [labels[i] for i in keep], classes=classes)
+            stats[field] += len(keep)
+        print(f"  {stats['rows']} rows processed")
+
+    for pipeline, path, field in ((sentiment_pipeline, sentiment_path, 'label'),
+                                  (priority_pipeline, priority_path, 'priority')):
+        # A head that never saw a labeled row cannot predict; keep the old model
+        if hasattr(pipeline.named_steps['clf'], 'classes_'):
+            save_model(pipeline, path)
+        else:
+            print(f'No rows labeled with {field}; {os.path.basename(path)} not written')
+    doc_counter.save(idf_path)
+    print('Streaming models saved to', out_dir, stats)
+    return stats
+
+
+def main(argv: List[str] = None):
+    ml_dir = os.path.dirname(__file__)
+    parser = argparse.ArgumentParser(description='Train the SupportPilot ticket models')
+    parser.add_argument('--mode', choices=['full', 'streaming', 'export'], default='full',
+                        help='export: only write compact exports of the existing pickles')
+    parser.add_argument('--source', choices=['csv', 'tickets'], default='csv',
+                        help='streaming mode only: read a CSV or the tickets table (the '
+                             'tickets table trains the priority head only; its sentiment '
+                             'scores come from the sentiment model)')
+    parser.add_argument('--data', default=os.path.join(ml_dir, 'sample_dataset.csv'))
+    parser.add_argument('--out', default=ml_dir)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--n-features', type=int, default=DEFAULT_N_FEATURES)
+    parser.add_argument('--resume', action='store_true',
+                        help='continue training the existing streaming models')
+    args = parser.parse_args(argv)
+
+    if args.mode == 'full':
+        train_and_save_models(args.data, args.out)
+        return
+    if args.mode == 'export':
+        import joblib
+        for name in ('sentiment_model.pkl', 'priority_model.pkl'):
+            model_path = os.path.join(args.out, name)
+            print('Exported', export_compact(joblib.load(model_path), model_path))
+        return
+    if args.source == 'tickets':
+        from backend.app import connect_database
+        db = connect_database()
+        if db is None:
+            parser.error('SUPABASE_URL and SUPABASE_KEY are required for --source tickets')
+        chunks = iter_ticket_chunks(db, args.chunk_size)
+    else:
+        chunks = iter_csv_chunks(args.data, args.chunk_size)
+    train_streaming(chunks, args.out, args.n_features, args.resume)
+
+
 if __name__ == '__main__':
-    train_and_save_models(os.path.join(os.path.dirname(__file__), 'sample_dataset.csv'), os.path.dirname(__file__))
+    main()
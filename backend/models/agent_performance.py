@@ -1,11 +1,16 @@
 """Agent Performance model class"""
 from datetime import datetime
 from typing import Dict
+from backend.utils.serialization import to_iso
 
 
 class AgentPerformance:
     """Represents performance metrics for a support agent"""
     
+    __slots__ = ('agent_id', 'tickets_resolved', 'average_response_time',
+                 'average_resolution_time', 'customer_satisfaction_score',
+                 'total_assigned_tickets', 'created_at', 'updated_at')
+    
     def __init__(self, agent_id: str, tickets_resolved: int = 0,
                  average_response_time: float = 0.0,
                  average_resolution_time: float = 0.0,
@@ -30,10 +35,24 @@ class AgentPerformance:
             'average_resolution_time': self.average_resolution_time,
             'customer_satisfaction_score': self.customer_satisfaction_score,
             'total_assigned_tickets': self.total_assigned_tickets,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': to_iso(self.created_at),
+            'updated_at': to_iso(self.updated_at)
         }
     
+    @classmethod
+    def from_row(cls, row: Dict) -> 'AgentPerformance':
+        """Fast path for database rows: timestamps kept as read"""
+        performance = cls.__new__(cls)
+        performance.agent_id = row['agent_id']
+        performance.tickets_resolved = row.get('tickets_resolved') or 0
+        performance.average_response_time = row.get('average_response_time') or 0.0
+        performance.average_resolution_time = row.get('average_resolution_time') or 0.0
+        performance.customer_satisfaction_score = row.get('customer_satisfaction_score') or 0.0
+        performance.total_assigned_tickets = row.get('total_assigned_tickets') or 0
+        performance.created_at = row.get('created_at')
+        performance.updated_at = row.get('updated_at')
+        return performance
+    
     @staticmethod
     def from_dict(data: Dict) -> 'AgentPerformance':
         """Create from dictionary"""
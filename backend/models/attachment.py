@@ -1,14 +1,18 @@
 """Attachment model class"""
 from datetime import datetime
 from typing import Dict
+from backend.utils.serialization import to_iso
 
 
 class Attachment:
     """Represents an attachment to a ticket or comment"""
     
+    __slots__ = ('attachment_id', 'ticket_id', 'author_id', 'file_name', 'file_url',
+                 'file_size', 'mime_type', 'content_sha256', 'created_at')
+    
     def __init__(self, attachment_id: str, ticket_id: str, author_id: str,
                  file_name: str, file_url: str, file_size: int,
-                 mime_type: str, created_at: datetime = None):
+                 mime_type: str, created_at: datetime = None, content_sha256: str = None):
         self.attachment_id = attachment_id
         self.ticket_id = ticket_id
         self.author_id = author_id
@@ -16,6 +20,7 @@ class Attachment:
         self.file_url = file_url
         self.file_size = file_size
         self.mime_type = mime_type
+        self.content_sha256 = content_sha256
         self.created_at = created_at or datetime.utcnow()
         
     def to_dict(self) -> Dict:
@@ -28,9 +33,25 @@ class Attachment:
             'file_url': self.file_url,
             'file_size': self.file_size,
             'mime_type': self.mime_type,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'content_sha256': self.content_sha256,
+            'created_at': to_iso(self.created_at)
         }
     
+    @classmethod
+    def from_row(cls, row: Dict) -> 'Attachment':
+        """Fast path for database rows: timestamps kept as read"""
+        attachment = cls.__new__(cls)
+        attachment.attachment_id = row['attachment_id']
+        attachment.ticket_id = row.get('ticket_id')
+        attachment.author_id = row.get('author_id')
+        attachment.file_name = row.get('file_name')
+        attachment.file_url = row.get('file_url')
+        attachment.file_size = row.get('file_size')
+        attachment.mime_type = row.get('mime_type')
+        attachment.content_sha256 = row.get('content_sha256')
+        attachment.created_at = row.get('created_at')
+        return attachment
+    
     @staticmethod
     def from_dict(data: Dict) -> 'Attachment':
         """Create attachment from dictionary"""
@@ -41,5 +62,6 @@ class Attachment:
             file_name=data.get('file_name'),
             file_url=data.get('file_url'),
             file_size=data.get('file_size'),
-            mime_type=data.get('mime_type')
+            mime_type=data.get('mime_type'),
+            content_sha256=data.get('content_sha256')
         )
@@ -1,11 +1,15 @@
 """Audit Log model class"""
 from datetime import datetime
 from typing import Dict, Optional
+from backend.utils.serialization import to_iso
 
 
 class AuditLog:
     """Represents an audit log entry for tracking system actions"""
     
+    __slots__ = ('log_id', 'user_id', 'action', 'entity_type', 'entity_id', 'changes',
+                 'ip_address', 'user_agent', 'created_at')
+    
     def __init__(self, log_id: str, user_id: str, action: str,
                  entity_type: str, entity_id: str, changes: Dict = None,
                  ip_address: str = None, user_agent: str = None,
@@ -31,9 +35,24 @@ class AuditLog:
             'changes': self.changes,
             'ip_address': self.ip_address,
             'user_agent': self.user_agent,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': to_iso(self.created_at)
         }
     
+    @classmethod
+    def from_row(cls, row: Dict) -> 'AuditLog':
+        """Fast path for database rows: timestamps kept as read"""
+        log = cls.__new__(cls)
+        log.log_id = row['log_id']
+        log.user_id = row.get('user_id')
+        log.action = row.get('action')
+        log.entity_type = row.get('entity_type')
+        log.entity_id = row.get('entity_id')
+        log.changes = row.get('changes') or {}
+        log.ip_address = row.get('ip_address')
+        log.user_agent = row.get('user_agent')
+        log.created_at = row.get('created_at')
+        return log
+    
     @staticmethod
     def from_dict(data: Dict) -> 'AuditLog':
         """Create from dictionary"""
@@ -1,11 +1,15 @@
 """Comment model class"""
 from datetime import datetime
 from typing import Dict, Optional
+from backend.utils.serialization import to_iso
 
 
 class Comment:
     """Represents a comment on a ticket"""
     
+    __slots__ = ('comment_id', 'ticket_id', 'author_id', 'content', 'is_internal',
+                 'created_at', 'updated_at')
+    
     def __init__(self, comment_id: str, ticket_id: str, author_id: str,
                  content: str, is_internal: bool = False, 
                  created_at: datetime = None, updated_at: datetime = None):
@@ -25,10 +29,23 @@ class Comment:
             'author_id': self.author_id,
             'content': self.content,
             'is_internal': self.is_internal,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': to_iso(self.created_at),
+            'updated_at': to_iso(self.updated_at)
         }
     
+    @classmethod
+    def from_row(cls, row: Dict) -> 'Comment':
+        """Fast path for database rows: timestamps kept as read"""
+        comment = cls.__new__(cls)
+        comment.comment_id = row['comment_id']
+        comment.ticket_id = row.get('ticket_id')
+        comment.author_id = row.get('author_id')
+        comment.content = row.get('content')
+        comment.is_internal = row.get('is_internal') or False
+        comment.created_at = row.get('created_at')
+        comment.updated_at = row.get('updated_at')
+        return comment
+    
     @staticmethod
     def from_dict(data: Dict) -> 'Comment':
         """Create comment from dictionary"""
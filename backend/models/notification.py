@@ -1,11 +1,15 @@
 """Notification model class"""
 from datetime import datetime
 from typing import Dict, Optional
+from backend.utils.serialization import to_iso
 
 
 class Notification:
     """Represents a notification sent to a user"""
     
+    __slots__ = ('notification_id', 'user_id', 'title', 'message', 'notification_type',
+                 'related_ticket_id', 'is_read', 'created_at')
+    
     def __init__(self, notification_id: str, user_id: str, title: str,
                  message: str, notification_type: str = "info",
                  related_ticket_id: Optional[str] = None,
@@ -29,9 +33,23 @@ class Notification:
             'notification_type': self.notification_type,
             'related_ticket_id': self.related_ticket_id,
             'is_read': self.is_read,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'created_at': to_iso(self.created_at)
         }
     
+    @classmethod
+    def from_row(cls, row: Dict) -> 'Notification':
+        """Fast path for database rows: timestamps kept as read"""
+        notification = cls.__new__(cls)
+        notification.notification_id = row['notification_id']
+        notification.user_id = row.get('user_id')
+        notification.title = row.get('title')
+        notification.message = row.get('message')
+        notification.notification_type = row.get('notification_type') or 'info'
+        notification.related_ticket_id = row.get('related_ticket_id')
+        notification.is_read = row.get('is_read') or False
+        notification.created_at = row.get('created_at')
+        return notification
+    
     @staticmethod
     def from_dict(data: Dict) -> 'Notification':
         """Create from dictionary"""
@@ -2,6 +2,7 @@
 from datetime import datetime
 from typing import Dict, List, Optional
 from enum import Enum
+from backend.utils.serialization import to_iso
 
 
 class TicketStatus(Enum):
@@ -24,6 +25,10 @@ class TicketPriority(Enum):
 class Ticket:
     """Represents a customer support ticket"""
     
+    __slots__ = ('ticket_id', 'customer_id', 'title', 'description', 'priority', 'status',
+                 'assigned_agent_id', 'created_at', 'updated_at', 'sentiment_score',
+                 'category', 'tags', 'attachment_ids')
+    
     def __init__(self, ticket_id: str, customer_id: str, title: str, 
                  description: str, priority: str = "medium", 
                  status: str = "open", assigned_agent_id: Optional[str] = None,
@@ -56,10 +61,29 @@ class Ticket:
             'category': self.category,
             'tags': self.tags,
             'attachment_ids': self.attachment_ids,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': to_iso(self.created_at),
+            'updated_at': to_iso(self.updated_at)
         }
     
+    @classmethod
+    def from_row(cls, row: Dict) -> 'Ticket':
+        """Fast path for database rows: no defaults recomputed, timestamps kept as read"""
+        ticket = cls.__new__(cls)
+        ticket.ticket_id = row['ticket_id']
+        ticket.customer_id = row.get('customer_id')
+        ticket.title = row.get('title')
+        ticket.description = row.get('description')
+        ticket.priority = row.get('priority') or 'medium'
+        ticket.status = row.get('status') or 'open'
+        ticket.assigned_agent_id = row.get('assigned_agent_id')
+        ticket.created_at = row.get('created_at')
+        ticket.updated_at = row.get('updated_at')
+        ticket.sentiment_score = row.get('sentiment_score')
+        ticket.category = row.get('category')
+        ticket.tags = row.get('tags') or []
+        ticket.attachment_ids = row.get('attachment_ids') or []
+        return ticket
+    
     @staticmethod
     def from_dict(data: Dict) -> 'Ticket':
         """Create ticket from dictionary"""
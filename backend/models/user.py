@@ -1,11 +1,14 @@
 """User model class"""
 from datetime import datetime
 from typing import Dict, List
+from backend.utils.serialization import to_iso
 
 
 class User:
     """Represents a system user (Admin, Agent, Customer)"""
     
+    __slots__ = ('user_id', 'email', 'name', 'role', 'created_at', 'updated_at', 'is_active')
+    
     def __init__(self, user_id: str, email: str, name: str, role: str, 
                  created_at: datetime = None, updated_at: datetime = None):
         self.user_id = user_id
@@ -24,10 +27,23 @@ class User:
             'name': self.name,
             'role': self.role,
             'is_active': self.is_active,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': to_iso(self.created_at),
+            'updated_at': to_iso(self.updated_at)
         }
     
+    @classmethod
+    def from_row(cls, row: Dict) -> 'User':
+        """Fast path for database rows: timestamps kept as read"""
+        user = cls.__new__(cls)
+        user.user_id = row['user_id']
+        user.email = row.get('email')
+        user.name = row.get('name')
+        user.role = row.get('role') or 'customer'
+        user.created_at = row.get('created_at')
+        user.updated_at = row.get('updated_at')
+        user.is_active = row.get('is_active', True)
+        return user
+    
     @staticmethod
     def from_dict(data: Dict) -> 'User':
         """Create user from dictionary"""
@@ -0,0 +1,268 @@
+"""Agent Metrics - incremental agent_performance from ticket lifecycle events
+
+Assignments, first responses (the first comment on a ticket by someone other
+than its customer) and resolutions arrive as TicketService / CommentService
+events. Handling an event only appends to a pending list; a background
+thread periodically stamps the milestones on the tickets in one
+record_ticket_milestones call (so each ticket counts once across workers),
+folds the returned durations into per-agent running statistics with
+Welford's update, and merges them into agent_performance in one
+merge_agent_performance call (see docs/supabase_migration.sql).
+
+    python backend/services/agent_metrics.py backfill    # rebuild from history
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List
+
+# Ensure backend module is importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.utils.background import PeriodicFlusher  # noqa: E402
+from backend.utils.event_bus import Event, EventBus  # noqa: E402
+from backend.utils.http_cache import parse_timestamp  # noqa: E402
+from backend.utils.metrics import get_metrics  # noqa: E402
+from backend.utils.pagination import after_keyset  # noqa: E402
+
+RESOLVED_STATUSES = ('resolved', 'closed')
+
+
+class RunningStats:
+    """Count, mean and sum of squared deviations, updated in O(1)"""
+
+    __slots__ = ('n', 'mean', 'm2')
+
+    def __init__(self, n: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value: float):
+        """Welford's update with one sample"""
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other: 'RunningStats'):
+        """Combine with statistics over another set of samples (Chan et al.)"""
+        if other.n == 0:
+            return
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean += delta * other.n / n
+        self.m2 += other.m2 + delta * delta * self.n * other.n / n
+        self.n = n
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+
+class _AgentStats:
+    __slots__ = ('assigned', 'response', 'resolution')
+
+    def __init__(self):
+        self.assigned = 0
+        self.response = RunningStats()
+        self.resolution = RunningStats()
+
+    def to_row(self, agent_id: str) -> Dict:
+        return {
+            'agent_id': agent_id,
+            'assigned': self.assigned,
+            'response_n': self.response.n,
+            'response_mean': self.response.mean,
+            'response_m2': self.response.m2,
+            'resolution_n': self.resolution.n,
+            'resolution_mean': self.resolution.mean,
+            'resolution_m2': self.resolution.m2
+        }
+
+
+def accumulate(stats: Dict[str, _AgentStats], milestones: Iterable[Dict]):
+    """Fold (agent_id, kind, seconds) rows into per-agent statistics"""
+    for row in milestones:
+        if not row.get('agent_id') or row.get('seconds') is None:
+            continue
+        agent = stats.setdefault(row['agent_id'], _AgentStats())
+        running = agent.response if row['kind'] == 'response' else agent.resolution
+        running.add(max(float(row['seconds']), 0.0))
+
+
+class AgentMetricsProcessor:
+    """
+    Turns ticket events into agent_performance updates every flush_interval
+    seconds. A failed flush keeps its pending milestones for the next one,
+    up to max_pending (older ones are dropped and counted).
+    """
+
+    def __init__(self, db, flush_interval: float = 30.0, max_pending: int = 50000):
+        self.db = db
+        self.max_pending = max_pending
+        self.metrics = get_metrics('agent_metrics')
+        self._assigned: Dict[str, int] = {}
+        self._responses: List[Dict] = []
+        self._resolutions: List[Dict] = []
+        self._unmerged: Dict[str, _AgentStats] = {}  # only touched under _flush_lock
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = PeriodicFlusher('AgentMetricsProcessor', self.flush, flush_interval)
+
+    def listen(self, event_bus: EventBus):
+        """Follow assignments, comments and status changes"""
+        event_bus.add_listener(self._on_event, ['ticket.assigned', 'ticket.status_changed', 'comment.created'])
+
+    def _on_event(self, event: Event):
+        data = event.data or {}
+        ticket_id = data.get('ticket_id')
+        if not ticket_id:
+            return
+        with self._lock:
+            if event.event_type == 'ticket.assigned':
+                agent_id = data.get('assigned_agent_id')
+                if agent_id:
+                    self._assigned[agent_id] = self._assigned.get(agent_id, 0) + 1
+            elif event.event_type == 'comment.created':
+                if data.get('author_id') and data.get('created_at'):
+                    self._append(self._responses, {
+                        'ticket_id': ticket_id, 'author_id': data['author_id'], 'at': data['created_at']
+                    })
+            elif data.get('status') in RESOLVED_STATUSES and data.get('updated_at'):
+                self._append(self._resolutions, {'ticket_id': ticket_id, 'at': data['updated_at']})
+        self._flusher.ensure_started()
+
+    def _append(self, pending: List[Dict], item: Dict):
+        if len(pending) >= self.max_pending:
+            del pending[0]
+            self.metrics.incr('dropped')
+        pending.append(item)
+
+    def flush(self) -> int:
+        """Record pending milestones and merge them; returns agents updated"""
+        with self._flush_lock:
+            with self._lock:
+                assigned, self._assigned = self._assigned, {}
+                responses, self._responses = self._responses, []
+                resolutions, self._resolutions = self._resolutions, []
+            if not (assigned or responses or resolutions or self._unmerged):
+                return 0
+
+            start = time.perf_counter()
+            try:
+                milestones = []
+                if responses or resolutions:
+                    milestones = self.db.rpc('record_ticket_milestones', {
+                        'responses': responses, 'resolutions': resolutions
+                    }).execute().data or []
+            except Exception as e:
+                self.metrics.incr('flush_errors')
+                print(f"[AgentMetricsProcessor] Recording milestones failed: {e}")
+                self._requeue(assigned, responses, resolutions)
+                return 0
+
+            # The milestones are stamped now and cannot be recorded again, so
+            # statistics that fail to merge are kept and merged next time
+            stats, self._unmerged = self._unmerged, {}
+            accumulate(stats, milestones)
+            for agent_id, count in assigned.items():
+                stats.setdefault(agent_id, _AgentStats()).assigned += count
+            rows = [agent.to_row(agent_id) for agent_id, agent in stats.items()]
+            if not rows:
+                return 0
+            try:
+                self.db.rpc('merge_agent_performance', {'stats': rows}).execute()
+            except Exception as e:
+                self.metrics.incr('flush_errors')
+                print(f"[AgentMetricsProcessor] Merging agent performance failed: {e}")
+                self._unmerged = stats
+                return 0
+            self.metrics.set('last_flush_ms', round((time.perf_counter() - start) * 1000, 2))
+            self.metrics.incr('samples', len(milestones))
+            self.metrics.incr('agents_updated', len(rows))
+            return len(rows)
+
+    def _requeue(self, assigned: Dict[str, int], responses: List[Dict], resolutions: List[Dict]):
+        """Put an unrecorded batch back in front of newer items"""
+        with self._lock:
+            for agent_id, count in assigned.items():
+                self._assigned[agent_id] = self._assigned.get(agent_id, 0) + count
+            for pending, failed in ((self._responses, responses), (self._resolutions, resolutions)):
+                merged = failed + pending
+                overflow = max(len(merged) - self.max_pending, 0)
+                self.metrics.incr('dropped', overflow)
+                pending[:] = merged[overflow:]
+
+    def shutdown(self):
+        """Stop the flush thread and merge what is pending"""
+        self._flusher.stop()
+
+
+def backfill_agent_performance(db, chunk_size: int = 5000) -> int:
+    """
+    Rebuild agent_performance from ticket history: stamp milestones the
+    processor never saw, then recompute every agent's statistics in one
+    keyset-paginated pass over the tickets. Replaces the existing rows;
+    returns the number of agents written.
+    """
+    db.rpc('backfill_ticket_milestones', {}).execute()
+    stats: Dict[str, _AgentStats] = {}
+    after = None
+    while True:
+        query = (db.table('tickets')
+                 .select('ticket_id, assigned_agent_id, created_at, first_response_at, resolved_at')
+                 .not_.is_('assigned_agent_id', 'null'))
+        if after:
+            query = after_keyset(query, 'created_at', 'ticket_id', *after)
+        rows = query.order('created_at').order('ticket_id').limit(chunk_size).execute().data or []
+        for ticket in rows:
+            agent = stats.setdefault(ticket['assigned_agent_id'], _AgentStats())
+            agent.assigned += 1
+            accumulate(stats, (
+                {'agent_id': ticket['assigned_agent_id'], 'kind': kind,
+                 'seconds': _seconds_between(ticket['created_at'], ticket.get(column))}
+                for kind, column in (('response', 'first_response_at'), ('resolution', 'resolved_at'))
+                if ticket.get(column)
+            ))
+        if len(rows) < chunk_size:
+            break
+        after = (rows[-1]['created_at'], rows[-1]['ticket_id'])
+
+    rows = [{
+        'agent_id': agent_id,
+        'total_assigned_tickets': agent.assigned,
+        'response_count': agent.response.n,
+        'average_response_time': agent.response.mean,
+        'response_time_m2': agent.response.m2,
+        'tickets_resolved': agent.resolution.n,
+        'average_resolution_time': agent.resolution.mean,
+        'resolution_time_m2': agent.resolution.m2
+    } for agent_id, agent in stats.items()]
+    for start in range(0, len(rows), 500):
+        db.table('agent_performance').upsert(rows[start:start + 500]).execute()
+    print(f"[AgentMetricsProcessor] Backfilled {len(rows)} agents")
+    return len(rows)
+
+
+def _seconds_between(start: str, end: str) -> float:
+    return (parse_timestamp(end) - parse_timestamp(start)).total_seconds()
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='SupportPilot agent metrics')
+    parser.add_argument('command', choices=['backfill'])
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    from backend.app import connect_database
+    db = connect_database()
+    if db is None:
+        parser.error('SUPABASE_URL and SUPABASE_KEY are required')
+    backfill_agent_performance(db, args.chunk_size)
+
+
+if __name__ == '__main__':
+    main()
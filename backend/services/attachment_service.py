@@ -0,0 +1,128 @@
+"""Attachment Service - streaming, content-addressed attachment storage
+
+Uploads are read from the request stream in fixed-size chunks into a
+temporary file while their SHA-256 is computed, then renamed to
+<upload_folder>/<aa>/<bb>/<sha256>. Identical uploads therefore share one
+file on disk; each still gets its own attachments row (file name, author,
+ticket) pointing at the blob through content_sha256.
+"""
+import hashlib
+import os
+import tempfile
+import uuid
+from datetime import datetime
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from backend.utils.event_bus import EventBus
+
+CHUNK_SIZE = 64 * 1024
+FOREIGN_KEY_VIOLATION = '23503'
+
+
+class AttachmentTooLarge(Exception):
+    """Raised when an upload exceeds the size limit"""
+
+
+class AttachmentService:
+    """Service class for attachment storage and metadata"""
+
+    LIST_COLUMNS = 'attachment_id, ticket_id, author_id, file_name, file_url, file_size, mime_type, content_sha256, created_at'
+
+    def __init__(self, db, upload_folder: str, event_bus: EventBus = None):
+        self.db = db
+        self.upload_folder = upload_folder
+        self.event_bus = event_bus
+
+    def blob_path(self, content_sha256: str) -> str:
+        """Location of the content with this digest"""
+        return os.path.join(self.upload_folder, content_sha256[:2], content_sha256[2:4], content_sha256)
+
+    def store(self, stream: BinaryIO, max_bytes: int, chunk_size: int = CHUNK_SIZE) -> Tuple[str, int]:
+        """
+        Copy a stream to the blob store chunk by chunk, never holding more
+        than chunk_size bytes in memory. Returns (sha256 hex digest, size).
+        Raises AttachmentTooLarge past max_bytes (nothing is kept).
+        """
+        tmp_dir = os.path.join(self.upload_folder, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise AttachmentTooLarge(f'Attachments are limited to {max_bytes} bytes')
+                    digest.update(chunk)
+                    f.write(chunk)
+            content_sha256 = digest.hexdigest()
+            path = self.blob_path(content_sha256)
+            if os.path.exists(path):
+                os.remove(tmp_path)  # already stored: deduplicated
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+            return content_sha256, size
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def create_attachment(self, ticket_id: str, author_id: str, file_name: str,
+                          mime_type: Optional[str], stream: BinaryIO, max_bytes: int) -> Dict:
+        """
+        Store an uploaded file and record it on a ticket. error_code is
+        'TOO_LARGE' past max_bytes and 'NOT_FOUND' for an unknown ticket.
+        """
+        try:
+            content_sha256, size = self.store(stream, max_bytes)
+        except AttachmentTooLarge as e:
+            return {'success': False, 'error': str(e), 'error_code': 'TOO_LARGE'}
+        except OSError as e:
+            return {'success': False, 'error': f'Could not store attachment: {e}'}
+        try:
+            attachment_id = str(uuid.uuid4())
+            attachment_data = {
+                'attachment_id': attachment_id,
+                'ticket_id': ticket_id,
+                'author_id': author_id,
+                'file_name': file_name,
+                'file_url': f'/api/attachments/{attachment_id}/content',
+                'file_size': size,
+                'mime_type': mime_type or 'application/octet-stream',
+                'content_sha256': content_sha256,
+                'created_at': datetime.utcnow().isoformat()
+            }
+            result = self.db.table('attachments').insert(attachment_data).execute()
+            data = result.data[0] if result.data else attachment_data
+            if self.event_bus:
+                self.event_bus.publish('attachment.created', data, [f'ticket:{ticket_id}'])
+            return {'success': True, 'data': data}
+        except Exception as e:
+            # The blob stays: another row may already point at the same content
+            if getattr(e, 'code', None) == FOREIGN_KEY_VIOLATION:
+                return {'success': False, 'error': 'Ticket not found', 'error_code': 'NOT_FOUND'}
+            return {'success': False, 'error': str(e)}
+
+    def get_ticket_attachments(self, ticket_id: str) -> List[Dict]:
+        """Metadata of every attachment on a ticket in one query, oldest first"""
+        try:
+            result = (self.db.table('attachments').select(self.LIST_COLUMNS)
+                      .eq('ticket_id', ticket_id)
+                      .order('created_at').order('attachment_id')
+                      .execute())
+            return result.data if result.data else []
+        except Exception as e:
+            return []
+
+    def get_attachment(self, attachment_id: str) -> Optional[Dict]:
+        """Get attachment metadata by ID"""
+        try:
+            result = self.db.table('attachments').select(self.LIST_COLUMNS).eq('attachment_id', attachment_id).execute()
+            return result.data[0] if result.data else None
+        except Exception as e:
+            return None
@@ -0,0 +1,312 @@
+"""Audit Service - write-behind audit logging of ticket, comment and user changes"""
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from flask import has_request_context, request
+
+from backend.utils.background import PeriodicFlusher
+from backend.utils.event_bus import Event, EventBus
+from backend.utils.metrics import get_metrics
+
+# event type -> (action, entity type, id field, fields recorded as changes)
+AUDITED_EVENTS = {
+    'ticket.created': ('create', 'ticket', 'ticket_id', ('title', 'priority', 'status', 'customer_id')),
+    'ticket.status_changed': ('update_status', 'ticket', 'ticket_id', ('status',)),
+    'ticket.assigned': ('assign', 'ticket', 'ticket_id', ('assigned_agent_id', 'status')),
+    'comment.created': ('create', 'comment', 'comment_id', ('ticket_id', 'is_internal')),
+    'comment.updated': ('update', 'comment', 'comment_id', ('ticket_id',)),
+    'comment.deleted': ('delete', 'comment', 'comment_id', ()),
+    'attachment.created': ('create', 'attachment', 'attachment_id', ('ticket_id', 'file_name', 'file_size', 'content_sha256')),
+    'user.created': ('create', 'user', 'user_id', ('email', 'role')),
+    'user.updated': ('update', 'user', 'user_id', ('name', 'email', 'role', 'is_active')),
+    'user.deactivated': ('deactivate', 'user', 'user_id', ('is_active',)),
+}
+
+
+def _is_data_error(e: Exception) -> bool:
+    """Postgres data exception / integrity violation (SQLSTATE classes 22 and 23)"""
+    return str(getattr(e, 'code', '') or '').startswith(('22', '23'))
+
+
+def _pid_alive(pid: str) -> bool:
+    """Whether a process with this id (from a file name) is running"""
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def request_actor() -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """(user_id, ip_address, user_agent) of the current request, if any"""
+    if not has_request_context():
+        return None, None, None
+    user = getattr(request, 'user', None) or {}
+    return user.get('user_id'), request.remote_addr, request.headers.get('User-Agent')
+
+
+class AuditLogBuffer:
+    """
+    Collects audit entries in a bounded ring buffer and writes them to
+    audit_logs with one multi-row insert per batch_size entries, on a
+    background thread every flush_interval seconds or as soon as a batch
+    is full. Requests never wait for the database.
+
+    When an insert fails, or takes longer than slow_flush_seconds, the
+    database is given retry_interval seconds to recover; meanwhile batches
+    are appended to a JSONL spill file in spill_dir, which is replayed once
+    inserts succeed again. Corrupt spill lines (e.g. truncated by a crash)
+    are moved to an audit-quarantine file. A full buffer drops its oldest
+    entry; drops and corrupt lines are counted in the audit_log metrics.
+    """
+
+    def __init__(self, db, flush_interval: float = 2.0, batch_size: int = 500,
+                 max_pending: int = 20000, spill_dir: str = 'audit_spill',
+                 slow_flush_seconds: float = 2.0, retry_interval: float = 10.0):
+        self.db = db
+        self.batch_size = batch_size
+        self.spill_dir = spill_dir
+        self.slow_flush_seconds = slow_flush_seconds
+        self.retry_interval = retry_interval
+        self.metrics = get_metrics('audit_log')
+        self._buffer: deque = deque(maxlen=max_pending)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._retry_at = 0.0
+        self._flusher = PeriodicFlusher('AuditLogBuffer', self.flush, flush_interval)
+
+    def record(self, action: str, entity_type: str, entity_id: str, changes: Dict = None,
+               user_id: str = None):
+        """Queue an audit entry; the actor defaults to the current request's user"""
+        actor, ip_address, user_agent = request_actor()
+        row = {
+            'log_id': str(uuid.uuid4()),
+            'user_id': user_id or actor,
+            'action': action,
+            'entity_type': entity_type,
+            'entity_id': str(entity_id),
+            'changes': changes or {},
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'created_at': datetime.utcnow().isoformat()
+        }
+        with self._lock:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.metrics.incr('dropped')
+            self._buffer.append(row)
+            pending = len(self._buffer)
+        self.metrics.incr('recorded')
+        self.metrics.set('pending', pending)
+        self._flusher.ensure_started()
+        if pending >= self.batch_size:
+            self._flusher.wake()
+
+    def listen(self, event_bus: EventBus):
+        """Audit the mutations the services publish"""
+        event_bus.add_listener(self._on_event, list(AUDITED_EVENTS))
+
+    def _on_event(self, event: Event):
+        action, entity_type, id_field, fields = AUDITED_EVENTS[event.event_type]
+        data = event.data or {}
+        entity_id = data.get(id_field)
+        if entity_id is None:
+            return
+        self.record(action, entity_type, entity_id, {f: data[f] for f in fields if f in data})
+
+    # ----- flushing -----
+
+    def flush(self) -> int:
+        """Write what is pending; returns the number of rows inserted"""
+        with self._flush_lock:
+            written = 0
+            with self._lock:
+                batches = -(-len(self._buffer) // self.batch_size)
+            for _ in range(batches):
+                with self._lock:
+                    batch = [self._buffer.popleft()
+                             for _ in range(min(self.batch_size, len(self._buffer)))]
+                    self.metrics.set('pending', len(self._buffer))
+                if not batch:
+                    break
+                if self._insert(batch):
+                    written += len(batch)
+                else:
+                    self._spill(batch)
+            if self._database_available():
+                written += self._replay_spill()
+            return written
+
+    def _database_available(self) -> bool:
+        return time.monotonic() >= self._retry_at
+
+    def _back_off(self):
+        self._retry_at = time.monotonic() + self.retry_interval
+
+    def _insert(self, rows: List[Dict], replay: bool = False) -> bool:
+        """One multi-row insert; False when the database is failing or backing off"""
+        if not self._database_available():
+            return False
+        start = time.perf_counter()
+        try:
+            table = self.db.table('audit_logs')
+            if replay:
+                # A replayed spill may overlap rows that already made it in
+                table.upsert(rows, returning='minimal', ignore_duplicates=True).execute()
+            else:
+                table.insert(rows, returning='minimal').execute()
+        except Exception as e:
+            if _is_data_error(e):
+                # Bad data (e.g. an actor that no longer exists), not a slow database
+                return self._insert_individually(rows)
+            self.metrics.incr('flush_errors')
+            self._back_off()
+            print(f"[AuditLogBuffer] Insert failed, spilling to disk: {e}")
+            return False
+        elapsed = time.perf_counter() - start
+        self.metrics.set('last_flush_ms', round(elapsed * 1000, 2))
+        self.metrics.incr('flushed_rows', len(rows))
+        if elapsed > self.slow_flush_seconds:
+            self.metrics.incr('slow_flushes')
+            self._back_off()
+        return True
+
+    def _insert_individually(self, rows: List[Dict]) -> bool:
+        """Insert rows one at a time, dropping the ones the database rejects"""
+        for i, row in enumerate(rows):
+            try:
+                self.db.table('audit_logs').upsert(row, returning='minimal', ignore_duplicates=True).execute()
+                self.metrics.incr('flushed_rows')
+            except Exception as e:
+                if not _is_data_error(e):
+                    self.metrics.incr('flush_errors')
+                    self._back_off()
+                    self._spill(rows[i:])
+                    return True
+                self.metrics.incr('rejected')
+                print(f"[AuditLogBuffer] Rejected audit entry {row['log_id']}: {e}")
+        return True
+
+    def _spill_path(self) -> str:
+        return os.path.join(self.spill_dir, f'audit-spill-{os.getpid()}.jsonl')
+
+    def _spill(self, rows: List[Dict]):
+        """Append rows to this process's spill file (or drop them without a spill_dir)"""
+        if not self.spill_dir:
+            self.metrics.incr('dropped', len(rows))
+            return
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(self._spill_path(), 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(row, default=str) + '\n' for row in rows))
+            self.metrics.incr('spilled_rows', len(rows))
+        except OSError as e:
+            self.metrics.incr('dropped', len(rows))
+            print(f"[AuditLogBuffer] Spill failed, dropping {len(rows)} entries: {e}")
+
+    def _claim_spill_files(self) -> Iterator[str]:
+        """
+        Claim spill files one at a time by renaming them, so only one
+        process replays each. Replay files of processes that died mid-replay
+        are claimed too.
+        """
+        pattern = os.path.join(self.spill_dir, 'audit-spill-*.jsonl')
+        orphaned = [path for path in glob.glob(pattern + '.replay-*')
+                    if not _pid_alive(path.rsplit('.replay-', 1)[1])]
+        for path in sorted(orphaned + glob.glob(pattern)):
+            claimed = f"{path.rsplit('.replay-', 1)[0]}.replay-{os.getpid()}"
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            yield claimed
+
+    def _parse_spilled(self, line: str) -> Optional[Dict]:
+        """A spilled row, or None for a blank or corrupt (e.g. truncated) line"""
+        if not line.strip():
+            return None
+        try:
+            row = json.loads(line)
+            if isinstance(row, dict):
+                return row
+        except ValueError:
+            pass
+        self._quarantine(line)
+        return None
+
+    def _quarantine(self, line: str):
+        """Set a corrupt spill line aside for inspection instead of replaying it"""
+        self.metrics.incr('corrupt_spill_lines')
+        try:
+            path = os.path.join(self.spill_dir, f'audit-quarantine-{os.getpid()}.jsonl')
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line if line.endswith('\n') else line + '\n')
+        except OSError as e:
+            print(f"[AuditLogBuffer] Could not quarantine a corrupt spill line: {e}")
+
+    def _replay_file(self, claimed: str) -> Tuple[int, bool]:
+        """
+        Insert the rows of a claimed spill file batch by batch, reading it
+        line by line. On failure the rest is spilled again. Returns
+        (rows replayed, whether the whole file went in).
+        """
+        replayed = 0
+        batch = []
+        with open(claimed, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                row = self._parse_spilled(line)
+                if row is not None:
+                    batch.append(row)
+                if len(batch) < self.batch_size:
+                    continue
+                if not self._insert(batch, replay=True):
+                    self._respill(batch, f)
+                    return replayed, False
+                replayed += len(batch)
+                batch = []
+            if batch and not self._insert(batch, replay=True):
+                self._spill(batch)
+                return replayed, False
+        return replayed + len(batch), True
+
+    def _respill(self, batch: List[Dict], lines: Iterable[str]):
+        """Spill a failed batch and the unread rest of its file"""
+        for line in lines:
+            row = self._parse_spilled(line)
+            if row is not None:
+                batch.append(row)
+            if len(batch) >= self.batch_size:
+                self._spill(batch)
+                batch = []
+        if batch:
+            self._spill(batch)
+
+    def _replay_spill(self) -> int:
+        """Insert spilled rows from every worker's spill file; returns rows replayed"""
+        if not self.spill_dir:
+            return 0
+        replayed = 0
+        for claimed in self._claim_spill_files():
+            try:
+                count, complete = self._replay_file(claimed)
+            except OSError as e:
+                print(f"[AuditLogBuffer] Could not replay {claimed}: {e}")
+                continue
+            replayed += count
+            os.remove(claimed)
+            if not complete:
+                break
+        self.metrics.incr('replayed_rows', replayed)
+        return replayed
+
+    def shutdown(self):
+        """Stop the flush thread and write (or spill) what is pending"""
+        self._flusher.stop()
@@ -0,0 +1,205 @@
+"""Audit Store - time-range queries, cold-storage export and retention for audit_logs
+
+audit_logs is range partitioned by month (see docs/supabase_migration.sql).
+Every query here carries a created_at range so Postgres only scans the
+partitions it overlaps, and results are read in keyset-paginated pages.
+
+    python backend/services/audit_store.py partitions --months-ahead 3
+    python backend/services/audit_store.py export --start 2024-01-01 --end 2024-02-01 --out audit_archive
+    python backend/services/audit_store.py retention --retain-months 12 --export-dir audit_archive
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+# Ensure backend module is importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from backend.models.audit_log import AuditLog  # noqa: E402
+from backend.utils.pagination import after_keyset, decode_cursor, encode_cursor  # noqa: E402
+
+Timestamp = Union[datetime, str]
+
+PARTITION_NAME = re.compile(r'^audit_logs_y(\d{4})m(\d{2})$')
+
+
+def _iso(value: Timestamp) -> str:
+    """Timestamp as ISO-8601 text (naive datetimes are UTC)"""
+    if isinstance(value, str):
+        return value
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.isoformat()
+
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(value: datetime) -> datetime:
+    return _month_start(value + timedelta(days=32))
+
+
+def month_ranges(start: datetime, end: datetime) -> List[Tuple[datetime, datetime]]:
+    """Split [start, end) at month boundaries, i.e. into one range per partition"""
+    ranges = []
+    while start < end:
+        boundary = min(_next_month(start), end)
+        ranges.append((start, boundary))
+        start = boundary
+    return ranges
+
+
+def partition_month(name: str) -> Optional[datetime]:
+    """First instant of the month an audit_logs_yYYYYmMM partition holds"""
+    match = PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)
+
+
+class AuditLogStore:
+    """Read side and maintenance of the partitioned audit_logs table"""
+
+    COLUMNS = 'log_id, user_id, action, entity_type, entity_id, changes, ip_address, user_agent, created_at'
+    FILTERS = ('entity_type', 'entity_id', 'user_id', 'action')
+
+    def __init__(self, db):
+        self.db = db
+
+    def page(self, start: Timestamp, end: Timestamp = None, limit: int = 100,
+             cursor: Optional[str] = None, **filters) -> Tuple[List[AuditLog], Optional[str]]:
+        """
+        One page of entries with start <= created_at < end (end defaults to
+        now), oldest first. Keyword filters (entity_type, entity_id, user_id,
+        action) must match exactly. Returns (entries, next cursor or None).
+        """
+        query = (self.db.table('audit_logs').select(self.COLUMNS)
+                 .gte('created_at', _iso(start))
+                 .lt('created_at', _iso(end or datetime.now(timezone.utc))))
+        for column, value in filters.items():
+            if column not in self.FILTERS:
+                raise ValueError(f'Unknown audit log filter: {column}')
+            if value is not None:
+                query = query.eq(column, value)
+        after = decode_cursor(cursor, 2)
+        if after:
+            query = after_keyset(query, 'created_at', 'log_id', *after)
+        rows = query.order('created_at').order('log_id').limit(limit).execute().data or []
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['log_id'])
+        return [AuditLog.from_row(row) for row in rows], next_cursor
+
+    def iter_logs(self, start: Timestamp, end: Timestamp = None, page_size: int = 1000,
+                  **filters) -> Iterator[AuditLog]:
+        """Stream every matching entry, one page in memory at a time"""
+        cursor = None
+        while True:
+            logs, cursor = self.page(start, end, page_size, cursor, **filters)
+            yield from logs
+            if cursor is None:
+                return
+
+    def export(self, start: datetime, end: datetime, out_dir: str, page_size: int = 5000) -> List[Dict]:
+        """
+        Write [start, end) to gzip-compressed JSONL files, one per month
+        (audit_logs_yYYYYmMM.jsonl.gz). Files are written under a temporary
+        name and renamed when complete. Returns [{path, rows}].
+        """
+        os.makedirs(out_dir, exist_ok=True)
+        exported = []
+        for month_start, month_end in month_ranges(start, end):
+            path = os.path.join(out_dir, f"audit_logs_{month_start:y%Ym%m}.jsonl.gz")
+            tmp_path = f'{path}.tmp'
+            rows = 0
+            try:
+                with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                    for log in self.iter_logs(month_start, month_end, page_size):
+                        f.write(json.dumps(log.to_dict(), separators=(',', ':'), default=str) + '\n')
+                        rows += 1
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            print(f"[AuditLogStore] Exported {rows} entries to {path}")
+            exported.append({'path': path, 'rows': rows})
+        return exported
+
+    def ensure_partitions(self, months_ahead: int = 3) -> List[str]:
+        """Create the monthly partitions up to months_ahead; returns the new ones"""
+        result = self.db.rpc('create_audit_log_partitions', {'months_ahead': months_ahead}).execute()
+        return self._names(result.data)
+
+    def drop_expired_partitions(self, retain_months: int, export_dir: str = None) -> List[str]:
+        """
+        Drop the monthly partitions older than retain_months, exporting each
+        to export_dir first when given. Only the partitions listed (and
+        exported) here are dropped, not any that expired in between.
+        Returns the dropped partitions.
+        """
+        expired = self._names(self.db.rpc('drop_audit_log_partitions', {
+            'retain_months': retain_months, 'dry_run': True
+        }).execute().data)
+        if not expired:
+            return []
+        if export_dir:
+            for name in expired:
+                month = partition_month(name)
+                if month is not None:
+                    self.export(month, _next_month(month), export_dir)
+        dropped = self.db.rpc('drop_audit_log_partitions', {
+            'retain_months': retain_months, 'partition_names': expired
+        }).execute()
+        return self._names(dropped.data)
+
+    @staticmethod
+    def _names(data) -> List[str]:
+        """Partition names from a SETOF TEXT rpc result"""
+        names = []
+        for item in data or []:
+            names.append(next(iter(item.values())) if isinstance(item, dict) else item)
+        return names
+
+
+def _parse_date(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description='SupportPilot audit log maintenance')
+    commands = parser.add_subparsers(dest='command', required=True)
+    partitions = commands.add_parser('partitions', help='create upcoming monthly partitions')
+    partitions.add_argument('--months-ahead', type=int, default=3)
+    export = commands.add_parser('export', help='export a time range to .jsonl.gz files')
+    export.add_argument('--start', type=_parse_date, required=True)
+    export.add_argument('--end', type=_parse_date, required=True)
+    export.add_argument('--out', required=True)
+    retention = commands.add_parser('retention', help='drop partitions past the retention period')
+    retention.add_argument('--retain-months', type=int,
+                           default=int(os.getenv('AUDIT_RETENTION_MONTHS', 12)))
+    retention.add_argument('--export-dir', help='export partitions here before dropping them')
+    args = parser.parse_args(argv)
+
+    from backend.app import connect_database
+    db = connect_database()
+    if db is None:
+        parser.error('SUPABASE_URL and SUPABASE_KEY are required')
+    store = AuditLogStore(db)
+    if args.command == 'partitions':
+        print('Created', store.ensure_partitions(args.months_ahead) or 'nothing')
+    elif args.command == 'export':
+        store.export(args.start, args.end, args.out)
+    else:
+        print('Dropped', store.drop_expired_partitions(args.retain_months, args.export_dir) or 'nothing')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,19 @@
 """Comment Service - handles comment operations"""
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
+from backend.utils.event_bus import EventBus
+from backend.utils.pagination import after_keyset, decode_cursor, encode_cursor
 import uuid
 
 
 class CommentService:
     """Service class for comment operations"""
     
-    def __init__(self, db):
+    LIST_COLUMNS = 'comment_id, ticket_id, author_id, content, is_internal, created_at, updated_at'
+    
+    def __init__(self, db, event_bus: EventBus = None):
         self.db = db
+        self.event_bus = event_bus
         
     def create_comment(self, ticket_id: str, author_id: str, content: str,
                       is_internal: bool = False) -> Dict:
@@ -25,18 +30,90 @@ class CommentService:
                 'updated_at': datetime.utcnow().isoformat()
             }
             result = self.db.table('comments').insert(comment_data).execute()
-            return {'success': True, 'data': result.data[0] if result.data else comment_data}
+            data = result.data[0] if result.data else comment_data
+            if self.event_bus:
+                channel = f'ticket:{ticket_id}:internal' if is_internal else f'ticket:{ticket_id}'
+                self.event_bus.publish('comment.created', data, [channel])
+            return {'success': True, 'data': data}
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
-    def get_ticket_comments(self, ticket_id: str) -> List[Dict]:
-        """Get all comments for a ticket"""
+    def get_ticket_comments(self, ticket_id: str, include_internal: bool = True,
+                            limit: Optional[int] = None, cursor: Optional[str] = None) -> List[Dict]:
+        """
+        Comments of a ticket, oldest first. Internal comments are filtered out
+        in the query unless include_internal. With a limit, pages are keyset
+        paginated on (created_at, comment_id); pass next_cursor(page, limit)
+        back as cursor for the following page.
+        """
         try:
-            result = self.db.table('comments').select('*').eq('ticket_id', ticket_id).order('created_at', desc=False).execute()
+            query = self.db.table('comments').select(self.LIST_COLUMNS).eq('ticket_id', ticket_id)
+            if not include_internal:
+                query = query.eq('is_internal', False)
+            after = decode_cursor(cursor, 2)
+            if after:
+                query = after_keyset(query, 'created_at', 'comment_id', *after)
+            query = query.order('created_at').order('comment_id')
+            if limit:
+                query = query.limit(limit)
+            result = query.execute()
             return result.data if result.data else []
         except Exception as e:
             return []
     
+    @staticmethod
+    def next_cursor(page: List[Dict], limit: int) -> Optional[str]:
+        """Cursor for the page after this one, or None on the last page"""
+        if not page or len(page) < limit:
+            return None
+        last = page[-1]
+        return encode_cursor(last['created_at'], last['comment_id'])
+    
+    def comment_counts(self, ticket_ids: List[str], include_internal: bool = True) -> Dict[str, int]:
+        """Comment count per ticket for a whole list of tickets in one round trip"""
+        if not ticket_ids:
+            return {}
+        counts = dict.fromkeys(ticket_ids, 0)
+        try:
+            # Grouped count in the database (see migration)
+            result = self.db.rpc('comment_counts', {
+                'ticket_ids': list(ticket_ids), 'include_internal': include_internal
+            }).execute()
+            for row in result.data or []:
+                counts[row['ticket_id']] = row['comment_count']
+            return counts
+        except Exception as e:
+            pass
+        try:
+            # Fallback: fetch just the ticket_id column and count here
+            query = self.db.table('comments').select('ticket_id').in_('ticket_id', list(ticket_ids))
+            if not include_internal:
+                query = query.eq('is_internal', False)
+            for row in query.execute().data or []:
+                counts[row['ticket_id']] += 1
+        except Exception as e:
+            pass
+        return counts
+    
+    def get_comments_version(self, ticket_id: str,
+                             include_internal: bool = True) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        (version, newest updated_at) of a ticket's comment list for conditional
+        GETs: one indexed query returning the row count and the newest
+        updated_at, so adds, edits and deletes all change the version
+        """
+        try:
+            query = self.db.table('comments').select('updated_at', count='exact').eq('ticket_id', ticket_id)
+            if not include_internal:
+                query = query.eq('is_internal', False)
+            result = query.order('updated_at', desc=True).limit(1).execute()
+        except Exception as e:
+            return None
+        if result.count is None:
+            return None
+        newest = result.data[0].get('updated_at') if result.data else None
+        return f'{result.count}:{newest}', newest
+    
     def get_comment(self, comment_id: str) -> Dict:
         """Get comment by ID"""
         try:
@@ -53,6 +130,9 @@ class CommentService:
                 'updated_at': datetime.utcnow().isoformat()
             }
             result = self.db.table('comments').update(update_data).eq('comment_id', comment_id).execute()
+            data = result.data[0] if result.data else dict(update_data, comment_id=comment_id)
+            if self.event_bus:
+                self.event_bus.publish('comment.updated', data)
             return {'success': True, 'data': result.data[0] if result.data else update_data}
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -61,6 +141,8 @@ class CommentService:
         """Delete a comment"""
         try:
             result = self.db.table('comments').delete().eq('comment_id', comment_id).execute()
+            if self.event_bus:
+                self.event_bus.publish('comment.deleted', {'comment_id': comment_id})
             return {'success': True}
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -0,0 +1,94 @@
+"""Duplicate Detector - finds likely duplicate tickets with MinHash LSH"""
+from typing import Dict, List, Optional, Tuple
+from backend.ml.similarity import MinHashLSH
+from backend.utils.background import PeriodicFlusher
+from backend.utils.event_bus import Event, EventBus
+from backend.utils.ttl_cache import TTLCache
+
+OPEN_STATUSES = ['open', 'in_progress', 'pending']
+
+
+class DuplicateDetector:
+    """Keeps an LSH index of recent tickets and answers similar-ticket lookups"""
+
+    def __init__(self, db, lsh: MinHashLSH = None, sync_interval: float = 60.0,
+                 page_size: int = 1000):
+        self.db = db
+        self.lsh = lsh if lsh is not None else MinHashLSH()
+        self.page_size = page_size
+        self._watermark: Optional[str] = None
+        # Signatures computed by find_similar(), reused when the ticket is created
+        self._recent_signatures = TTLCache(max_size=256, ttl=60)
+        self._flusher = PeriodicFlusher('DuplicateDetector', self.sync, sync_interval,
+                                        run_immediately=True)
+
+    def listen(self, event_bus: EventBus):
+        """Index tickets as they are created"""
+        event_bus.add_listener(self._on_ticket_created, ['ticket.created'])
+
+    def _on_ticket_created(self, event: Event):
+        description = event.data.get('description') or ''
+        self.lsh.insert(event.data.get('ticket_id'), description,
+                        signature=self._recent_signatures.pop(description))
+
+    def start(self):
+        """Start background loading/syncing in this process"""
+        self._flusher.ensure_started()
+
+    def sync(self) -> int:
+        """Index tickets created since the last sync (the first call loads the
+        most recent tickets up to the index capacity)"""
+        # Pages come newest first (so capacity keeps the most recent tickets),
+        # but are indexed oldest first so eviction drops the oldest
+        signatures = []
+        offset = 0
+        newest = self._watermark
+        while len(signatures) < self.lsh.max_items:
+            query = self.db.table('tickets').select('ticket_id, description, created_at')
+            if self._watermark:
+                query = query.gt('created_at', self._watermark)
+            result = query.order('created_at', desc=True).range(offset, offset + self.page_size - 1).execute()
+            rows = result.data or []
+            for row in rows:
+                if row['ticket_id'] not in self.lsh:
+                    signatures.append((row['ticket_id'], self.lsh.hasher.signature(row.get('description') or '')))
+                newest = max(newest or '', row.get('created_at') or '')
+            if len(rows) < self.page_size:
+                break
+            offset += self.page_size
+        for ticket_id, signature in reversed(signatures):
+            if signature is not None:
+                self.lsh.insert(ticket_id, signature=signature)
+        self._watermark = newest
+        return len(signatures)
+
+    def find_similar(self, text: str, limit: int = 5,
+                     exclude: str = None) -> List[Tuple[str, float]]:
+        """Likely duplicates of a description among indexed tickets"""
+        signature = self.lsh.hasher.signature(text or '')
+        if signature is not None:
+            self._recent_signatures.set(text or '', signature)
+        return self.lsh.query(signature=signature, limit=limit, exclude=exclude)
+
+    def find_similar_to_ticket(self, ticket: Dict, limit: int = 5) -> List[Tuple[str, float]]:
+        """Likely duplicates of an existing ticket"""
+        return self.find_similar(ticket.get('description') or '', limit, exclude=ticket.get('ticket_id'))
+
+    def cluster_open_tickets(self, max_tickets: int = 20000) -> List[List[str]]:
+        """Batch mode: group the open backlog into clusters of likely duplicates"""
+        items = []
+        offset = 0
+        while len(items) < max_tickets:
+            result = self.db.table('tickets').select('ticket_id, description') \
+                .in_('status', OPEN_STATUSES).order('created_at') \
+                .range(offset, offset + self.page_size - 1).execute()
+            rows = result.data or []
+            items.extend((row['ticket_id'], row.get('description') or '') for row in rows)
+            if len(rows) < self.page_size:
+                break
+            offset += self.page_size
+        return self.lsh.cluster(items[:max_tickets])
+
+    def shutdown(self):
+        """Stop background syncing"""
+        self._flusher.stop(final_flush=False)
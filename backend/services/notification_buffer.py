@@ -0,0 +1,148 @@
+"""Notification Buffer - write-behind batching and digesting of notifications"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from backend.services.notification_service import NotificationService
+from backend.utils.background import PeriodicFlusher
+from backend.utils.event_bus import Event, EventBus
+from backend.utils.metrics import get_metrics
+
+
+class NotificationDigestBuffer:
+    """
+    Buffers notifications and writes them in one bulk insert per flush.
+    Bursts for the same user within a flush interval are coalesced into a
+    single digest notification.
+
+    Backpressure: when max_pending notifications are waiting, enqueue flushes
+    synchronously once; if the buffer is still full the notification is
+    rejected and enqueue returns False so the caller can decide what to do.
+    """
+
+    def __init__(self, notification_service: NotificationService,
+                 flush_interval: float = 2.0, max_pending: int = 10000,
+                 digest_threshold: int = 3):
+        self.notification_service = notification_service
+        self.max_pending = max_pending
+        self.digest_threshold = digest_threshold
+        self.metrics = get_metrics('notification_buffer')
+        self._pending: 'OrderedDict[str, List[Dict]]' = OrderedDict()
+        self._pending_count = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = PeriodicFlusher('NotificationDigestBuffer', self.flush, flush_interval)
+
+    def enqueue(self, user_id: str, title: str, message: str,
+                notification_type: str = "info",
+                related_ticket_id: Optional[str] = None) -> bool:
+        """Queue a notification for the next flush; False if rejected"""
+        item = {
+            'user_id': user_id,
+            'title': title,
+            'message': message,
+            'notification_type': notification_type,
+            'related_ticket_id': related_ticket_id
+        }
+        if self._pending_count >= self.max_pending:
+            self.metrics.incr('backpressure_flushes')
+            self.flush()
+        with self._lock:
+            if self._pending_count >= self.max_pending:
+                self.metrics.incr('rejected')
+                return False
+            self._pending.setdefault(user_id, []).append(item)
+            self._pending_count += 1
+            self.metrics.set('pending', self._pending_count)
+        self.metrics.incr('enqueued')
+        self._flusher.ensure_started()
+        return True
+
+    def _coalesce(self, user_items: List[Dict]) -> Dict:
+        """Merge a burst of notifications for one user into a digest"""
+        titles = [item['title'] for item in user_items]
+        shown = '; '.join(titles[:3])
+        more = len(titles) - 3
+        ticket_ids = {item['related_ticket_id'] for item in user_items}
+        return {
+            'user_id': user_items[0]['user_id'],
+            'title': f'{len(user_items)} new updates',
+            'message': shown + (f' and {more} more' if more > 0 else ''),
+            'notification_type': 'digest',
+            'related_ticket_id': ticket_ids.pop() if len(ticket_ids) == 1 else None
+        }
+
+    def flush(self) -> int:
+        """Write everything pending; returns the number of rows inserted"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, OrderedDict()
+                self._pending_count = 0
+                self.metrics.set('pending', 0)
+            if not pending:
+                return 0
+
+            rows = []
+            for user_items in pending.values():
+                # Retried rows already have an id and are written as they are
+                fresh = [item for item in user_items if not item.get('notification_id')]
+                rows.extend(item for item in user_items if item.get('notification_id'))
+                if len(fresh) >= self.digest_threshold:
+                    rows.append(self._coalesce(fresh))
+                    self.metrics.incr('digested', len(fresh))
+                else:
+                    rows.extend(fresh)
+
+            start = time.perf_counter()
+            result = self.notification_service.create_notifications(rows)
+            self.metrics.set('last_flush_ms', round((time.perf_counter() - start) * 1000, 2))
+            if result['success']:
+                self.metrics.incr('flushed_rows', len(rows))
+                return len(rows)
+
+            self.metrics.incr('flush_errors')
+            written = len(result.get('data') or [])
+            self.metrics.incr('flushed_rows', written)
+            # Only the rows that did not commit; they keep their notification_id,
+            # so a retry cannot duplicate a row whose insert did land
+            failed = OrderedDict()
+            for row in result.get('failed', rows):
+                failed.setdefault(row['user_id'], []).append(row)
+            self._requeue(failed)
+            return written
+
+    def _requeue(self, failed: 'OrderedDict[str, List[Dict]]'):
+        """Put failed rows back in front of newer items, dropping what no longer fits"""
+        with self._lock:
+            merged = OrderedDict()
+            count = 0
+            for source in (failed, self._pending):
+                for user_id, user_items in source.items():
+                    room = self.max_pending - count
+                    kept = user_items[:max(room, 0)]
+                    self.metrics.incr('dropped', len(user_items) - len(kept))
+                    if kept:
+                        merged.setdefault(user_id, []).extend(kept)
+                        count += len(kept)
+            self._pending = merged
+            self._pending_count = count
+            self.metrics.set('pending', count)
+
+    def listen(self, event_bus: EventBus):
+        """Notify ticket participants of assignment and status changes"""
+        event_bus.add_listener(self._on_ticket_event, ['ticket.assigned', 'ticket.status_changed'])
+
+    def _on_ticket_event(self, event: Event):
+        ticket = event.data
+        ticket_id = ticket.get('ticket_id')
+        label = ticket.get('title') or ticket_id
+        if event.event_type == 'ticket.assigned' and ticket.get('assigned_agent_id'):
+            self.enqueue(ticket['assigned_agent_id'], 'Ticket assigned to you',
+                         f'{label} was assigned to you', 'info', ticket_id)
+        elif event.event_type == 'ticket.status_changed' and ticket.get('customer_id'):
+            self.enqueue(ticket['customer_id'], 'Ticket status updated',
+                         f"{label} is now {ticket.get('status')}", 'info', ticket_id)
+
+    def shutdown(self):
+        """Stop the flush thread and write what is pending"""
+        self._flusher.stop()
@@ -1,13 +1,28 @@
 """Notification Service - handles notifications"""
 from typing import List, Dict, Optional
+from collections import Counter
 from datetime import datetime
+from backend.utils.event_bus import EventBus
+from backend.utils.metrics import get_metrics
+from backend.utils.pagination import after_keyset, decode_cursor, encode_cursor
+from backend.utils.ttl_cache import TTLCache
+import uuid
 
 
 class NotificationService:
     """Service class for notification operations"""
     
-    def __init__(self, db):
+    LIST_COLUMNS = ('notification_id, user_id, title, message, notification_type, '
+                    'related_ticket_id, is_read, created_at')
+    
+    def __init__(self, db, event_bus: EventBus = None, insert_batch_size: int = 500,
+                 unread_cache_ttl: float = 30.0):
         self.db = db
+        self.event_bus = event_bus
+        self.insert_batch_size = insert_batch_size
+        self.metrics = get_metrics('notifications')
+        # Per-user unread counts; the TTL bounds drift from writes made by other workers
+        self.unread_counts = TTLCache(max_size=50000, ttl=unread_cache_ttl)
         
     def create_notification(self, user_id: str, title: str, message: str,
                           notification_type: str = "info",
@@ -15,6 +30,7 @@ class NotificationService:
         """Create and send a notification"""
         try:
             notification_data = {
+                'notification_id': str(uuid.uuid4()),
                 'user_id': user_id,
                 'title': title,
                 'message': message,
@@ -24,26 +40,141 @@ class NotificationService:
                 'created_at': datetime.utcnow().isoformat()
             }
             result = self.db.table('notifications').insert(notification_data).execute()
-            return {'success': True, 'data': result.data[0] if result.data else notification_data}
+            data = result.data[0] if result.data else notification_data
+            self._adjust_unread(user_id, 1)
+            if self.event_bus:
+                self.event_bus.publish('notification.created', data, [f'user:{user_id}'])
+            return {'success': True, 'data': data}
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
-    def get_user_notifications(self, user_id: str, unread_only: bool = False) -> List[Dict]:
-        """Get notifications for a user"""
+    def create_notifications(self, notifications: List[Dict]) -> Dict:
+        """
+        Create many notifications with one multi-row insert per batch.
+        Each item takes the create_notification arguments as keys:
+        user_id, title, message, notification_type, related_ticket_id, and
+        optionally notification_id and created_at. Rows are upserted on
+        notification_id, so retrying rows that did commit inserts nothing.
+        On failure, 'failed' holds the rows (with their ids) not yet written.
+        """
+        now = datetime.utcnow().isoformat()
+        try:
+            rows = [{
+                'notification_id': n.get('notification_id') or str(uuid.uuid4()),
+                'user_id': n['user_id'],
+                'title': n['title'],
+                'message': n['message'],
+                'notification_type': n.get('notification_type', 'info'),
+                'related_ticket_id': n.get('related_ticket_id'),
+                'is_read': False,
+                'created_at': n.get('created_at', now)
+            } for n in notifications]
+        except KeyError as e:
+            return {'success': False, 'error': f'Missing notification field: {e}'}
+        
+        created = []
+        for start in range(0, len(rows), self.insert_batch_size):
+            batch = rows[start:start + self.insert_batch_size]
+            try:
+                result = self.db.table('notifications').upsert(batch, ignore_duplicates=True).execute()
+            except Exception as e:
+                self.metrics.incr('bulk_errors')
+                self._announce(created)
+                return {'success': False, 'error': str(e), 'data': created, 'failed': rows[start:]}
+            # Only rows actually inserted come back (duplicates are skipped)
+            created.extend(result.data if result.data is not None else batch)
+            self.metrics.incr('bulk_inserts')
+            self.metrics.incr('bulk_rows', len(batch))
+        self._announce(created)
+        return {'success': True, 'data': created}
+    
+    def _announce(self, created: List[Dict]):
+        """Count and publish newly inserted notifications"""
+        for user_id, count in Counter(row['user_id'] for row in created).items():
+            self._adjust_unread(user_id, count)
+        if self.event_bus:
+            for data in created:
+                self.event_bus.publish('notification.created', data, [f"user:{data['user_id']}"])
+    
+    def notify_users(self, user_ids: List[str], title: str, message: str,
+                     notification_type: str = "info",
+                     related_ticket_id: Optional[str] = None) -> Dict:
+        """Send the same notification to many users (fan-out) in bulk"""
+        return self.create_notifications([{
+            'user_id': user_id,
+            'title': title,
+            'message': message,
+            'notification_type': notification_type,
+            'related_ticket_id': related_ticket_id
+        } for user_id in dict.fromkeys(user_ids)])
+    
+    def get_user_notifications(self, user_id: str, unread_only: bool = False,
+                               limit: int = None, cursor: str = None) -> List[Dict]:
+        """
+        Get notifications for a user, newest first.
+        With limit, returns one page; pass next_cursor(page) as cursor for the next one.
+        """
         try:
-            query = self.db.table('notifications').select('*').eq('user_id', user_id)
+            query = self.db.table('notifications').select(self.LIST_COLUMNS).eq('user_id', user_id)
             if unread_only:
                 query = query.eq('is_read', False)
-            result = query.order('created_at', desc=True).execute()
+            after = decode_cursor(cursor, 2)
+            if after:
+                query = after_keyset(query, 'created_at', 'notification_id', *after, descending=True)
+            query = query.order('created_at', desc=True).order('notification_id', desc=True)
+            if limit:
+                query = query.limit(limit)
+            result = query.execute()
             return result.data if result.data else []
         except Exception as e:
             return []
     
-    def mark_as_read(self, notification_id: str) -> Dict:
-        """Mark notification as read"""
+    @staticmethod
+    def next_cursor(page: List[Dict], limit: int) -> Optional[str]:
+        """Cursor for the page after this one, or None on the last page"""
+        if not page or len(page) < limit:
+            return None
+        last = page[-1]
+        return encode_cursor(last['created_at'], last['notification_id'])
+    
+    def get_unread_count(self, user_id: str) -> int:
+        """Unread notification count (badge), served from the per-user counter"""
+        cached = self.unread_counts.get(user_id)
+        if cached is not None:
+            return cached
+        try:
+            # Maintained by a trigger on notifications (see migration)
+            result = self.db.table('notification_unread_counts').select('unread_count').eq('user_id', user_id).execute()
+            count = result.data[0]['unread_count'] if result.data else None
+        except Exception as e:
+            count = None
+        if count is None:
+            # No counter row (or no counter table): count exactly
+            try:
+                result = self.db.table('notifications').select('notification_id', count='exact') \
+                    .eq('user_id', user_id).eq('is_read', False).limit(1).execute()
+                count = result.count or 0
+            except Exception as e:
+                return 0
+        self.unread_counts.set(user_id, count)
+        return count
+    
+    def _adjust_unread(self, user_id: str, delta: int):
+        """Keep a cached unread count in step with a write"""
+        self.unread_counts.update(user_id, lambda count: max(count + delta, 0))
+    
+    def mark_as_read(self, notification_id: str, user_id: Optional[str] = None) -> Dict:
+        """Mark notification as read (only the owner's, when user_id is given)"""
         try:
             update_data = {'is_read': True}
-            result = self.db.table('notifications').update(update_data).eq('notification_id', notification_id).execute()
+            query = self.db.table('notifications').update(update_data) \
+                .eq('notification_id', notification_id).eq('is_read', False)
+            if user_id:
+                query = query.eq('user_id', user_id)
+            result = query.execute()
+            # Only rows that were unread come back, so each one is a decrement
+            for row in result.data or []:
+                self._adjust_unread(row['user_id'], -1)
             return {'success': True}
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -52,7 +183,9 @@ class NotificationService:
         """Mark all notifications for a user as read"""
         try:
             update_data = {'is_read': True}
-            result = self.db.table('notifications').update(update_data).eq('user_id', user_id).eq('is_read', False).execute()
+            self.db.table('notifications').update(update_data, returning='minimal') \
+                .eq('user_id', user_id).eq('is_read', False).execute()
+            self.unread_counts.set(user_id, 0)
             return {'success': True}
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -60,7 +193,10 @@ class NotificationService:
     def delete_notification(self, notification_id: str) -> Dict:
         """Delete a notification"""
         try:
-            self.db.table('notifications').delete().eq('notification_id', notification_id).execute()
+            result = self.db.table('notifications').delete().eq('notification_id', notification_id).execute()
+            for row in result.data or []:
+                if not row.get('is_read'):
+                    self._adjust_unread(row['user_id'], -1)
             return {'success': True}
         except Exception as e:
             return {'success': False, 'error': str(e)}
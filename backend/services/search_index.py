@@ -0,0 +1,375 @@
+"""Search Index - full-text ticket search with an in-memory inverted index
+
+Tickets are indexed by title, description and public comments, using the
+same tokenizer as the ML pipeline (MLPreprocessor.preprocess), and ranked
+with BM25. Postings are sorted doc-id arrays with parallel term-frequency
+arrays; on disk they are delta- and varint-encoded.
+
+The index is updated in-process from ticket/comment events and caught up
+periodically from the database (sync), so writes handled by other workers
+show up within one sync interval.
+"""
+import bisect
+import heapq
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from backend.ml.preprocessor import MLPreprocessor
+from backend.utils.background import PeriodicFlusher
+from backend.utils.event_bus import Event, EventBus
+from backend.utils.metrics import get_metrics
+from backend.utils.pagination import after_keyset
+
+MAGIC = b'SPIX1'
+TICKET_COLUMNS = 'ticket_id, customer_id, title, description, status, priority, assigned_agent_id, updated_at'
+# Ticket fields that can be used as search filters, in _meta order
+META_FIELDS = ('status', 'priority', 'assigned_agent_id', 'customer_id')
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+class TicketSearchIndex:
+    """Inverted index over tickets with BM25 ranking"""
+
+    def __init__(self, preprocessor: MLPreprocessor = None, k1: float = 1.2, b: float = 0.75):
+        self.preprocessor = preprocessor or MLPreprocessor()
+        self.k1 = k1
+        self.b = b
+        self.metrics = get_metrics('search_index')
+        self._lock = threading.RLock()
+        self._postings: Dict[str, array] = {}   # term -> sorted doc ids
+        self._freqs: Dict[str, array] = {}      # term -> term frequency per posting
+        self._doc_len = array('I')
+        self._total_len = 0
+        self._doc_keys: List[str] = []          # doc id -> ticket_id
+        self._doc_ids: Dict[str, int] = {}      # ticket_id -> doc id
+        self._meta: List[list] = []             # doc id -> META_FIELDS values
+        self._watermark: Optional[str] = None   # updated_at/created_at of last sync
+        self._recent_comments: Dict[str, str] = {}  # comment_id -> created_at since watermark
+        self._dirty = False
+
+    def __len__(self) -> int:
+        return len(self._doc_keys)
+
+    # ----- indexing -----
+
+    def _add_tokens(self, doc_id: int, tokens: List[str]):
+        for term, tf in Counter(tokens).items():
+            postings = self._postings.get(term)
+            if postings is None:
+                self._postings[term] = array('I', [doc_id])
+                self._freqs[term] = array('I', [tf])
+            elif postings[-1] == doc_id:
+                self._freqs[term][-1] += tf
+            elif postings[-1] < doc_id:
+                postings.append(doc_id)
+                self._freqs[term].append(tf)
+            else:
+                # Older document (e.g. a new comment): keep the postings sorted
+                pos = bisect.bisect_left(postings, doc_id)
+                if pos < len(postings) and postings[pos] == doc_id:
+                    self._freqs[term][pos] += tf
+                else:
+                    postings.insert(pos, doc_id)
+                    self._freqs[term].insert(pos, tf)
+        self._doc_len[doc_id] += len(tokens)
+        self._total_len += len(tokens)
+        self._dirty = True
+
+    def add_ticket(self, ticket: Dict):
+        """Index a ticket's title and description; existing tickets only get metadata updates"""
+        ticket_id = ticket.get('ticket_id')
+        if not ticket_id:
+            return
+        with self._lock:
+            if ticket_id in self._doc_ids:
+                self._update_meta(self._doc_ids[ticket_id], ticket)
+                return
+            doc_id = len(self._doc_keys)
+            self._doc_keys.append(ticket_id)
+            self._doc_ids[ticket_id] = doc_id
+            self._doc_len.append(0)
+            self._meta.append([ticket.get(field) for field in META_FIELDS])
+            text = f"{ticket.get('title') or ''} {ticket.get('description') or ''}"
+            self._add_tokens(doc_id, self.preprocessor.preprocess(text))
+        self.metrics.set('documents', len(self._doc_keys))
+
+    def add_text(self, ticket_id: str, text: str) -> bool:
+        """Append text (a comment) to an indexed ticket; False if the ticket is unknown"""
+        tokens = self.preprocessor.preprocess(text)
+        with self._lock:
+            doc_id = self._doc_ids.get(ticket_id)
+            if doc_id is None:
+                return False
+            self._add_tokens(doc_id, tokens)
+        return True
+
+    def add_comment(self, comment: Dict) -> bool:
+        """Index a public comment once, however many times it is seen"""
+        if comment.get('is_internal'):
+            return False
+        comment_id = comment.get('comment_id')
+        with self._lock:
+            if comment_id in self._recent_comments:
+                return False
+            if not self.add_text(comment.get('ticket_id'), comment.get('content') or ''):
+                return False
+            if comment_id:
+                self._recent_comments[comment_id] = comment.get('created_at') or ''
+        return True
+
+    def _update_meta(self, doc_id: int, ticket: Dict):
+        meta = self._meta[doc_id]
+        for i, field in enumerate(META_FIELDS):
+            if field in ticket:
+                meta[i] = ticket[field]
+
+    def update_metadata(self, ticket: Dict):
+        """Apply status/priority/assignment changes to a ticket's filters"""
+        with self._lock:
+            doc_id = self._doc_ids.get(ticket.get('ticket_id'))
+            if doc_id is not None:
+                self._update_meta(doc_id, ticket)
+                self._dirty = True
+
+    def listen(self, event_bus: EventBus):
+        """Keep the index current from ticket and comment events"""
+        event_bus.add_listener(self._on_event, [
+            'ticket.created', 'ticket.status_changed', 'ticket.assigned', 'comment.created'
+        ])
+
+    def _on_event(self, event: Event):
+        if event.event_type == 'ticket.created':
+            self.add_ticket(event.data)
+        elif event.event_type == 'comment.created':
+            self.add_comment(event.data)
+        else:
+            self.update_metadata(event.data)
+
+    # ----- search -----
+
+    def search(self, query: str, limit: int = 20, **filters) -> List[Tuple[str, float]]:
+        """
+        Rank tickets for a query with BM25.
+        Keyword filters (status, priority, assigned_agent_id, customer_id)
+        must match exactly. Returns [(ticket_id, score)], best first.
+        """
+        terms = list(dict.fromkeys(self.preprocessor.preprocess(query)))
+        checks = [(META_FIELDS.index(k), v) for k, v in filters.items()
+                  if k in META_FIELDS and v is not None]
+        start = time.perf_counter()
+        with self._lock:
+            num_docs = len(self._doc_keys)
+            if not terms or not num_docs:
+                return []
+            avg_len = self._total_len / num_docs or 1.0
+            scores: Dict[int, float] = {}
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                df = len(postings)
+                idf = math.log(1 + (num_docs - df + 0.5) / (df + 0.5))
+                freqs = self._freqs[term]
+                for doc_id, tf in zip(postings, freqs):
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avg_len)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+            if checks:
+                meta = self._meta
+                scores = {d: s for d, s in scores.items()
+                          if all(meta[d][i] == v for i, v in checks)}
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            results = [(self._doc_keys[d], round(s, 4)) for d, s in top]
+        self.metrics.set('last_query_ms', round((time.perf_counter() - start) * 1000, 3))
+        self.metrics.incr('queries')
+        return results
+
+    # ----- database catch-up -----
+
+    def sync(self, db, page_size: int = 1000) -> int:
+        """
+        Pull tickets and public comments written since the last sync (by any
+        worker) into the index. The first call indexes everything.
+        Returns the number of rows applied.
+        """
+        watermark = self._watermark
+        # Re-read a small overlap so rows committed out of order are not missed
+        since = None
+        if watermark:
+            since = (datetime.fromisoformat(watermark.replace('Z', '+00:00'))
+                     - timedelta(seconds=30)).isoformat()
+        newest = watermark
+        applied = 0
+
+        for ticket in self._pages(db, 'tickets', TICKET_COLUMNS, 'updated_at', 'ticket_id', since, page_size):
+            self.add_ticket(ticket)
+            newest = max(newest or '', ticket.get('updated_at') or '')
+            applied += 1
+        for comment in self._pages(db, 'comments', 'comment_id, ticket_id, content, created_at',
+                                   'created_at', 'comment_id', since, page_size, public_only=True):
+            if self.add_comment(comment):
+                applied += 1
+            newest = max(newest or '', comment.get('created_at') or '')
+
+        with self._lock:
+            self._watermark = newest
+            if since:
+                # Forget comment ids that can no longer be re-read
+                self._recent_comments = {c: t for c, t in self._recent_comments.items() if t >= since}
+        self.metrics.incr('synced_rows', applied)
+        return applied
+
+    @staticmethod
+    def _pages(db, table: str, columns: str, time_column: str, id_column: str,
+               since: Optional[str], page_size: int, public_only: bool = False) -> Iterable[Dict]:
+        """
+        Rows with time_column >= since, keyset paginated on (time_column,
+        id_column): a row updated mid-sync moves past the cursor instead of
+        shifting later pages, so none is skipped.
+        """
+        last = None
+        while True:
+            query = db.table(table).select(columns)
+            if since:
+                query = query.gte(time_column, since)
+            if public_only:
+                query = query.eq('is_internal', False)
+            if last:
+                query = after_keyset(query, time_column, id_column, *last)
+            rows = query.order(time_column).order(id_column).limit(page_size).execute().data or []
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last = (rows[-1][time_column], rows[-1][id_column])
+
+    # ----- persistence -----
+
+    def save(self, path: str):
+        """Write the index to disk (delta + varint encoded postings)"""
+        with self._lock:
+            header = json.dumps({
+                'doc_keys': self._doc_keys,
+                'doc_len': self._doc_len.tolist(),
+                'meta': self._meta,
+                'watermark': self._watermark,
+                'recent_comments': self._recent_comments
+            }, separators=(',', ':')).encode()
+            out = bytearray(MAGIC)
+            _write_varint(out, len(header))
+            out += header
+            _write_varint(out, len(self._postings))
+            for term in sorted(self._postings):
+                encoded = term.encode()
+                _write_varint(out, len(encoded))
+                out += encoded
+                postings = self._postings[term]
+                _write_varint(out, len(postings))
+                previous = 0
+                for doc_id in postings:
+                    _write_varint(out, doc_id - previous)
+                    previous = doc_id
+                for tf in self._freqs[term]:
+                    _write_varint(out, tf)
+            self._dirty = False
+        # A unique temporary name: several workers may save the same path at once
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                        prefix=f'{os.path.basename(path)}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(out)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.metrics.set('file_bytes', len(out))
+
+    @classmethod
+    def load(cls, path: str, preprocessor: MLPreprocessor = None) -> 'TicketSearchIndex':
+        """Read an index written by save()"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not data.startswith(MAGIC):
+            raise ValueError(f'{path} is not a ticket search index')
+        index = cls(preprocessor)
+        pos = len(MAGIC)
+        size, pos = _read_varint(data, pos)
+        header = json.loads(data[pos:pos + size])
+        pos += size
+        index._doc_keys = header['doc_keys']
+        index._doc_ids = {key: i for i, key in enumerate(index._doc_keys)}
+        index._doc_len = array('I', header['doc_len'])
+        index._total_len = sum(index._doc_len)
+        index._meta = header['meta']
+        index._watermark = header['watermark']
+        index._recent_comments = header['recent_comments']
+        num_terms, pos = _read_varint(data, pos)
+        for _ in range(num_terms):
+            size, pos = _read_varint(data, pos)
+            term = data[pos:pos + size].decode()
+            pos += size
+            df, pos = _read_varint(data, pos)
+            postings = array('I')
+            doc_id = 0
+            for _ in range(df):
+                delta, pos = _read_varint(data, pos)
+                doc_id += delta
+                postings.append(doc_id)
+            freqs = array('I')
+            for _ in range(df):
+                tf, pos = _read_varint(data, pos)
+                freqs.append(tf)
+            index._postings[term] = postings
+            index._freqs[term] = freqs
+        index.metrics.set('documents', len(index._doc_keys))
+        return index
+
+
+class SearchIndexMaintainer:
+    """Keeps a search index synced with the database and persisted to disk"""
+
+    def __init__(self, index: TicketSearchIndex, db, path: Optional[str] = None,
+                 sync_interval: float = 60.0):
+        self.index = index
+        self.db = db
+        self.path = path
+        # First sync right away: without a saved index, search is empty until then
+        self._flusher = PeriodicFlusher('SearchIndexMaintainer', self.run_once, sync_interval,
+                                        run_immediately=True)
+
+    def start(self):
+        """Start background syncing in this process"""
+        self._flusher.ensure_started()
+
+    def run_once(self):
+        """Catch up from the database, then persist if anything changed"""
+        self.index.sync(self.db)
+        if self.path and self.index._dirty:
+            self.index.save(self.path)
+
+    def shutdown(self):
+        """Stop syncing and save a final snapshot"""
+        self._flusher.stop()
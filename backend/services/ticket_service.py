@@ -1,15 +1,20 @@
 """Ticket Service - handles ticket business logic"""
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from backend.models.ticket import Ticket
+from backend.utils.event_bus import EventBus, ticket_channels
 import uuid
 
 
 class TicketService:
     """Service class for ticket operations"""
     
-    def __init__(self, db):
+    # Ticket ids per bulk UPDATE; keeps the in_() filter within URL length limits
+    BULK_CHUNK_SIZE = 100
+    
+    def __init__(self, db, event_bus: EventBus = None):
         self.db = db
+        self.event_bus = event_bus
         
     def create_ticket(self, customer_id: str, title: str, description: str,
                      priority: str = "medium") -> Dict:
@@ -30,6 +35,8 @@ class TicketService:
             result = self.db.table('tickets').insert(ticket_data).execute()
             # Some Supabase setups don't return inserted row; fall back to ticket_data
             data = result.data[0] if getattr(result, 'data', None) else ticket_data
+            if self.event_bus:
+                self.event_bus.publish('ticket.created', data, ticket_channels(data))
             return {'success': True, 'data': data}
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -42,6 +49,28 @@ class TicketService:
         except Exception as e:
             return None
     
+    def get_ticket_version(self, ticket_id: str) -> Optional[Tuple[str, str]]:
+        """(version, updated_at) of a ticket for conditional GETs, reading only updated_at"""
+        try:
+            result = self.db.table('tickets').select('updated_at').eq('ticket_id', ticket_id).execute()
+        except Exception as e:
+            return None
+        if not result.data:
+            return None
+        updated_at = result.data[0].get('updated_at')
+        return (updated_at, updated_at) if updated_at else None
+    
+    def get_tickets_by_ids(self, ticket_ids: List[str]) -> List[Dict]:
+        """Get several tickets in one query, in the order of ticket_ids"""
+        if not ticket_ids:
+            return []
+        try:
+            result = self.db.table('tickets').select('*').in_('ticket_id', ticket_ids).execute()
+            by_id = {t['ticket_id']: t for t in result.data or []}
+            return [by_id[t] for t in ticket_ids if t in by_id]
+        except Exception as e:
+            return []
+    
     def get_customer_tickets(self, customer_id: str) -> List[Dict]:
         """Get all tickets for a customer"""
         try:
@@ -66,6 +95,9 @@ class TicketService:
                 'updated_at': datetime.utcnow().isoformat()
             }
             result = self.db.table('tickets').update(update_data).eq('ticket_id', ticket_id).execute()
+            data = result.data[0] if result.data else dict(update_data, ticket_id=ticket_id)
+            if self.event_bus:
+                self.event_bus.publish('ticket.status_changed', data, ticket_channels(data))
             return {'success': True, 'data': result.data[0] if result.data else update_data}
         except Exception as e:
             return {'success': False, 'error': str(e)}
@@ -79,10 +111,56 @@ class TicketService:
                 'updated_at': datetime.utcnow().isoformat()
             }
             result = self.db.table('tickets').update(update_data).eq('ticket_id', ticket_id).execute()
+            data = result.data[0] if result.data else dict(update_data, ticket_id=ticket_id)
+            if self.event_bus:
+                self.event_bus.publish('ticket.assigned', data, ticket_channels(data))
             return {'success': True, 'data': result.data[0] if result.data else update_data}
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    def bulk_update_status(self, ticket_ids: List[str], status: str) -> Dict:
+        """Set the status of many tickets with one filtered update per chunk"""
+        return self._bulk_update(ticket_ids, {'status': status}, 'ticket.status_changed')
+    
+    def bulk_assign(self, ticket_ids: List[str], agent_id: str) -> Dict:
+        """Assign many tickets to an agent with one filtered update per chunk"""
+        return self._bulk_update(ticket_ids, {'assigned_agent_id': agent_id, 'status': 'in_progress'},
+                                 'ticket.assigned')
+    
+    def _bulk_update(self, ticket_ids: List[str], changes: Dict, event_type: str) -> Dict:
+        """
+        Apply the same changes to ticket_ids using in_('ticket_id', ...) and
+        report per ticket. Events (and with them the search index, SSE
+        clients and notifications) are published once per updated row,
+        after the writes, from the rows the database returned.
+        """
+        ticket_ids = list(dict.fromkeys(ticket_ids))
+        update_data = dict(changes, updated_at=datetime.utcnow().isoformat())
+        updated: Dict[str, Dict] = {}
+        errors: Dict[str, str] = {}
+        for start in range(0, len(ticket_ids), self.BULK_CHUNK_SIZE):
+            chunk = ticket_ids[start:start + self.BULK_CHUNK_SIZE]
+            try:
+                result = self.db.table('tickets').update(update_data).in_('ticket_id', chunk).execute()
+                rows = result.data or self.get_tickets_by_ids(chunk)
+                updated.update((row['ticket_id'], row) for row in rows)
+            except Exception as e:
+                errors.update((ticket_id, str(e)) for ticket_id in chunk)
+        
+        results = []
+        for ticket_id in ticket_ids:
+            if ticket_id in updated:
+                results.append({'ticket_id': ticket_id, 'success': True})
+            else:
+                results.append({'ticket_id': ticket_id, 'success': False,
+                                'error': errors.get(ticket_id, 'Ticket not found')})
+        if self.event_bus:
+            for row in updated.values():
+                self.event_bus.publish(event_type, row, ticket_channels(row))
+        return {'success': not errors, 'data': {
+            'results': results, 'updated': len(updated), 'failed': len(ticket_ids) - len(updated)
+        }}
+    
     def get_all_tickets(self, limit: int = 100, offset: int = 0) -> List[Dict]:
         """Get all tickets with pagination"""
         try:
@@ -1,18 +1,31 @@
 """User Service - handles user business logic"""
 from typing import List, Dict, Optional
 from datetime import datetime
+from backend.utils.event_bus import EventBus
+from backend.utils.ttl_cache import TTLCache
+
+UNIQUE_VIOLATION = '23505'
 
 
 class UserService:
     """Service class for user operations"""
     
-    def __init__(self, db):
+    # password_hash is only read for login; never return it from the API
+    COLUMNS = 'user_id, email, name, role, is_active, created_at, updated_at'
+    AUTH_COLUMNS = 'user_id, email, name, role, is_active, password_hash'
+    
+    def __init__(self, db, event_bus: EventBus = None, cache_size: int = 10000,
+                 cache_ttl: float = 60.0):
         self.db = db
+        self.event_bus = event_bus
+        # Active users for login, by email; invalidated locally on update and
+        # deactivation (other workers see changes within cache_ttl)
+        self.auth_cache = TTLCache(max_size=cache_size, ttl=cache_ttl)
         
     def get_user(self, user_id: str) -> Optional[Dict]:
         """Get user by ID"""
         try:
-            result = self.db.table('users').select('*').eq('user_id', user_id).execute()
+            result = self.db.table('users').select(self.COLUMNS).eq('user_id', user_id).execute()
             return result.data[0] if result.data else None
         except Exception as e:
             return None
@@ -20,14 +33,60 @@ class UserService:
     def get_user_by_email(self, email: str) -> Optional[Dict]:
         """Get user by email"""
         try:
-            result = self.db.table('users').select('*').eq('email', email).execute()
+            result = self.db.table('users').select(self.COLUMNS).eq('email', email).execute()
+            return result.data[0] if result.data else None
+        except Exception as e:
+            return None
+    
+    def get_auth_user(self, email: str) -> Optional[Dict]:
+        """User record for login, served from the auth cache while active"""
+        user = self.auth_cache.get(email)
+        if user is not None:
+            return user
+        try:
+            result = self.db.table('users').select(self.AUTH_COLUMNS).eq('email', email).execute()
+        except Exception as e:
+            return None
+        user = result.data[0] if result.data else None
+        if user and user.get('is_active'):
+            self._cache_user(user)
+        return user
+    
+    def get_auth_user_by_id(self, user_id: str) -> Optional[Dict]:
+        """User record with its password hash, uncached (password setup)"""
+        try:
+            result = self.db.table('users').select(self.AUTH_COLUMNS).eq('user_id', user_id).execute()
             return result.data[0] if result.data else None
         except Exception as e:
             return None
     
+    def get_users_without_password(self) -> List[Dict]:
+        """Active users with no password hash yet (created before hashes were stored)"""
+        try:
+            result = (self.db.table('users').select(self.COLUMNS)
+                      .is_('password_hash', 'null').eq('is_active', True).execute())
+            return result.data if result.data else []
+        except Exception as e:
+            return []
+    
+    def _cache_user(self, user: Dict):
+        self.auth_cache.set(user['email'], {k: user.get(k) for k in self.AUTH_COLUMNS.split(', ')})
+    
+    def invalidate_user(self, user_id: str, *emails: Optional[str]):
+        """Drop a user from the auth cache by email (looked up when not given)"""
+        if not emails:
+            user = self.get_user(user_id)
+            emails = (user.get('email'),) if user else ()
+        for email in emails:
+            if email:
+                self.auth_cache.pop(email)
+    
     def create_user(self, user_id: str, email: str, name: str, 
-                   role: str = "customer") -> Dict:
-        """Create a new user"""
+                   role: str = "customer", password_hash: str = None) -> Dict:
+        """
+        Create a new user with a single insert. A taken email is reported by
+        the users.email unique constraint: error_code 'CONFLICT'.
+        """
         try:
             user_data = {
                 'user_id': user_id,
@@ -35,18 +94,27 @@ class UserService:
                 'name': name,
                 'role': role,
                 'is_active': True,
+                'password_hash': password_hash,
                 'created_at': datetime.utcnow().isoformat(),
                 'updated_at': datetime.utcnow().isoformat()
             }
             result = self.db.table('users').insert(user_data).execute()
-            return {'success': True, 'data': result.data[0] if result.data else user_data}
+            data = dict(result.data[0] if result.data else user_data)
+            self._cache_user(data)
+            data.pop('password_hash', None)
+            if self.event_bus:
+                # No channels: user changes only feed in-process listeners (auditing)
+                self.event_bus.publish('user.created', data)
+            return {'success': True, 'data': data}
         except Exception as e:
+            if getattr(e, 'code', None) == UNIQUE_VIOLATION:
+                return {'success': False, 'error': 'Email already registered', 'error_code': 'CONFLICT'}
             return {'success': False, 'error': str(e)}
     
     def get_agents(self) -> List[Dict]:
         """Get all support agents"""
         try:
-            result = self.db.table('users').select('*').eq('role', 'agent').execute()
+            result = self.db.table('users').select(self.COLUMNS).eq('role', 'agent').execute()
             return result.data if result.data else []
         except Exception as e:
             return []
@@ -54,20 +122,42 @@ class UserService:
     def get_customers(self) -> List[Dict]:
         """Get all customers"""
         try:
-            result = self.db.table('users').select('*').eq('role', 'customer').execute()
+            result = self.db.table('users').select(self.COLUMNS).eq('role', 'customer').execute()
             return result.data if result.data else []
         except Exception as e:
             return []
     
-    def update_user(self, user_id: str, updates: Dict) -> Dict:
+    def update_user(self, user_id: str, updates: Dict, event_type: str = 'user.updated') -> Dict:
         """Update user information"""
         try:
+            # An email change must also drop the entry under the old email
+            previous = self.get_user(user_id) if 'email' in updates else None
             updates['updated_at'] = datetime.utcnow().isoformat()
             result = self.db.table('users').update(updates).eq('user_id', user_id).execute()
-            return {'success': True, 'data': result.data[0] if result.data else updates}
+            if result.data:
+                self.invalidate_user(user_id, result.data[0].get('email'), previous and previous.get('email'))
+            else:
+                self.invalidate_user(user_id)
+            if self.event_bus:
+                self.event_bus.publish(event_type, dict(updates, user_id=user_id))
+            data = dict(result.data[0]) if result.data else updates
+            data.pop('password_hash', None)
+            return {'success': True, 'data': data}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+    
+    def set_password_hash(self, user_id: str, password_hash: str) -> Dict:
+        """Store a new password hash (not published, so it stays out of the audit log)"""
+        try:
+            self.db.table('users').update({
+                'password_hash': password_hash,
+                'updated_at': datetime.utcnow().isoformat()
+            }, returning='minimal').eq('user_id', user_id).execute()
+            self.invalidate_user(user_id)
+            return {'success': True}
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
     def deactivate_user(self, user_id: str) -> Dict:
         """Deactivate a user"""
-        return self.update_user(user_id, {'is_active': False})
+        return self.update_user(user_id, {'is_active': False}, 'user.deactivated')
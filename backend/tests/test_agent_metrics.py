@@ -0,0 +1,107 @@
+import json
+import random
+import statistics
+
+import httpx
+from postgrest import SyncPostgrestClient
+
+from backend.services.agent_metrics import AgentMetricsProcessor, RunningStats, backfill_agent_performance
+from backend.utils.event_bus import EventBus
+
+
+def test_running_stats_match_batch_statistics_and_merge_exactly():
+    rng = random.Random(7)
+    samples = [rng.uniform(0, 86400) for _ in range(500)]
+    whole, left, right = RunningStats(), RunningStats(), RunningStats()
+    for i, x in enumerate(samples):
+        whole.add(x)
+        (left if i % 3 else right).add(x)
+    left.merge(right)
+    for stats in (whole, left):
+        assert stats.n == 500
+        assert abs(stats.mean - statistics.fmean(samples)) < 1e-6
+        assert abs(stats.variance - statistics.variance(samples)) / statistics.variance(samples) < 1e-9
+
+
+class MetricsDB:
+    def __init__(self):
+        self.calls = []
+        self.failing = set()
+
+    def rpc(self, name, params):
+        db = self
+
+        class Call:
+            def execute(self):
+                if name in db.failing:
+                    raise ConnectionError('database unavailable')
+                db.calls.append((name, params))
+                data = []
+                if name == 'record_ticket_milestones':
+                    data = [{'agent_id': 'a1', 'kind': 'response', 'seconds': 60.0 * (i + 1)}
+                            for i in range(len(params['responses']))]
+                    data += [{'agent_id': 'a1', 'kind': 'resolution', 'seconds': 3600.0}
+                             for _ in params['resolutions']]
+                return type('R', (), {'data': data})()
+
+        return Call()
+
+
+def test_events_are_flushed_as_one_milestone_call_and_one_merge():
+    db = MetricsDB()
+    processor = AgentMetricsProcessor(db, flush_interval=60)
+    bus = EventBus()
+    processor.listen(bus)
+    bus.publish('ticket.assigned', {'ticket_id': 't1', 'assigned_agent_id': 'a1'})
+    bus.publish('comment.created', {'ticket_id': 't1', 'author_id': 'a1', 'created_at': '2024-01-01T10:01:00'})
+    bus.publish('comment.created', {'ticket_id': 't2', 'author_id': 'a1', 'created_at': '2024-01-01T10:02:00'})
+    bus.publish('ticket.status_changed', {'ticket_id': 't1', 'status': 'resolved', 'updated_at': '2024-01-01T11:00:00'})
+    bus.publish('ticket.status_changed', {'ticket_id': 't2', 'status': 'pending', 'updated_at': '2024-01-01T11:00:00'})
+
+    db.failing = {'record_ticket_milestones'}
+    assert processor.flush() == 0
+    db.failing = set()
+    assert processor.flush() == 1
+    assert [name for name, _ in db.calls] == ['record_ticket_milestones', 'merge_agent_performance']
+    (row,) = db.calls[1][1]['stats']
+    assert row['assigned'] == 1 and row['response_n'] == 2 and row['response_mean'] == 90.0
+    assert row['resolution_n'] == 1 and row['resolution_mean'] == 3600.0
+    assert processor.flush() == 0
+
+    # A failed merge keeps the statistics; they are combined with the next batch
+    bus.publish('comment.created', {'ticket_id': 't3', 'author_id': 'a1', 'created_at': '2024-01-02T10:00:00'})
+    db.failing = {'merge_agent_performance'}
+    assert processor.flush() == 0
+    db.failing = set()
+    bus.publish('ticket.assigned', {'ticket_id': 't4', 'assigned_agent_id': 'a1'})
+    assert processor.flush() == 1
+    (row,) = db.calls[-1][1]['stats']
+    assert row['response_n'] == 1 and row['response_mean'] == 60.0 and row['assigned'] == 1
+
+
+def test_backfill_pages_tickets_with_the_real_postgrest_builder():
+    tickets = [{'ticket_id': f't{i}', 'assigned_agent_id': 'a1', 'created_at': f'2024-01-0{i + 1}T00:00:00',
+                'first_response_at': f'2024-01-0{i + 1}T00:01:00', 'resolved_at': None} for i in range(3)]
+    requests, upserts = [], []
+
+    def handler(request):
+        requests.append(request)
+        if request.method == 'POST' and request.url.path.endswith('/agent_performance'):
+            upserts.extend(json.loads(request.content))
+            return httpx.Response(201, json=[])
+        if request.url.path.startswith('/rpc/'):
+            return httpx.Response(200, json=[])
+        after = request.url.params.get('or')
+        rows = [t for t in tickets if not after or f'"{t["created_at"]}"' > after.split('.gt.')[1].split(',')[0]]
+        return httpx.Response(200, json=rows[:int(request.url.params['limit'])])
+
+    client = SyncPostgrestClient('http://db.test')
+    client.session = httpx.Client(base_url='http://db.test', transport=httpx.MockTransport(handler))
+    db = type('DB', (), {'table': lambda self, name: client.from_(name),
+                         'rpc': lambda self, name, params: client.rpc(name, params)})()
+
+    assert backfill_agent_performance(db, chunk_size=2) == 1
+    pages = [r for r in requests if r.url.path.endswith('/tickets')]
+    assert len(pages) == 2 and 'or' not in pages[0].url.params
+    assert pages[1].url.params['or'].startswith('(created_at.gt."2024-01-02T00:00:00",')
+    assert upserts[0]['total_assigned_tickets'] == 3 and upserts[0]['response_count'] == 3
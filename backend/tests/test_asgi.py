@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import time
+
+from flask import Flask, jsonify
+
+from backend.asgi import SupportPilotASGI
+
+
+def test_flask_requests_run_concurrently_on_the_handler_pool():
+    app = Flask(__name__)
+    app.config['ASGI_THREADS'] = 8
+    app.extensions['supportpilot'] = {'closeables': []}
+
+    @app.route('/slow')
+    def slow():
+        time.sleep(0.5)
+        return jsonify(thread=threading.current_thread().name)
+
+    asgi = SupportPilotASGI(app)
+
+    async def request():
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/slow', 'query_string': b'', 'headers': [],
+                 'http_version': '1.1', 'scheme': 'http', 'server': ('test', 80), 'root_path': ''}
+        await asgi(scope, receive, send)
+        return b''.join(m.get('body', b'') for m in sent if m['type'] == 'http.response.body')
+
+    async def main():
+        lifespan = asyncio.Queue()
+        await lifespan.put({'type': 'lifespan.startup'})
+        started = asyncio.Event()
+
+        async def lifespan_send(message):
+            started.set()
+
+        task = asyncio.ensure_future(asgi({'type': 'lifespan'}, lifespan.get, lifespan_send))
+        await started.wait()
+        start = time.perf_counter()
+        bodies = await asyncio.gather(*(request() for _ in range(4)))
+        elapsed = time.perf_counter() - start
+        await lifespan.put({'type': 'lifespan.shutdown'})
+        await task
+        return bodies, elapsed
+
+    bodies, elapsed = asyncio.run(main())
+    assert elapsed < 1.5
+    assert len(set(bodies)) == 4 and all(b'asgi-handler' in body for body in bodies)
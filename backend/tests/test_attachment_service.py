@@ -0,0 +1,74 @@
+import hashlib
+import io
+import os
+
+from backend.services.attachment_service import AttachmentService
+
+
+class ForeignKeyViolation(Exception):
+    code = '23503'
+
+
+class AttachmentsDB:
+    def __init__(self, ticket_ids):
+        self.ticket_ids = set(ticket_ids)
+        self.rows = []
+        self.queries = 0
+
+    def table(self, name):
+        db = self
+
+        class Query:
+            def __init__(self):
+                self.row, self.filters = None, {}
+
+            def insert(self, row):
+                self.row = row
+                return self
+
+            def select(self, columns):
+                return self
+
+            def eq(self, column, value):
+                self.filters[column] = value
+                return self
+
+            def order(self, column):
+                return self
+
+            def execute(self):
+                if self.row is not None:
+                    if self.row['ticket_id'] not in db.ticket_ids:
+                        raise ForeignKeyViolation('insert violates foreign key constraint')
+                    db.rows.append(self.row)
+                    return type('R', (), {'data': [self.row]})()
+                db.queries += 1
+                data = [row for row in db.rows if all(row[k] == v for k, v in self.filters.items())]
+                return type('R', (), {'data': data})()
+
+        return Query()
+
+
+def test_uploads_are_streamed_content_addressed_and_deduplicated(tmp_path):
+    db = AttachmentsDB(['t1'])
+    service = AttachmentService(db, str(tmp_path))
+    content = os.urandom(200 * 1024)
+    digest = hashlib.sha256(content).hexdigest()
+
+    first = service.create_attachment('t1', 'u1', 'log.txt', 'text/plain', io.BytesIO(content), 1 << 20)
+    second = service.create_attachment('t1', 'u2', 'copy.txt', None, io.BytesIO(content), 1 << 20)
+    assert first['data']['content_sha256'] == second['data']['content_sha256'] == digest
+    assert first['data']['file_size'] == len(content)
+    with open(service.blob_path(digest), 'rb') as f:
+        assert f.read() == content
+    blobs = [name for _, _, names in os.walk(tmp_path) for name in names]
+    assert blobs == [digest]  # one copy, no temporary files left
+
+    assert [a['file_name'] for a in service.get_ticket_attachments('t1')] == ['log.txt', 'copy.txt']
+    assert db.queries == 1
+
+    too_large = service.create_attachment('t1', 'u1', 'big.bin', None, io.BytesIO(content), 1000)
+    assert too_large['error_code'] == 'TOO_LARGE'
+    missing = service.create_attachment('t9', 'u1', 'x.txt', None, io.BytesIO(b'x'), 1000)
+    assert missing['error_code'] == 'NOT_FOUND'
+    assert os.listdir(tmp_path / 'tmp') == []
@@ -0,0 +1,102 @@
+import json
+import pytest
+
+flask = pytest.importorskip('flask')
+from backend.services.audit_service import AuditLogBuffer  # noqa: E402
+from backend.utils.event_bus import EventBus  # noqa: E402
+
+
+class AuditDB:
+    """audit_logs table that can be made to fail"""
+
+    def __init__(self):
+        self.rows = {}
+        self.inserts = 0
+        self.down = False
+
+    def table(self, name):
+        db = self
+
+        class Query:
+            def insert(self, rows, **kwargs):
+                self.rows = rows if isinstance(rows, list) else [rows]
+                return self
+
+            upsert = insert
+
+            def execute(self):
+                if db.down:
+                    raise ConnectionError('database timeout')
+                db.inserts += 1
+                db.rows.update((r['log_id'], r) for r in self.rows)
+                return self
+
+        return Query()
+
+
+def make_buffer(db, tmp_path, **kwargs):
+    kwargs.setdefault('max_pending', 100)
+    return AuditLogBuffer(db, flush_interval=60, batch_size=10, spill_dir=str(tmp_path),
+                          retry_interval=0, **kwargs)
+
+
+def test_mutations_are_flushed_with_multi_row_inserts_and_the_request_actor():
+    db = AuditDB()
+    audit = make_buffer(db, '')
+    bus = EventBus()
+    audit.listen(bus)
+    app = flask.Flask(__name__)
+    with app.test_request_context('/api/tickets/t1/status', environ_base={'REMOTE_ADDR': '10.0.0.7'}):
+        flask.request.user = {'user_id': 'agent-1'}
+        for i in range(9):
+            bus.publish('ticket.status_changed', {'ticket_id': f't{i}', 'status': 'closed', 'title': 'x'})
+        assert db.inserts == 0
+        for i in range(9, 25):
+            bus.publish('ticket.status_changed', {'ticket_id': f't{i}', 'status': 'closed', 'title': 'x'})
+    # A full batch wakes the flush thread, which may write part of it first
+    audit.flush()
+    assert len(db.rows) == 25 and db.inserts <= 4
+    row = next(r for r in db.rows.values() if r['entity_id'] == 't0')
+    assert row['user_id'] == 'agent-1' and row['ip_address'] == '10.0.0.7'
+    assert row['action'] == 'update_status' and row['changes'] == {'status': 'closed'}
+
+
+def test_failed_flushes_spill_to_disk_and_are_replayed(tmp_path):
+    db = AuditDB()
+    audit = make_buffer(db, tmp_path)
+    db.down = True
+    for i in range(15):
+        audit.record('delete', 'comment', f'c{i}')
+    audit.shutdown()  # joins the flush thread; its final flush spills
+    assert len(list(tmp_path.iterdir())) == 1 and not db.rows
+    db.down = False
+    audit.record('delete', 'comment', 'c15')
+    assert audit.flush() == 16
+    assert len(db.rows) == 16 and not list(tmp_path.iterdir())
+
+
+def test_replay_quarantines_corrupt_lines_and_claims_orphaned_replays(tmp_path):
+    db = AuditDB()
+    audit = make_buffer(db, tmp_path)
+    rows = [{'log_id': f'l{i}', 'entity_id': f'c{i}'} for i in range(4)]
+    # A process died mid-replay (pid 2**22 + 1 is above pid_max, so never running)
+    (tmp_path / f'audit-spill-1.jsonl.replay-{2 ** 22 + 1}').write_text(json.dumps(rows[0]) + '\n')
+    # Another crashed mid-write, truncating its last line
+    (tmp_path / 'audit-spill-2.jsonl').write_text(
+        json.dumps(rows[1]) + '\n' + json.dumps(rows[2]) + '\n' + json.dumps(rows[3])[:9])
+    corrupt = audit.metrics.get('corrupt_spill_lines')
+    assert audit.flush() == 3
+    assert set(db.rows) == {'l0', 'l1', 'l2'}
+    assert audit.metrics.get('corrupt_spill_lines') - corrupt == 1
+    (quarantine,) = tmp_path.iterdir()
+    assert quarantine.name.startswith('audit-quarantine-')
+    assert quarantine.read_text() == json.dumps(rows[3])[:9] + '\n'
+
+
+def test_full_ring_buffer_drops_the_oldest_entries():
+    audit = make_buffer(AuditDB(), '', max_pending=5)
+    dropped = audit.metrics.get('dropped')
+    for i in range(8):
+        audit.record('create', 'ticket', f't{i}')
+    assert audit.metrics.get('dropped') - dropped == 3
+    assert [r['entity_id'] for r in audit._buffer] == ['t3', 't4', 't5', 't6', 't7']
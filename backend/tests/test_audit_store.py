@@ -0,0 +1,98 @@
+import gzip
+import json
+import httpx
+from datetime import datetime, timezone
+
+from backend.services.audit_store import AuditLogStore, month_ranges, partition_month
+
+UTC = timezone.utc
+
+
+class AuditQuery:
+    def __init__(self, db):
+        self.db = db
+        self.rows = sorted(db.rows, key=lambda r: (r['created_at'], r['log_id']))
+        self.params = httpx.QueryParams()
+
+    def select(self, columns):
+        return self
+
+    def gte(self, column, value):
+        self.db.ranges.append(('gte', value))
+        self.rows = [r for r in self.rows if r[column] >= value]
+        return self
+
+    def lt(self, column, value):
+        self.db.ranges.append(('lt', value))
+        self.rows = [r for r in self.rows if r[column] < value]
+        return self
+
+    def eq(self, column, value):
+        self.rows = [r for r in self.rows if r[column] == value]
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, n):
+        self.n = n
+        return self
+
+    def execute(self):
+        if 'or' in self.params:
+            # (created_at.gt."<ts>",and(...,log_id.gt."<id>"))
+            parts = self.params['or'].split('"')
+            after = (parts[1], parts[5])
+            self.rows = [r for r in self.rows if (r['created_at'], r['log_id']) > after]
+        return type('R', (), {'data': self.rows[:self.n]})()
+
+
+class AuditDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.ranges = []
+        self.rpcs = []
+
+    def table(self, name):
+        return AuditQuery(self)
+
+    def rpc(self, name, params):
+        self.rpcs.append((name, params))
+        data = [{'drop_audit_log_partitions': 'audit_logs_y2023m12'}]
+        return type('R', (), {'execute': lambda self: type('D', (), {'data': data})()})()
+
+
+def make_rows():
+    return [{'log_id': f'l{i:02d}', 'user_id': 'u1', 'action': 'create', 'entity_type': 'ticket',
+             'entity_id': f't{i % 3}', 'changes': {}, 'ip_address': None, 'user_agent': None,
+             'created_at': f'2023-12-{10 + i:02d}T00:00:00+00:00'} for i in range(12)]
+
+
+def test_month_ranges_follow_partition_boundaries():
+    ranges = month_ranges(datetime(2023, 12, 15, tzinfo=UTC), datetime(2024, 2, 3, tzinfo=UTC))
+    assert [(s.isoformat()[:10], e.isoformat()[:10]) for s, e in ranges] == [
+        ('2023-12-15', '2024-01-01'), ('2024-01-01', '2024-02-01'), ('2024-02-01', '2024-02-03')
+    ]
+    assert partition_month('audit_logs_y2024m02') == datetime(2024, 2, 1, tzinfo=UTC)
+    assert partition_month('audit_logs_default') is None
+
+
+def test_iter_logs_streams_pages_within_the_time_range():
+    db = AuditDB(make_rows())
+    store = AuditLogStore(db)
+    start, end = datetime(2023, 12, 12, tzinfo=UTC), datetime(2023, 12, 20, tzinfo=UTC)
+    logs = list(store.iter_logs(start, end, page_size=3))
+    assert [log.log_id for log in logs] == [f'l{i:02d}' for i in range(2, 10)]
+    assert ('gte', start.isoformat()) in db.ranges and ('lt', end.isoformat()) in db.ranges
+    assert [log.entity_id for log in store.iter_logs(start, end, entity_id='t0')] == ['t0', 't0', 't0']
+
+
+def test_retention_exports_expired_partitions_before_dropping(tmp_path):
+    db = AuditDB(make_rows())
+    dropped = AuditLogStore(db).drop_expired_partitions(12, str(tmp_path))
+    assert dropped == ['audit_logs_y2023m12']
+    assert [p for _, p in db.rpcs] == [{'retain_months': 12, 'dry_run': True},
+                                       {'retain_months': 12, 'partition_names': ['audit_logs_y2023m12']}]
+    with gzip.open(tmp_path / 'audit_logs_y2023m12.jsonl.gz', 'rt') as f:
+        exported = [json.loads(line) for line in f]
+    assert len(exported) == 12 and exported[0]['log_id'] == 'l00'
@@ -0,0 +1,80 @@
+import httpx
+from backend.services.comment_service import CommentService
+
+
+class FakeQuery:
+    """Just enough of the postgrest query builder for CommentService"""
+
+    def __init__(self, rows, calls):
+        self.rows = rows
+        self.calls = calls
+        self.params = httpx.QueryParams()
+
+    def select(self, columns, **kwargs):
+        self.calls.append(('select', columns))
+        return self
+
+    def eq(self, column, value):
+        self.rows = [r for r in self.rows if r[column] == value]
+        return self
+
+    def in_(self, column, values):
+        self.rows = [r for r in self.rows if r[column] in values]
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def limit(self, n):
+        self.rows = self.rows[:n]
+        return self
+
+    def execute(self):
+        if 'or' in self.params:
+            self.calls.append(('or', self.params['or']))
+        return type('Result', (), {'data': self.rows, 'count': len(self.rows)})()
+
+
+class FakeDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def table(self, name):
+        return FakeQuery(list(self.rows), self.calls)
+
+    def rpc(self, name, params):
+        raise RuntimeError('function comment_counts does not exist')
+
+
+ROWS = [
+    {'comment_id': f'c{i}', 'ticket_id': 't1' if i < 3 else 't2', 'is_internal': i == 1,
+     'created_at': f'2024-01-01T10:0{i}:00', 'updated_at': f'2024-01-01T10:0{i}:00'}
+    for i in range(5)
+]
+
+
+def test_comment_pages_are_keyset_paginated():
+    db = FakeDB(ROWS)
+    service = CommentService(db)
+    page = service.get_ticket_comments('t1', limit=2)
+    assert [c['comment_id'] for c in page] == ['c0', 'c1']
+    cursor = service.next_cursor(page, 2)
+    assert cursor is not None
+    service.get_ticket_comments('t1', limit=2, cursor=cursor)
+    assert any(call[0] == 'or' and 'c1' in call[1] for call in db.calls)
+    assert ('select', '*') not in db.calls
+    assert service.next_cursor(page[:1], 2) is None
+
+
+def test_customers_never_get_internal_comments():
+    service = CommentService(FakeDB(ROWS))
+    assert [c['comment_id'] for c in service.get_ticket_comments('t1', include_internal=False)] == ['c0', 'c2']
+
+
+def test_comment_counts_fall_back_to_a_single_select():
+    db = FakeDB(ROWS)
+    service = CommentService(db)
+    assert service.comment_counts(['t1', 't2', 't3']) == {'t1': 3, 't2': 2, 't3': 0}
+    assert service.comment_counts(['t1'], include_internal=False) == {'t1': 2}
+    assert service.comment_counts([]) == {}
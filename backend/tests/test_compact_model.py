@@ -0,0 +1,30 @@
+import os
+import pytest
+from backend.ml.predictor import CompactNBModel, compact_model_path, murmurhash3_32
+
+SAMPLE = os.path.join(os.path.dirname(__file__), '..', 'ml', 'sample_dataset.csv')
+TEXTS = ['My app keeps crashing and I lose data', 'I love the new update', 'payment failed at checkout', '']
+
+
+def test_murmurhash_matches_sklearn_reference_values():
+    assert murmurhash3_32(b'foo') == -156908512
+    assert murmurhash3_32(b'foo', 42) == -1322301282
+    assert murmurhash3_32(b'hello world') == 1586663183
+
+
+@pytest.mark.parametrize('mode', ['full', 'streaming'])
+def test_compact_export_matches_sklearn_pipeline(tmp_path, mode):
+    pytest.importorskip('sklearn')
+    import joblib
+    import numpy as np
+    from backend.ml import train_models
+    if mode == 'full':
+        pytest.importorskip('pandas')
+        train_models.train_and_save_models(SAMPLE, str(tmp_path))
+    else:
+        train_models.train_streaming(train_models.iter_csv_chunks(SAMPLE), str(tmp_path), n_features=2 ** 12)
+    for name in ('sentiment_model.pkl', 'priority_model.pkl'):
+        pipeline = joblib.load(str(tmp_path / name))
+        compact = CompactNBModel(compact_model_path(str(tmp_path / name)))
+        assert list(compact.predict(TEXTS)) == list(pipeline.predict(TEXTS))
+        assert np.allclose(compact.predict_proba(TEXTS), pipeline.predict_proba(TEXTS))
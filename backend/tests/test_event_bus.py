@@ -0,0 +1,60 @@
+from backend.utils.event_bus import EventBus, ticket_channels
+
+
+def test_subscriber_receives_only_its_channels():
+    bus = EventBus()
+    sub = bus.subscribe(['user:agent_1'])
+    bus.publish('ticket.assigned', {'ticket_id': 't1'}, ['user:agent_1'])
+    bus.publish('ticket.assigned', {'ticket_id': 't2'}, ['user:agent_2'])
+    event = sub.get(timeout=0)
+    assert event.event_type == 'ticket.assigned'
+    assert event.data['ticket_id'] == 't1'
+    assert sub.get(timeout=0) is None
+
+
+def test_resume_from_last_event_id():
+    bus = EventBus()
+    first = bus.publish('comment.created', {'n': 1}, ['ticket:t1'])
+    bus.publish('comment.created', {'n': 2}, ['ticket:t1'])
+    bus.publish('comment.created', {'n': 3}, ['ticket:t1'])
+    sub = bus.subscribe(['ticket:t1'], last_event_id=first.event_id)
+    assert [sub.get(timeout=0).data['n'] for _ in range(2)] == [2, 3]
+    assert not sub.resync_required
+
+
+def test_unknown_last_event_id_requires_resync():
+    bus = EventBus()
+    sub = bus.subscribe(['user:u1'], last_event_id='otherprocess-42')
+    assert sub.resync_required
+
+
+def test_slow_subscriber_is_closed():
+    bus = EventBus(max_queue_size=2)
+    sub = bus.subscribe(['staff'])
+    for i in range(3):
+        bus.publish('ticket.created', {'n': i}, ['staff'])
+    assert sub.closed
+    assert bus.subscriber_count() == 0
+
+
+def test_listeners_and_ticket_channels():
+    bus = EventBus()
+    seen = []
+    bus.add_listener(lambda e: seen.append(e.event_type), ['ticket.created'])
+    ticket = {'ticket_id': 't1', 'customer_id': 'c1', 'assigned_agent_id': None}
+    bus.publish('ticket.created', ticket, ticket_channels(ticket))
+    bus.publish('comment.created', {}, ['ticket:t1'])
+    assert seen == ['ticket.created']
+    assert ticket_channels(ticket) == ['ticket:t1', 'user:c1', 'staff']
+
+
+def test_evicted_channel_history_requires_resync():
+    bus = EventBus(max_channels=2)
+    first = bus.publish('comment.created', {'n': 1}, ['ticket:t1'])
+    bus.publish('comment.created', {'n': 2}, ['ticket:t1'])
+    bus.publish('comment.created', {}, ['ticket:t2'])
+    bus.publish('comment.created', {}, ['ticket:t3'])  # evicts ticket:t1
+    assert bus.subscribe(['ticket:t1'], last_event_id=first.event_id).resync_required
+    latest = bus.publish('comment.created', {}, ['ticket:t3'])
+    assert not bus.subscribe(['ticket:t1'], last_event_id=latest.event_id).resync_required
+    assert not bus.subscribe(['ticket:t9'], last_event_id=first.event_id).resync_required
@@ -0,0 +1,36 @@
+import threading
+import time
+
+import pytest
+
+from backend.utils.executors import MLExecutor, MLExecutorTimeout
+
+
+def test_errors_and_timeouts_are_not_rerun_inline():
+    calls = []
+
+    def failing():
+        calls.append(threading.current_thread().name)
+        raise ValueError('bad input')
+
+    def slow():
+        calls.append(threading.current_thread().name)
+        time.sleep(0.3)
+
+    executor = MLExecutor('thread', max_workers=1, timeout=0.05)
+    try:
+        with pytest.raises(ValueError):
+            executor.run(failing)
+        with pytest.raises(MLExecutorTimeout):
+            executor.run(slow)
+        assert len(calls) == 2 and all(name.startswith('ml') for name in calls)
+    finally:
+        executor.shutdown()
+
+
+def test_shut_down_pool_falls_back_inline():
+    executor = MLExecutor('thread', max_workers=1)
+    executor._get_executor().shutdown()
+    assert executor.run(threading.current_thread) is threading.current_thread()
+    assert executor.run(threading.current_thread) is not threading.current_thread()  # new pool
+    executor.shutdown()
@@ -0,0 +1,49 @@
+import pytest
+
+flask = pytest.importorskip('flask')
+from backend.utils.http_cache import conditional, weak_etag  # noqa: E402
+
+
+def build_app(state):
+    app = flask.Flask(__name__)
+
+    @app.route('/tickets/<ticket_id>')
+    @conditional(lambda ticket_id: (state['updated_at'], state['updated_at']))
+    def get_ticket(ticket_id):
+        state['fetches'] += 1
+        return {'ticket_id': ticket_id, 'updated_at': state['updated_at']}, 200
+
+    @app.route('/tickets')
+    @weak_etag
+    def list_tickets():
+        return {'tickets': state['tickets']}, 200
+    return app
+
+
+def test_conditional_get_skips_the_view_until_the_version_changes():
+    state = {'updated_at': '2024-01-01T10:00:00+00:00', 'fetches': 0}
+    client = build_app(state).test_client()
+    first = client.get('/tickets/t1')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and first.headers['Cache-Control'] == 'private, no-cache'
+    assert first.headers['Last-Modified'] == 'Mon, 01 Jan 2024 10:00:00 GMT'
+
+    assert client.get('/tickets/t1', headers={'If-None-Match': etag}).status_code == 304
+    assert client.get('/tickets/t1', headers={'If-None-Match': 'W/' + etag}).status_code == 304
+    assert client.get('/tickets/t1', headers={'If-Modified-Since': first.headers['Last-Modified']}).status_code == 304
+    assert state['fetches'] == 1
+
+    state['updated_at'] = '2024-01-01T10:05:00+00:00'
+    changed = client.get('/tickets/t1', headers={'If-None-Match': etag})
+    assert changed.status_code == 200 and changed.headers['ETag'] != etag
+    assert client.get('/tickets/t2', headers={'If-None-Match': etag}).status_code == 200
+
+
+def test_list_endpoints_get_weak_etags():
+    state = {'tickets': ['t1', 't2']}
+    client = build_app(state).test_client()
+    etag = client.get('/tickets').headers['ETag']
+    assert etag.startswith('W/')
+    assert client.get('/tickets', headers={'If-None-Match': etag}).status_code == 304
+    state['tickets'].append('t3')
+    assert client.get('/tickets', headers={'If-None-Match': etag}).status_code == 200
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+HEAVY_MODULES = ('sklearn', 'scipy', 'pandas', 'joblib', 'supabase')
+
+
+def import_profile(module):
+    """Import module in a fresh interpreter with -X importtime.
+    Returns ({module: cumulative_us}, set of loaded top-level packages).
+    """
+    code = f"import sys, {module}; print(','.join(sorted({{m.split('.')[0] for m in sys.modules}})))"
+    env = dict(os.environ, SUPABASE_URL='', SUPABASE_KEY='')
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          cwd=ROOT_DIR, env=env, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cum, name = line[len('import time:'):].split('|')
+        cumulative[name.strip()] = int(cum)
+    loaded = set(proc.stdout.strip().splitlines()[-1].split(','))
+    return cumulative, loaded
+
+
+def test_predictor_import_is_lazy():
+    cumulative, loaded = import_profile('backend.ml.predictor')
+    assert not loaded & set(HEAVY_MODULES)
+    assert cumulative['backend.ml.predictor'] < 200_000  # 0.2 s
+
+
+def test_train_models_import_is_lazy():
+    _, loaded = import_profile('backend.ml.train_models')
+    assert not loaded & set(HEAVY_MODULES)
+
+
+def test_app_import_budget():
+    pytest.importorskip('flask')
+    cumulative, loaded = import_profile('backend.app')
+    assert not loaded & set(HEAVY_MODULES)
+    assert cumulative['backend.app'] < 800_000  # 0.8 s
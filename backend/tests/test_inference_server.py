@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+import time
+from backend.ml.inference_server import InferenceClient
+from backend.ml.predictor import score_tickets
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TEXTS = ['The app crashes on login, this is urgent', 'Thanks, the fix works great']
+
+
+def test_client_falls_back_in_process_when_server_is_down(tmp_path):
+    client = InferenceClient(str(tmp_path / 'missing.sock'), retry_interval=60)
+    errors = client.metrics.get('server_errors')
+    assert client.score_batch(TEXTS) == score_tickets(TEXTS)
+    client.score_batch(TEXTS)
+    assert client.metrics.get('server_errors') == errors + 1  # not retried until retry_interval passes
+
+
+def test_server_scores_batches_like_in_process(tmp_path):
+    sock = str(tmp_path / 'ml.sock')
+    server = subprocess.Popen([sys.executable, 'backend/ml/inference_server.py', '--socket', sock,
+                               '--workers', '2'], cwd=ROOT, stdout=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 30
+        while not os.path.exists(sock) and time.monotonic() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.2)
+        client = InferenceClient(sock, timeout=10)
+        fallbacks = client.metrics.get('fallback_requests')
+        assert client.score_batch(TEXTS) == score_tickets(TEXTS)
+        assert client.score(TEXTS[0]) == score_tickets(TEXTS[:1])[0]
+        assert client.metrics.get('fallback_requests') == fallbacks
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    assert not os.path.exists(sock)
@@ -0,0 +1,45 @@
+import gzip
+import json
+import uuid
+from datetime import datetime
+import pytest
+
+flask = pytest.importorskip('flask')
+from backend.utils.compression import choose_encoding, init_compression  # noqa: E402
+from backend.utils.json_provider import make_json_provider  # noqa: E402
+
+TICKET_ID = uuid.UUID(int=7)
+
+
+def build_app(provider):
+    app = flask.Flask(__name__)
+    app.json = make_json_provider(app, provider)
+    init_compression(app, min_size=200)
+
+    @app.route('/tickets')
+    def tickets():
+        rows = [{'ticket_id': TICKET_ID, 'created_at': datetime(2024, 1, 1, 9, 30)}] * 20
+        return {'success': True, 'data': {'tickets': rows}}, 200
+
+    @app.route('/small')
+    def small():
+        return {'success': True}, 200
+    return app
+
+
+@pytest.mark.parametrize('provider', ['stdlib', 'auto'])
+def test_provider_encodes_datetimes_and_uuids(provider):
+    client = build_app(provider).test_client()
+    body = client.get('/tickets').get_json()
+    assert body['data']['tickets'][0] == {'ticket_id': str(TICKET_ID), 'created_at': '2024-01-01T09:30:00'}
+
+
+def test_large_responses_are_gzipped_small_ones_are_not():
+    client = build_app('auto').test_client()
+    response = client.get('/tickets', headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.data))['success'] is True
+    assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+    assert 'Content-Encoding' not in client.get('/tickets').headers
+    assert choose_encoding('gzip;q=0, identity') is None
@@ -0,0 +1,28 @@
+from backend.ml.idf import DocumentFrequencyCounter, IDFTable
+from backend.ml.preprocessor import MLPreprocessor
+
+CORPUS = [
+    'My account shows the wrong invoice total',
+    'Cannot update account email address',
+    'Password reset link expired for my account',
+    'Password reset email never arrives for my account',
+]
+
+
+def test_idf_downweights_corpus_wide_terms_and_scores_bigrams():
+    table = IDFTable.from_counter(DocumentFrequencyCounter().add_all(CORPUS))
+    text = 'Account password reset failed, account password reset loops'
+    keywords = MLPreprocessor().extract_keywords(text, 3, table)
+    assert keywords == ['password reset', 'failed', 'loops']
+    assert 'password' not in keywords and 'reset' not in keywords
+    assert MLPreprocessor().extract_keywords(text, 1) == ['account']
+
+
+def test_counter_round_trip_resumes_counting(tmp_path):
+    path = str(tmp_path / 'idf.json')
+    counter = DocumentFrequencyCounter().add_all(CORPUS[:2])
+    counter.save(path)
+    resumed = DocumentFrequencyCounter.load(path).add_all(CORPUS[2:])
+    assert resumed.n_docs == 4
+    assert resumed.df['account'] == 4
+    assert IDFTable.load(str(tmp_path / 'missing.json')) is None
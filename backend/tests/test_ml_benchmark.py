@@ -0,0 +1,26 @@
+from backend.ml.benchmark import classification_report, generate_dataset, quality_regressions, run_benchmark
+
+
+def test_classification_report():
+    report = classification_report(['a', 'a', 'b', 'b'], ['a', 'b', 'b', 'b'])
+    assert report['accuracy'] == 0.75
+    assert report['macro_f1'] == round((2 / 3 + 0.8) / 2, 4)
+
+
+def test_heuristic_run_reports_quality_and_latency():
+    rows = generate_dataset(50, seed=1)
+    assert generate_dataset(50, seed=1) == rows
+    report = run_benchmark(rows, variant='heuristic', batch_size=8)
+    assert report['items'] == 50
+    assert report['model_types'] == {'sentiment': 'NoneType', 'priority': 'NoneType'}
+    for task in ('sentiment', 'priority'):
+        assert 0 <= report[task]['macro_f1'] <= 1
+        assert report[task]['single']['p50_ms'] <= report[task]['single']['p99_ms']
+        assert report[task]['batch']['items_per_sec'] > 0
+    assert quality_regressions(report, report) == []
+    better = {task: {'accuracy': report[task]['accuracy'] + 0.5, 'macro_f1': report[task]['macro_f1']}
+              for task in ('sentiment', 'priority')}
+    assert quality_regressions(report, better) == [
+        f"sentiment.accuracy: {better['sentiment']['accuracy']} -> {report['sentiment']['accuracy']}",
+        f"priority.accuracy: {better['priority']['accuracy']} -> {report['priority']['accuracy']}",
+    ]
@@ -0,0 +1,23 @@
+from datetime import datetime
+from backend.models.comment import Comment
+from backend.models.ticket import Ticket
+from backend.utils.serialization import to_iso
+
+ROW = {'ticket_id': 't1', 'customer_id': 'c1', 'title': 'Login', 'description': 'Cannot login',
+       'priority': 'high', 'status': 'open', 'assigned_agent_id': None, 'sentiment_score': 0.2,
+       'category': None, 'tags': ['auth'], 'created_at': '2024-01-01T10:00:00+00:00',
+       'updated_at': '2024-01-02T10:00:00+00:00'}
+
+
+def test_from_row_round_trips_timestamps_untouched():
+    ticket = Ticket.from_row(ROW)
+    assert ticket.to_dict() == {**ROW, 'attachment_ids': []}
+    assert not hasattr(ticket, '__dict__')
+
+
+def test_to_iso_formats_datetimes_and_passes_strings_through():
+    assert to_iso(None) is None
+    assert to_iso('2024-01-01T10:00:00') == '2024-01-01T10:00:00'
+    assert to_iso(datetime(2024, 1, 1, 10)) == '2024-01-01T10:00:00'
+    comment = Comment('k1', 't1', 'u1', 'hi', created_at=datetime(2024, 1, 1))
+    assert comment.to_dict()['created_at'] == '2024-01-01T00:00:00'
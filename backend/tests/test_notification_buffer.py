@@ -0,0 +1,80 @@
+from backend.services.notification_buffer import NotificationDigestBuffer
+from backend.services.notification_service import NotificationService
+
+
+class FakeNotificationService:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+
+    def create_notifications(self, rows):
+        if self.fail:
+            return {'success': False, 'error': 'db down'}
+        self.batches.append(rows)
+        return {'success': True, 'data': rows}
+
+
+def test_flush_coalesces_bursts_into_digest():
+    service = FakeNotificationService()
+    buffer = NotificationDigestBuffer(service, flush_interval=60, digest_threshold=3)
+    for i in range(4):
+        buffer.enqueue('agent_1', f'Update {i}', 'msg', related_ticket_id='t1')
+    buffer.enqueue('agent_2', 'Only one', 'msg')
+
+    assert buffer.flush() == 2
+    assert len(service.batches) == 1
+    digest, single = service.batches[0]
+    assert digest['notification_type'] == 'digest'
+    assert digest['title'] == '4 new updates'
+    assert digest['related_ticket_id'] == 't1'
+    assert single['title'] == 'Only one'
+    buffer.shutdown()
+
+
+def test_backpressure_rejects_when_full_and_flush_fails():
+    service = FakeNotificationService(fail=True)
+    buffer = NotificationDigestBuffer(service, flush_interval=60, max_pending=2)
+    assert buffer.enqueue('u1', 'a', 'm')
+    assert buffer.enqueue('u2', 'b', 'm')
+    assert not buffer.enqueue('u3', 'c', 'm')
+    assert buffer.metrics.get('rejected') >= 1
+    assert buffer.metrics.get('flush_errors') >= 1
+    buffer.shutdown()
+
+
+class FlakyDB:
+    """Fails the second insert batch once; upserts skip known ids"""
+
+    def __init__(self):
+        self.rows = {}
+        self.inserts = 0
+
+    def table(self, name):
+        db = self
+
+        class Upsert:
+            def upsert(self, batch, ignore_duplicates=False):
+                self.batch = batch
+                return self
+
+            def execute(self):
+                db.inserts += 1
+                if db.inserts == 2:
+                    raise ConnectionError('connection reset')
+                new = [row for row in self.batch if row['notification_id'] not in db.rows]
+                db.rows.update((row['notification_id'], row) for row in new)
+                return type('R', (), {'data': new})()
+
+        return Upsert()
+
+
+def test_failed_flush_requeues_only_uncommitted_batches():
+    db = FlakyDB()
+    service = NotificationService(db, insert_batch_size=2)
+    buffer = NotificationDigestBuffer(service, flush_interval=60)
+    for i in range(5):
+        buffer.enqueue(f'u{i}', 'Ticket assigned to you', 'msg')
+    assert buffer.flush() == 2
+    assert buffer.flush() == 3
+    assert sorted(row['user_id'] for row in db.rows.values()) == ['u0', 'u1', 'u2', 'u3', 'u4']
+    buffer.shutdown()
@@ -0,0 +1,85 @@
+import httpx
+from postgrest import SyncPostgrestClient
+
+from backend.services.notification_service import NotificationService
+
+
+class PostgrestDB:
+    """The real postgrest-py client over an in-memory HTTP handler"""
+
+    def __init__(self, handler):
+        self.requests = []
+
+        def record(request):
+            self.requests.append(request)
+            return handler(request)
+
+        self.client = SyncPostgrestClient('http://db.test')
+        self.client.session = httpx.Client(base_url='http://db.test', transport=httpx.MockTransport(record))
+
+    def table(self, name):
+        return self.client.from_(name)
+
+
+def notification(i):
+    return {'notification_id': f'n{i}', 'user_id': 'u1', 'title': 't', 'message': 'm',
+            'notification_type': 'info', 'related_ticket_id': None, 'is_read': False,
+            'created_at': f'2024-01-01T10:0{i}:00+00:00'}
+
+
+def test_second_page_is_requested_after_the_cursor():
+    def handler(request):
+        # Newest first: n3, n2 on the first page, n1, n0 after the cursor
+        page = [3, 2] if 'or' not in request.url.params else [1, 0]
+        return httpx.Response(200, json=[notification(i) for i in page])
+
+    db = PostgrestDB(handler)
+    service = NotificationService(db)
+    first = service.get_user_notifications('u1', limit=2)
+    second = service.get_user_notifications('u1', limit=2, cursor=service.next_cursor(first, 2))
+    assert [n['notification_id'] for n in first + second] == ['n3', 'n2', 'n1', 'n0']
+    assert db.requests[1].url.params['or'] == (
+        '(created_at.lt."2024-01-01T10:02:00+00:00",'
+        'and(created_at.eq."2024-01-01T10:02:00+00:00",notification_id.lt."n2"))'
+    )
+
+
+def test_unread_count_is_cached_and_kept_in_step_with_writes():
+    def handler(request):
+        if request.url.path == '/notification_unread_counts':
+            return httpx.Response(200, json=[{'unread_count': 3}])
+        if request.method == 'PATCH':
+            return httpx.Response(200, json=[notification(1)])
+        return httpx.Response(200, json=[])
+
+    db = PostgrestDB(handler)
+    service = NotificationService(db)
+    assert service.get_unread_count('u1') == 3
+    assert service.get_unread_count('u1') == 3
+    assert len(db.requests) == 1
+    service.mark_as_read('n1', 'u1')
+    assert service.get_unread_count('u1') == 2
+    service.mark_all_as_read('u1')
+    assert service.get_unread_count('u1') == 0
+    assert len(db.requests) == 3
+
+
+def test_unread_count_falls_back_to_counting_notifications():
+    def handler(request):
+        if request.url.path == '/notification_unread_counts':
+            return httpx.Response(404, json={'code': '42P01', 'message': 'relation does not exist',
+                                             'details': None, 'hint': None})
+        return httpx.Response(200, json=[notification(0)], headers={'Content-Range': '0-0/5'})
+
+    service = NotificationService(PostgrestDB(handler))
+    assert service.get_unread_count('u1') == 5
+
+
+def test_users_without_a_counter_row_get_an_exact_count():
+    def handler(request):
+        if request.url.path == '/notification_unread_counts':
+            return httpx.Response(200, json=[])
+        return httpx.Response(200, json=[notification(0)], headers={'Content-Range': '0-0/7'})
+
+    service = NotificationService(PostgrestDB(handler))
+    assert service.get_unread_count('u1') == 7
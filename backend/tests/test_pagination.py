@@ -0,0 +1,41 @@
+import httpx
+from postgrest import SyncPostgrestClient
+
+from backend.utils.pagination import after_keyset, decode_cursor, encode_cursor, keyset_filter
+
+
+def test_cursor_round_trip_and_malformed_cursors():
+    cursor = encode_cursor('2024-01-01T10:00:00+00:00', 'c1')
+    assert '=' not in cursor
+    assert decode_cursor(cursor, 2) == ['2024-01-01T10:00:00+00:00', 'c1']
+    assert decode_cursor(cursor, 3) is None
+    assert decode_cursor(None, 2) is None
+    assert decode_cursor('not a cursor!', 2) is None
+    assert decode_cursor(encode_cursor('only one'), 2) is None
+
+
+def test_keyset_filter_selects_rows_after_the_cursor():
+    assert keyset_filter('created_at', 'id', '2024-01-01', 'b') == \
+        'created_at.gt."2024-01-01",and(created_at.eq."2024-01-01",id.gt."b")'
+    assert keyset_filter('created_at', 'id', '2024-01-01', 'b', descending=True) == \
+        'created_at.lt."2024-01-01",and(created_at.eq."2024-01-01",id.lt."b")'
+
+
+def test_after_keyset_works_with_the_real_postgrest_builder():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=[])
+
+    client = SyncPostgrestClient('http://db.test')
+    client.session = httpx.Client(base_url='http://db.test', transport=httpx.MockTransport(handler))
+    query = client.from_('comments').select('comment_id')
+    query = after_keyset(query, 'created_at', 'comment_id', '2024-01-01T10:00:00+00:00', 'c1')
+    query.order('created_at').order('comment_id').limit(2).execute()
+    (request,) = requests
+    assert request.url.params['or'] == (
+        '(created_at.gt."2024-01-01T10:00:00+00:00",'
+        'and(created_at.eq."2024-01-01T10:00:00+00:00",comment_id.gt."c1"))'
+    )
+    assert request.url.params['limit'] == '2'
@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from backend.utils.passwords import PasswordHasher, PasswordHasherBusy
+
+
+def test_hash_round_trip_and_rehash_detection():
+    hasher = PasswordHasher(2 ** 4, workers=0)
+    encoded = hasher.hash('s3cret pass')
+    assert encoded != hasher.hash('s3cret pass')  # salted
+    assert hasher.verify('s3cret pass', encoded)
+    assert not hasher.verify('s3cret pasS', encoded)
+    assert not hasher.verify('s3cret pass', 'not-a-hash')
+    assert not hasher.needs_rehash(encoded)
+    assert PasswordHasher(2 ** 5, workers=0).needs_rehash(encoded)
+    assert PasswordHasher(2 ** 5, workers=0).verify('s3cret pass', encoded)  # old cost still verifies
+
+
+def test_hashes_run_in_the_pool_and_excess_is_rejected():
+    hasher = PasswordHasher(2 ** 4, workers=1, max_pending=1)
+    try:
+        assert hasher.verify('pw', hasher.hash('pw'))
+        hasher._slots.acquire()
+        try:
+            with pytest.raises(PasswordHasherBusy):
+                hasher.hash('pw')
+        finally:
+            hasher._slots.release()
+    finally:
+        hasher.shutdown()
+
+
+def test_timed_out_hashes_keep_their_slot_until_they_finish():
+    hasher = PasswordHasher(2 ** 16, workers=1, max_pending=1)
+    try:
+        hasher.hash('pw')  # start the pool
+        hasher.timeout = 0.02
+        with pytest.raises(PasswordHasherBusy):
+            hasher.hash('pw')  # times out, but keeps running in the pool
+        assert not hasher._slots.acquire(blocking=False)  # its slot is still taken
+        deadline = time.monotonic() + 30
+        while not hasher._slots.acquire(blocking=False):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        hasher._slots.release()
+    finally:
+        hasher.shutdown()
+
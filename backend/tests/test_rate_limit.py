@@ -0,0 +1,83 @@
+import time
+
+import httpx
+import pytest
+
+from backend.utils.error_handler import ErrorHandler
+from backend.utils.rate_limit import (
+    AdmissionController, InMemoryRateLimitBackend, RateLimitBackend, RateLimiter, parse_route_costs
+)
+
+
+def test_route_costs_drain_the_user_and_ip_buckets():
+    limiter = RateLimiter(user_rate=1, user_burst=20, ip_rate=1, ip_burst=100,
+                          route_costs=parse_route_costs('list_tickets=2'))
+    assert limiter.cost('dashboard') > limiter.cost('health') == 0
+    assert all(limiter.check('health', 'u1', '10.0.0.1')[0] for _ in range(500))
+    assert limiter.check('dashboard', 'u1', '10.0.0.1') == (True, 0.0)
+    assert limiter.check('dashboard', 'u1', '10.0.0.1') == (True, 0.0)
+    allowed, retry_after = limiter.check('dashboard', 'u1', '10.0.0.1')
+    assert not allowed and 9 < retry_after <= 10
+    # Another user behind the same IP still has their own bucket
+    assert limiter.check('list_tickets', 'u2', '10.0.0.1')[0]
+    body, status, headers = ErrorHandler.too_many_requests(retry_after=retry_after)
+    assert status == 429 and headers['Retry-After'] == '10'
+
+
+def test_buckets_refill_and_evict_least_recently_used():
+    backend = InMemoryRateLimitBackend(max_keys=2)
+    assert backend.consume('a', 1, rate=100, burst=1) == (True, 0.0)
+    assert not backend.consume('a', 1, rate=100, burst=1)[0]
+    time.sleep(0.02)
+    assert backend.consume('a', 1, rate=100, burst=1)[0]
+    backend.consume('b', 1, rate=1, burst=1)
+    backend.consume('c', 1, rate=1, burst=1)
+    assert list(backend._buckets) == ['b', 'c']
+
+
+def test_admission_limit_shrinks_while_the_database_is_slow():
+    admission = AdmissionController(latency_threshold_ms=100, max_concurrency=8, min_concurrency=2,
+                                    adjust_interval=0, smoothing=1.0)
+    assert all(admission.try_acquire() for _ in range(8))
+    assert not admission.try_acquire()
+    for _ in range(8):
+        admission.release()
+    for _ in range(10):
+        admission.observe(0.5)
+    assert admission.limit == 2
+    assert admission.try_acquire() and admission.try_acquire() and not admission.try_acquire()
+    admission.observe(0.01)
+    assert admission.limit == 3 and admission.try_acquire()
+
+
+def test_failed_database_calls_count_as_slow():
+    admission = AdmissionController(latency_threshold_ms=100, max_concurrency=8, min_concurrency=2,
+                                    adjust_interval=0, smoothing=1.0)
+
+    def handler(request):
+        if request.url.path == '/down':
+            raise httpx.ConnectError('connection refused', request=request)
+        return httpx.Response(503 if request.url.path == '/error' else 200, json=[])
+
+    session = httpx.Client(base_url='http://db.test', transport=httpx.MockTransport(handler))
+    admission.db = type('Client', (), {'postgrest': type('PostgREST', (), {'session': session})()})()
+    admission.db = admission.db  # reattaching does not wrap or hook twice
+
+    for _ in range(3):
+        with pytest.raises(httpx.ConnectError):
+            session.get('/down')
+    assert admission.latency == 0.2 and admission.limit < 8
+    limit = admission.limit
+    session.get('/error')
+    assert admission.limit < limit
+    session.get('/ok')
+    assert admission.latency < 0.1
+    assert admission.metrics.get('db_failures') >= 4
+
+
+def test_rate_limit_backends_must_implement_consume():
+    class Incomplete(RateLimitBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,110 @@
+import os
+import threading
+
+import httpx
+from postgrest import SyncPostgrestClient
+
+from backend.services.search_index import SearchIndexMaintainer, TicketSearchIndex
+
+
+def build_index():
+    index = TicketSearchIndex()
+    index.add_ticket({'ticket_id': 't1', 'customer_id': 'c1', 'status': 'open', 'priority': 'high',
+                      'title': 'Payment failed', 'description': 'Checkout payment failed twice'})
+    index.add_ticket({'ticket_id': 't2', 'customer_id': 'c2', 'status': 'closed', 'priority': 'low',
+                      'title': 'Dark mode', 'description': 'Please add a dark mode theme'})
+    index.add_ticket({'ticket_id': 't3', 'customer_id': 'c1', 'status': 'open', 'priority': 'low',
+                      'title': 'Login issue', 'description': 'Cannot login after password reset'})
+    return index
+
+
+def test_bm25_ranking_and_filters():
+    index = build_index()
+    assert index.search('payment failed')[0][0] == 't1'
+    assert [t for t, _ in index.search('login', customer_id='c1')] == ['t3']
+    assert index.search('login', customer_id='c2') == []
+    assert [t for t, _ in index.search('mode payment', status='closed')] == ['t2']
+
+
+def test_comments_and_metadata_updates():
+    index = build_index()
+    assert index.add_comment({'comment_id': 'k1', 'ticket_id': 't2', 'content': 'Refund requested'})
+    assert not index.add_comment({'comment_id': 'k1', 'ticket_id': 't2', 'content': 'Refund requested'})
+    assert not index.add_comment({'comment_id': 'k2', 'ticket_id': 't1', 'content': 'secret',
+                                  'is_internal': True})
+    assert [t for t, _ in index.search('refund')] == ['t2']
+    assert index.search('secret') == []
+
+    index.update_metadata({'ticket_id': 't2', 'status': 'open'})
+    assert [t for t, _ in index.search('refund', status='open')] == ['t2']
+
+
+def test_save_and_load_round_trip(tmp_path):
+    index = build_index()
+    index.add_comment({'comment_id': 'k1', 'ticket_id': 't1', 'content': 'payment retried'})
+    path = str(tmp_path / 'tickets.idx')
+    index.save(path)
+    loaded = TicketSearchIndex.load(path)
+    assert len(loaded) == 3
+    for query in ('payment', 'dark mode', 'login reset'):
+        assert loaded.search(query) == index.search(query)
+
+
+def test_concurrent_saves_publish_a_complete_index(tmp_path):
+    path = str(tmp_path / 'tickets.idx')
+    indexes = [build_index() for _ in range(4)]
+    threads = [threading.Thread(target=index.save, args=(path,)) for index in indexes for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(TicketSearchIndex.load(path)) == 3
+    assert os.listdir(tmp_path) == ['tickets.idx']
+
+
+def test_maintainer_syncs_as_soon_as_it_starts():
+    synced = threading.Event()
+
+    class Index:
+        _dirty = False
+
+        def sync(self, db):
+            synced.set()
+
+    maintainer = SearchIndexMaintainer(Index(), db=None, sync_interval=60)
+    maintainer.start()
+    try:
+        assert synced.wait(2)
+    finally:
+        maintainer.shutdown()
+
+
+def test_sync_pages_by_keyset_so_rows_updated_mid_sync_are_not_skipped():
+    tickets = [{'ticket_id': f't{i}', 'customer_id': 'c1', 'title': f'Ticket {i}', 'description': 'login error',
+                'status': 'open', 'priority': 'low', 'assigned_agent_id': None,
+                'updated_at': '2024-01-01T10:00:00'} for i in range(4)]
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        if request.url.path != '/tickets':
+            return httpx.Response(200, json=[])
+        rows = sorted(tickets, key=lambda t: (t['updated_at'], t['ticket_id']))
+        if 'or' in request.url.params:
+            parts = request.url.params['or'].split('"')
+            rows = [t for t in rows if (t['updated_at'], t['ticket_id']) > (parts[1], parts[5])]
+        page = [dict(t) for t in rows[:int(request.url.params['limit'])]]
+        # t0 is updated while the sync runs: it moves behind the other rows
+        tickets[0]['updated_at'] = '2024-01-01T10:05:00'
+        return httpx.Response(200, json=page)
+
+    client = SyncPostgrestClient('http://db.test')
+    client.session = httpx.Client(base_url='http://db.test', transport=httpx.MockTransport(handler))
+    db = type('DB', (), {'table': lambda self, name: client.from_(name)})()
+
+    index = TicketSearchIndex()
+    index.sync(db, page_size=2)
+    assert {ticket_id for ticket_id, _ in index.search('login', limit=10)} == {'t0', 't1', 't2', 't3'}
+    ticket_pages = [r for r in requests if r.url.path == '/tickets']
+    assert 'offset' not in ticket_pages[1].url.params
+    assert ticket_pages[1].url.params['or'].startswith('(updated_at.gt."2024-01-01T10:00:00",')
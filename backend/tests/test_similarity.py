@@ -0,0 +1,81 @@
+from backend.ml.similarity import MinHasher, MinHashLSH
+
+
+def test_lsh_finds_near_duplicates_only():
+    lsh = MinHashLSH()
+    lsh.insert('t1', 'Payment failed at checkout with error code 502 after entering my card')
+    lsh.insert('t2', 'Please add a dark mode theme to the mobile dashboard settings page')
+    matches = lsh.query('Payment failed at checkout with error code 502 after entering card')
+    assert [key for key, _ in matches] == ['t1']
+    assert matches[0][1] >= 0.5
+    assert lsh.query('Payment failed', exclude='t1') == []
+
+
+def test_signatures_are_stable_and_cluster_groups_duplicates():
+    assert MinHasher().signature('cannot login after reset') == MinHasher().signature('cannot login after reset')
+    clusters = MinHashLSH().cluster([
+        ('a', 'Cannot login after password reset on the web portal today'),
+        ('b', 'Cannot login after password reset on the web portal'),
+        ('c', 'Invoice shows the wrong billing address for my company'),
+    ])
+    assert [sorted(c) for c in clusters] == [['a', 'b']]
+
+
+class TicketsDB:
+    """Newest-first ticket pages for DuplicateDetector.sync"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def table(self, name):
+        return self
+
+    def select(self, columns):
+        self.filtered = self.rows
+        return self
+
+    def gt(self, column, value):
+        self.filtered = [r for r in self.filtered if r[column] > value]
+        return self
+
+    def order(self, column, desc=False):
+        self.filtered = sorted(self.filtered, key=lambda r: r[column], reverse=desc)
+        return self
+
+    def range(self, start, end):
+        self.filtered = self.filtered[start:end + 1]
+        return self
+
+    def execute(self):
+        return type('Result', (), {'data': self.filtered})()
+
+
+def test_initial_load_evicts_oldest_tickets_first():
+    from backend.services.duplicate_detector import DuplicateDetector
+
+    rows = [{'ticket_id': f't{i}', 'description': f'ticket number {i} about login',
+             'created_at': f'2024-01-{i + 1:02d}'} for i in range(6)]
+    detector = DuplicateDetector(TicketsDB(rows), lsh=MinHashLSH(max_items=4), page_size=2)
+    assert detector.sync() == 4
+
+    detector.lsh.insert('t6', 'a brand new ticket about billing')
+    assert 't6' in detector.lsh
+    assert 't5' in detector.lsh and 't4' in detector.lsh
+    assert 't0' not in detector.lsh and 't2' not in detector.lsh
+
+
+def test_created_ticket_reuses_signature_from_lookup(monkeypatch):
+    from backend.services.duplicate_detector import DuplicateDetector
+    from backend.utils.event_bus import Event
+
+    detector = DuplicateDetector(TicketsDB([]))
+    calls = []
+    signature = detector.lsh.hasher.signature
+    monkeypatch.setattr(detector.lsh.hasher, 'signature', lambda text: calls.append(text) or signature(text))
+
+    detector.find_similar('cannot reset my password from the login page')
+    detector._on_ticket_created(Event('e1', 1, 'ticket.created', {
+        'ticket_id': 't1', 'description': 'cannot reset my password from the login page'}, ()))
+
+    assert len(calls) == 1
+    assert 't1' in detector.lsh
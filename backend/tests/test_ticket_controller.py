@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip('flask')
+from backend.controllers.ticket_controller import TicketController  # noqa: E402
+
+
+class Tickets:
+    def __init__(self, rows):
+        self.rows = {r['ticket_id']: r for r in rows}
+
+    def create_ticket(self, customer_id, title, description, priority):
+        ticket = {'ticket_id': 'new', 'customer_id': customer_id, 'title': title,
+                  'description': description, 'priority': priority}
+        self.rows['new'] = ticket
+        return {'success': True, 'data': dict(ticket)}
+
+    def get_tickets_by_ids(self, ticket_ids):
+        return [self.rows[t] for t in ticket_ids if t in self.rows]
+
+
+class Detector:
+    def find_similar(self, text, limit=5, exclude=None):
+        return [('mine', 0.9), ('theirs', 0.8)]
+
+
+class Scoring:
+    def run(self, fn, *args):
+        return {'sentiment': {'score': 0.5, 'label': 'neutral'}, 'predicted_priority': 'medium',
+                'keywords': []}
+
+
+def make_controller():
+    tickets = Tickets([{'ticket_id': 'mine', 'customer_id': 'c1'},
+                       {'ticket_id': 'theirs', 'customer_id': 'c2'}])
+    return TicketController(tickets, Scoring(), duplicate_detector=Detector())
+
+
+def test_customers_only_see_their_own_similar_tickets():
+    data = {'title': 'Cannot log in', 'description': 'The login page rejects my password every time'}
+    body, status = make_controller().create_ticket(dict(data), 'c1')
+    assert status == 201
+    assert [t['ticket_id'] for t in body['data']['similar_tickets']] == ['mine']
+
+    body, status = make_controller().create_ticket(dict(data), 'c3')
+    assert body['data']['similar_tickets'] == []
+
+    body, status = make_controller().create_ticket(dict(data), 'a1', 'agent')
+    assert [t['ticket_id'] for t in body['data']['similar_tickets']] == ['mine', 'theirs']
@@ -52,3 +52,49 @@ def test_create_and_get_ticket():
     assert res['success']
     ticket = service.get_all_tickets()
     assert len(ticket) == 1
+
+
+class BulkDB:
+    """Records filtered updates against an in-memory tickets table"""
+
+    def __init__(self, tickets):
+        self.tickets = {t['ticket_id']: t for t in tickets}
+        self.updates = []
+
+    def table(self, name):
+        db = self
+
+        class Update:
+            def __init__(self, data):
+                self.data = data
+
+            def in_(self, column, ids):
+                self.ids = ids
+                return self
+
+            def execute(self):
+                db.updates.append(list(self.ids))
+                rows = [dict(db.tickets[i], **self.data) for i in self.ids if i in db.tickets]
+                db.tickets.update((r['ticket_id'], r) for r in rows)
+                return type('R', (), {'data': rows})()
+
+        return type('Q', (), {'update': lambda self, data: Update(data)})()
+
+
+def test_bulk_update_status_reports_per_ticket_and_publishes_per_row():
+    from backend.utils.event_bus import EventBus
+
+    bus = EventBus()
+    events = []
+    bus.add_listener(lambda e: events.append(e.data['ticket_id']), ['ticket.status_changed'])
+    db = BulkDB([{'ticket_id': f't{i}', 'status': 'open', 'customer_id': 'c1'} for i in range(5)])
+    svc = TicketService(db, bus)
+    svc.BULK_CHUNK_SIZE = 2
+
+    result = svc.bulk_update_status(['t0', 't1', 't1', 't4', 'missing'], 'closed')
+    assert result['success']
+    assert result['data']['updated'] == 3 and result['data']['failed'] == 1
+    assert [r['success'] for r in result['data']['results']] == [True, True, True, False]
+    assert db.updates == [['t0', 't1'], ['t4', 'missing']]
+    assert sorted(events) == ['t0', 't1', 't4']
+    assert db.tickets['t4']['status'] == 'closed' and db.tickets['t2']['status'] == 'open'
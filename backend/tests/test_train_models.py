@@ -0,0 +1,47 @@
+import os
+import httpx
+import pytest
+from postgrest import SyncPostgrestClient
+from backend.ml.train_models import iter_csv_chunks, iter_ticket_chunks, train_streaming
+
+SAMPLE = os.path.join(os.path.dirname(__file__), '..', 'ml', 'sample_dataset.csv')
+
+
+def test_csv_is_read_in_chunks():
+    chunks = list(iter_csv_chunks(SAMPLE, chunk_size=2))
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert set(chunks[0][0]) == {'text', 'label', 'priority'}
+
+
+def test_tickets_are_read_by_keyset_and_train_priority_only():
+    tickets = [{'ticket_id': f't{i}', 'title': 'Login', 'description': f'fails {i}',
+                'priority': 'high', 'created_at': f'2024-01-0{i + 1}'} for i in range(3)]
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        after = request.url.params.get('or')
+        rows = [t for t in tickets if not after or f'"{t["created_at"]}"' > after.split('.gt.')[1].split(',')[0]]
+        return httpx.Response(200, json=rows[:int(request.url.params['limit'])])
+
+    client = SyncPostgrestClient('http://db.test')
+    client.session = httpx.Client(base_url='http://db.test', transport=httpx.MockTransport(handler))
+    db = type('DB', (), {'table': lambda self, name: client.from_(name)})()
+
+    chunks = list(iter_ticket_chunks(db, chunk_size=2))
+    assert [[row['text'] for row in chunk] for chunk in chunks] == [['Login fails 0', 'Login fails 1'],
+                                                                    ['Login fails 2']]
+    assert all(row['label'] is None and row['priority'] == 'high' for chunk in chunks for row in chunk)
+    assert 'or' not in requests[0].url.params
+    assert requests[1].url.params['or'].startswith('(created_at.gt."2024-01-02",')
+
+
+def test_streaming_training_fits_both_heads(tmp_path):
+    pytest.importorskip('sklearn')
+    import joblib
+    stats = train_streaming(iter_csv_chunks(SAMPLE, chunk_size=2), str(tmp_path), n_features=2 ** 12)
+    assert stats == {'rows': 5, 'label': 5, 'priority': 5}
+    model = joblib.load(str(tmp_path / 'priority_model.pkl'))
+    assert model.predict(['My app keeps crashing and I lose data'])[0] in ('low', 'medium', 'high', 'urgent')
+    stats = train_streaming(iter_csv_chunks(SAMPLE), str(tmp_path), n_features=2 ** 12, resume=True)
+    assert stats['rows'] == 5
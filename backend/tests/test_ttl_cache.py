@@ -0,0 +1,29 @@
+import time
+
+from backend.utils.ttl_cache import TTLCache
+
+
+def test_entries_expire_and_least_recently_used_are_evicted():
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'b' is now least recently used
+    cache.set('c', 3)
+    assert cache.get('b') is None and cache.get('a') == 1 and cache.get('c') == 3
+
+    short = TTLCache(ttl=0.01)
+    short.set('k', 'v')
+    time.sleep(0.02)
+    assert short.get('k', 'missing') == 'missing'
+
+
+def test_update_keeps_missing_keys_missing_and_pop_removes():
+    cache = TTLCache()
+    assert cache.update('n', lambda n: n + 1) is None
+    assert cache.get('n') is None
+    cache.set('n', 1)
+    assert cache.update('n', lambda n: n + 1) == 2
+    assert cache.pop('n') == 2 and cache.pop('n', 'gone') == 'gone'
+    cache.set('x', 1)
+    cache.clear()
+    assert cache.get('x') is None
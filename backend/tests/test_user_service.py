@@ -0,0 +1,133 @@
+from backend.controllers.auth_controller import AuthController
+from backend.services.user_service import UserService
+from backend.utils.jwt_utils import JWTUtils
+from backend.utils.passwords import PasswordHasher
+
+
+class UniqueViolation(Exception):
+    code = '23505'
+
+
+class UsersDB:
+    def __init__(self):
+        self.rows = {}
+        self.selects = 0
+
+    def table(self, name):
+        db = self
+
+        class Query:
+            def __init__(self):
+                self.op, self.payload, self.filters = None, None, {}
+
+            def select(self, columns):
+                self.op = 'select'
+                return self
+
+            def insert(self, row):
+                self.op, self.payload = 'insert', row
+                return self
+
+            def update(self, updates, **kwargs):
+                self.op, self.payload = 'update', updates
+                return self
+
+            def eq(self, column, value):
+                self.filters[column] = value
+                return self
+
+            def execute(self):
+                data = []
+                if self.op == 'insert':
+                    if any(row['email'] == self.payload['email'] for row in db.rows.values()):
+                        raise UniqueViolation('duplicate key value violates unique constraint "users_email_key"')
+                    db.rows[self.payload['user_id']] = dict(self.payload)
+                    data = [dict(self.payload)]
+                else:
+                    matches = [row for row in db.rows.values()
+                               if all(row.get(k) == v for k, v in self.filters.items())]
+                    if self.op == 'select':
+                        db.selects += 1
+                    for row in matches:
+                        if self.op == 'update':
+                            row.update(self.payload)
+                        data.append(dict(row))
+                return type('R', (), {'data': data})()
+
+        return Query()
+
+
+def test_registration_conflicts_and_auth_cache_invalidation():
+    db = UsersDB()
+    service = UserService(db)
+    assert service.create_user('u1', 'a@example.com', 'Ann')['success']
+    conflict = service.create_user('u2', 'a@example.com', 'Ann again')
+    assert conflict['error_code'] == 'CONFLICT' and 'u2' not in db.rows
+
+    # Written through on registration: logins do not query
+    assert service.get_auth_user('a@example.com')['user_id'] == 'u1'
+    assert db.selects == 0
+
+    service.deactivate_user('u1')
+    assert service.get_auth_user('a@example.com')['is_active'] is False
+    assert service.get_auth_user('a@example.com')['is_active'] is False
+    assert db.selects == 2  # inactive users are not cached
+
+    service.update_user('u1', {'is_active': True})
+    assert service.get_auth_user('a@example.com')['is_active'] is True
+    service.get_auth_user('a@example.com')
+    assert db.selects == 3
+
+    # The cache is keyed by email only, so evicting entries cannot desync it
+    small = UserService(db, cache_size=2)
+    small.create_user('u3', 'c@example.com', 'Cy')
+    small.create_user('u4', 'd@example.com', 'Di')
+    small.get_auth_user('c@example.com')
+    small.get_auth_user('a@example.com')
+    small.set_password_hash('u3', 'scrypt$new')
+    assert small.get_auth_user('c@example.com')['password_hash'] == 'scrypt$new'
+
+    service.update_user('u1', {'email': 'ann@example.com'})
+    assert service.get_auth_user('a@example.com') is None
+    assert service.get_auth_user('ann@example.com')['user_id'] == 'u1'
+
+
+def test_login_verifies_password_and_upgrades_old_hashes():
+    db = UsersDB()
+    service = UserService(db)
+    old = AuthController(service, JWTUtils('secret'), password_hasher=PasswordHasher(2 ** 4, workers=0))
+    body, status = old.register({'email': 'b@example.com', 'password': 'Secret123', 'name': 'Bo'})
+    assert status == 201 and 'password_hash' not in body['data']
+    old_hash = next(iter(db.rows.values()))['password_hash']
+
+    auth = AuthController(service, JWTUtils('secret'), password_hasher=PasswordHasher(2 ** 5, workers=0))
+    assert auth.login({'email': 'b@example.com', 'password': 'wrong'})[1] == 401
+    assert auth.login({'email': 'nobody@example.com', 'password': 'Secret123'})[1] == 401
+    assert db.rows[body['data']['user_id']]['password_hash'] == old_hash
+
+    assert auth.login({'email': 'b@example.com', 'password': 'Secret123'})[1] == 200
+    new_hash = db.rows[body['data']['user_id']]['password_hash']
+    assert new_hash.startswith('scrypt$32$') and not auth.password_hasher.needs_rehash(new_hash)
+    assert auth.login({'email': 'b@example.com', 'password': 'Secret123'})[1] == 200
+
+
+def test_users_without_a_hash_set_a_password_with_a_one_time_token():
+    db = UsersDB()
+    service = UserService(db)
+    jwt_utils = JWTUtils('secret')
+    auth = AuthController(service, jwt_utils, password_hasher=PasswordHasher(2 ** 4, workers=0))
+    service.create_user('u1', 'old@example.com', 'Ola')  # no password_hash
+    assert auth.login({'email': 'old@example.com', 'password': 'Secret123'})[1] == 401
+
+    body, status = auth.issue_password_token('u1')
+    assert status == 200 and body['data']['email'] == 'old@example.com'
+    token = body['data']['token']
+    assert jwt_utils.decode_token(token) is None  # not a bearer token
+    assert auth.set_password({'token': token, 'password': 'short'})[1] == 400
+    assert auth.set_password({'token': token, 'password': 'Secret123'})[1] == 200
+    assert auth.login({'email': 'old@example.com', 'password': 'Secret123'})[1] == 200
+
+    # One use only: the token was pinned to the missing hash
+    assert auth.set_password({'token': token, 'password': 'Other1234'})[1] == 401
+    assert auth.set_password({'token': 'garbage', 'password': 'Other1234'})[1] == 401
+    assert auth.issue_password_token('nobody')[1] == 404
@@ -0,0 +1,66 @@
+"""Background - periodic flush threads for write-behind buffers"""
+import os
+import threading
+from typing import Callable
+
+
+class PeriodicFlusher:
+    """
+    Calls flush_fn on a daemon thread every interval seconds, or sooner when
+    woken (e.g. a buffer reached its size trigger). With run_immediately the
+    first call happens as soon as the thread starts (initial syncs).
+    The thread is started lazily and per process, so a buffer created before
+    a pre-fork server forks gets its own thread in every worker.
+    """
+
+    def __init__(self, name: str, flush_fn: Callable[[], None], interval: float,
+                 run_immediately: bool = False):
+        self.name = name
+        self.flush_fn = flush_fn
+        self.interval = interval
+        self.run_immediately = run_immediately
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        """Start the flush thread in this process if it is not running"""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._pid = os.getpid()
+                self._thread.start()
+
+    def wake(self):
+        """Flush now instead of waiting for the interval"""
+        self._wake.set()
+
+    def _run(self):
+        first = True
+        while not self._stop.is_set():
+            if not (first and self.run_immediately):
+                self._wake.wait(self.interval)
+            first = False
+            self._wake.clear()
+            try:
+                self.flush_fn()
+            except Exception as e:
+                print(f"[{self.name}] Flush failed: {e}")
+
+    def stop(self, timeout: float = 10.0, final_flush: bool = True):
+        """Stop the thread (after its current flush) and optionally run a final flush"""
+        with self._lock:
+            thread = self._thread if self._pid == os.getpid() else None
+            self._thread = None
+            self._pid = None
+        if thread is not None:
+            self._stop.set()
+            self._wake.set()
+            thread.join(timeout)
+        if final_flush:
+            self.flush_fn()
@@ -0,0 +1,87 @@
+"""Compression - gzip/brotli for large JSON responses
+
+Registered as an after_request hook. Only buffered, successful, textual
+responses above a size threshold are compressed, so small payloads skip the
+CPU cost and streamed responses (the SSE event stream) are left alone.
+Brotli is used when the client accepts it and the brotli package is
+installed, gzip otherwise.
+"""
+import gzip
+from typing import Optional
+
+from backend.utils.metrics import get_metrics
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/plain', 'text/html', 'text/csv')
+
+
+def _accepted_encodings(header: str) -> set:
+    """Codings from an Accept-Encoding header, ignoring ones with q=0"""
+    accepted = set()
+    for part in header.split(','):
+        coding, *params = [p.strip() for p in part.split(';')]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = _accepted_encodings(accept_encoding or '')
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(data: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def init_compression(app, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+    """Compress eligible responses of app that are at least min_size bytes"""
+    metrics = get_metrics('compression')
+
+    @app.after_request
+    def compress_response(response):
+        from flask import request
+
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        compressed = compress(data, encoding, gzip_level, brotli_quality)
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        # The compressed bytes differ from the identity ones, so a strong ETag must become weak
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        metrics.incr(f'{encoding}_responses')
+        metrics.incr('bytes_in', len(data))
+        metrics.incr('bytes_out', len(compressed))
+        return response
+
+    return compress_response
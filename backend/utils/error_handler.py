@@ -1,4 +1,5 @@
 """Error Handler - centralized error handling"""
+import math
 from flask import jsonify
 from typing import Tuple, Dict
 
@@ -44,6 +45,20 @@ class ErrorHandler:
         """409 Conflict"""
         return ErrorHandler.handle_error(409, message, error_code)
     
+    @staticmethod
+    def too_many_requests(message: str = 'Too many requests', retry_after: float = 1,
+                          error_code: str = 'RATE_LIMITED') -> Tuple[Dict, int, Dict]:
+        """429 Too Many Requests, with Retry-After in whole seconds"""
+        body, status = ErrorHandler.handle_error(429, message, error_code)
+        return body, status, {'Retry-After': str(max(1, math.ceil(retry_after)))}
+    
+    @staticmethod
+    def service_unavailable(message: str = 'Service temporarily overloaded', retry_after: float = 1,
+                            error_code: str = 'OVERLOADED') -> Tuple[Dict, int, Dict]:
+        """503 Service Unavailable, with Retry-After in whole seconds"""
+        body, status = ErrorHandler.handle_error(503, message, error_code)
+        return body, status, {'Retry-After': str(max(1, math.ceil(retry_after)))}
+    
     @staticmethod
     def internal_error(message: str = 'Internal Server Error',
                       error_code: str = 'INTERNAL_ERROR') -> Tuple[Dict, int]:
@@ -0,0 +1,256 @@
+"""Event Bus - lightweight in-process pub/sub for real-time updates
+
+Services publish lifecycle events (ticket created/assigned/status changed,
+comment created, notification created) to named channels:
+
+- ``user:<user_id>``            events addressed to one user
+- ``staff``                     events every agent/admin console follows
+- ``ticket:<ticket_id>``        public activity on a ticket
+- ``ticket:<ticket_id>:internal`` internal (staff-only) activity on a ticket
+
+Subscribers (SSE streams) receive events for their channels, and each channel
+keeps a short history so a reconnecting client can resume from its
+Last-Event-ID. In-process listeners get every event synchronously and are
+used for derived state (indexes, metrics, audit).
+
+The bus lives in one process: a client only sees events published by the
+worker it is connected to, so serve the stream from a single ASGI process
+(or put a shared broker behind this interface) when running many workers.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+class Event:
+    """A published event"""
+
+    __slots__ = ('event_id', 'seq', 'event_type', 'data', 'channels', 'created_at')
+
+    def __init__(self, event_id: str, seq: int, event_type: str, data: Dict,
+                 channels: tuple):
+        self.event_id = event_id
+        self.seq = seq
+        self.event_type = event_type
+        self.data = data
+        self.channels = channels
+        self.created_at = time.time()
+
+    def to_sse(self) -> str:
+        """Format as a Server-Sent Events message"""
+        payload = json.dumps({'type': self.event_type, 'data': self.data}, default=str)
+        return f"id: {self.event_id}\nevent: {self.event_type}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    """A subscriber's bounded event queue.
+    A subscriber that falls too far behind is closed; it reconnects and
+    resumes from its last event id.
+    """
+
+    def __init__(self, bus: 'EventBus', channels: tuple, max_queue_size: int):
+        self.bus = bus
+        self.channels = channels
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.closed = False
+        self.resync_required = False
+
+    def deliver(self, event: Event) -> bool:
+        """Queue an event; returns False if the subscriber overflowed"""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except queue.Full:
+            return False
+
+    def get(self, timeout: float = None) -> Optional[Event]:
+        """Next event, or None if none arrived within timeout"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        """Stop receiving events"""
+        if not self.closed:
+            self.closed = True
+            self.bus.unsubscribe(self)
+
+
+class AsyncSubscription(Subscription):
+    """Subscription whose events are consumed from an asyncio event loop"""
+
+    def __init__(self, bus: 'EventBus', channels: tuple, max_queue_size: int, loop):
+        super().__init__(bus, channels, max_queue_size)
+        import asyncio
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue_size)
+
+    def deliver(self, event: Event) -> bool:
+        if self.queue.full():
+            return False
+        self.loop.call_soon_threadsafe(self._put, event)
+        return True
+
+    def _put(self, event: Event):
+        if self.queue.full():
+            self.close()
+        else:
+            self.queue.put_nowait(event)
+
+    async def get_async(self, timeout: float = None) -> Optional[Event]:
+        """Next event, or None if none arrived within timeout"""
+        import asyncio
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBus:
+    """In-process pub/sub with per-channel history for resumable streams"""
+
+    def __init__(self, history_size: int = 200, max_queue_size: int = 500,
+                 max_channels: int = 10000):
+        self.history_size = history_size
+        self.max_queue_size = max_queue_size
+        self.max_channels = max_channels
+        # Event ids are '<epoch>-<seq>'; the epoch changes on every process
+        # start so ids from another process are recognised as not resumable
+        self.epoch = f"{os.getpid():x}{int(time.time()):x}"
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._history: 'OrderedDict[str, deque]' = OrderedDict()  # LRU by last publish
+        # Channels whose history was evicted -> last seq it held (bounded too);
+        # _forgotten_seq covers channels dropped from this map as well
+        self._evicted: 'OrderedDict[str, int]' = OrderedDict()
+        self._forgotten_seq = 0
+        self._subscribers: Dict[str, set] = {}
+        self._listeners: List[tuple] = []
+
+    def publish(self, event_type: str, data: Dict, channels: Iterable[str] = ()) -> Event:
+        """Publish an event to channels and in-process listeners"""
+        channels = tuple(dict.fromkeys(c for c in channels if c))
+        with self._lock:
+            self._seq += 1
+            event = Event(f"{self.epoch}-{self._seq}", self._seq, event_type, data, channels)
+            targets = set()
+            for channel in channels:
+                history = self._history.get(channel)
+                if history is None:
+                    history = self._history[channel] = deque(maxlen=self.history_size)
+                    if len(self._history) > self.max_channels:
+                        self._evict_oldest_channel()
+                else:
+                    self._history.move_to_end(channel)
+                history.append(event)
+                targets.update(self._subscribers.get(channel, ()))
+
+        for subscription in targets:
+            if not subscription.deliver(event):
+                subscription.close()
+
+        for event_types, callback in self._listeners:
+            if event_types is None or event_type in event_types:
+                try:
+                    callback(event)
+                except Exception as e:
+                    print(f"[EventBus] Listener failed for {event_type}: {e}")
+        return event
+
+    def _evict_oldest_channel(self):
+        """Drop the least recently published channel's history (caller holds the lock)"""
+        channel, history = self._history.popitem(last=False)
+        if history:
+            self._evicted[channel] = history[-1].seq
+            self._evicted.move_to_end(channel)
+            if len(self._evicted) > self.max_channels:
+                _, seq = self._evicted.popitem(last=False)
+                self._forgotten_seq = max(self._forgotten_seq, seq)
+
+    def _history_lost(self, channel: str, history, seen: int) -> bool:
+        """Whether events after seq seen may be missing from a channel's history"""
+        # A full history that starts after the client's last event may have
+        # evicted events the client never saw
+        if len(history) == self.history_size and history[0].seq > seen + 1:
+            return True
+        # The whole history was evicted (max_channels) after the client's last event
+        evicted_seq = self._evicted.get(channel)
+        if evicted_seq is not None:
+            return evicted_seq > seen
+        return not history and self._forgotten_seq > seen
+
+    def subscribe(self, channels: Iterable[str], last_event_id: str = None,
+                  loop=None) -> Subscription:
+        """
+        Subscribe to channels, replaying history newer than last_event_id.
+        Pass the running asyncio loop (and call from it) to get an AsyncSubscription.
+        """
+        channels = tuple(dict.fromkeys(channels))
+        if loop is not None:
+            subscription = AsyncSubscription(self, channels, self.max_queue_size, loop)
+        else:
+            subscription = Subscription(self, channels, self.max_queue_size)
+
+        with self._lock:
+            backlog = []
+            if last_event_id:
+                epoch, _, seq = last_event_id.rpartition('-')
+                if epoch == self.epoch and seq.isdigit():
+                    seen = int(seq)
+                    replay = {}
+                    for channel in channels:
+                        history = self._history.get(channel, ())
+                        if self._history_lost(channel, history, seen):
+                            subscription.resync_required = True
+                        for event in history:
+                            if event.seq > seen:
+                                replay[event.seq] = event
+                    backlog = [replay[s] for s in sorted(replay)]
+                else:
+                    subscription.resync_required = True
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+
+        for event in backlog[-self.max_queue_size:]:
+            if loop is not None:
+                subscription.queue.put_nowait(event)
+            else:
+                subscription.deliver(event)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Remove a subscription from all its channels"""
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+    def add_listener(self, callback: Callable[[Event], None],
+                     event_types: Iterable[str] = None):
+        """Call callback(event) synchronously for every (matching) published event"""
+        self._listeners.append((frozenset(event_types) if event_types else None, callback))
+
+    def subscriber_count(self) -> int:
+        """Number of active subscriptions"""
+        with self._lock:
+            return len({s for subs in self._subscribers.values() for s in subs})
+
+
+def ticket_channels(ticket: Dict, include_staff: bool = True) -> List[str]:
+    """Channels interested in a change to a ticket row"""
+    channels = [f"ticket:{ticket.get('ticket_id')}"] if ticket.get('ticket_id') else []
+    if ticket.get('customer_id'):
+        channels.append(f"user:{ticket['customer_id']}")
+    if ticket.get('assigned_agent_id'):
+        channels.append(f"user:{ticket['assigned_agent_id']}")
+    if include_staff:
+        channels.append('staff')
+    return channels
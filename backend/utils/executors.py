@@ -0,0 +1,89 @@
+"""Executors - offload CPU-bound work from request threads"""
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+
+class MLExecutorTimeout(Exception):
+    """Raised when pooled ML work does not finish within the timeout"""
+
+
+class MLExecutor:
+    """Runs CPU-bound ML scoring in a worker pool, falling back to inline.
+
+    Modes: 'inline' (run in the calling thread), 'thread' or 'process'.
+    The pool is created lazily per process so it survives a pre-fork server.
+    """
+
+    MODES = ('inline', 'thread', 'process')
+
+    def __init__(self, mode: str = 'inline', max_workers: Optional[int] = None,
+                 timeout: float = 10.0):
+        if mode not in self.MODES:
+            raise ValueError(f"ML executor mode must be one of: {', '.join(self.MODES)}")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self._executor: Optional[Executor] = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Optional[Executor]:
+        """Get the pool for the current process, creating it on first use"""
+        if self.mode == 'inline':
+            return None
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                if self.mode == 'process':
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                        thread_name_prefix='ml')
+                self._pid = os.getpid()
+        return self._executor
+
+    def run(self, fn: Callable, *args):
+        """Run fn(*args) in the pool and wait for the result.
+        Only a pool that cannot run work (broken or failing to start) falls
+        back to inline execution; errors raised by fn propagate. After
+        timeout seconds the job is cancelled if it has not started and
+        MLExecutorTimeout is raised, so the work never runs twice.
+        """
+        if self.mode == 'inline':
+            return fn(*args)
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except (BrokenProcessPool, OSError, RuntimeError) as e:
+            print(f"[MLExecutor] Pool unavailable, running inline: {e}")
+            self._discard_broken_pool()
+            return fn(*args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise MLExecutorTimeout(f'ML scoring did not finish within {self.timeout}s')
+        except BrokenProcessPool as e:
+            print(f"[MLExecutor] Pool broke, running inline: {e}")
+            self._discard_broken_pool()
+            return fn(*args)
+
+    def _discard_broken_pool(self):
+        """Drop a pool that cannot run work; the next call creates a new one"""
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False)
+            self._executor = None
+            self._pid = None
+
+    def shutdown(self, wait: bool = True):
+        """Shut down the pool owned by this process"""
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=wait)
+            self._executor = None
+            self._pid = None
@@ -0,0 +1,95 @@
+"""HTTP Cache - ETags and conditional GETs for polled read endpoints
+
+conditional() answers If-None-Match / If-Modified-Since from a cheap version
+lookup (e.g. a row's updated_at) before the view runs, so an unchanged
+resource costs one narrow query and a 304 instead of a full fetch and
+serialization. weak_etag() covers list endpoints whose version is not
+cheap to compute: the body is still built, but an unchanged one is not
+sent again. Responses carry `Cache-Control: private, no-cache` so clients
+always revalidate.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Callable, Optional, Tuple
+
+from flask import make_response, request
+
+CACHE_CONTROL = 'private, no-cache'
+
+# A version lookup returns (version token, last modified timestamp or None)
+Version = Tuple[str, Optional[str]]
+
+
+def make_etag(*parts) -> str:
+    """Opaque validator for the given version parts"""
+    return hashlib.sha1('\x1f'.join(str(p) for p in parts).encode()).hexdigest()[:24]
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Database timestamp to an aware datetime (naive values are UTC)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (TypeError, ValueError):
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def is_fresh(etag: str, last_modified: Optional[datetime]) -> bool:
+    """Whether the client's cached copy is current. If-None-Match wins over
+    If-Modified-Since and uses weak comparison, as RFC 9110 specifies."""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def _set_validators(response, etag: str, last_modified: Optional[datetime], weak: bool = False):
+    response.set_etag(etag, weak=weak)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    return response
+
+
+def conditional(version_fn: Callable[..., Optional[Version]]):
+    """
+    Route decorator. version_fn receives the view's URL arguments and returns
+    (version, updated_at) or None when the resource cannot be versioned
+    (then the view runs as usual). The request path and query string are
+    part of the ETag.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version = version_fn(**kwargs)
+            if version is None:
+                return view(*args, **kwargs)
+            token, updated_at = version
+            etag = make_etag(request.full_path, token)
+            last_modified = parse_timestamp(updated_at)
+            if is_fresh(etag, last_modified):
+                return _set_validators(make_response('', 304), etag, last_modified)
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _set_validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+def weak_etag(view):
+    """Route decorator: weak ETag from the response body; 304 when it matches"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        if response.status_code != 200 or response.is_streamed:
+            return response
+        etag = make_etag(hashlib.sha1(response.get_data()).hexdigest())
+        if is_fresh(etag, None):
+            return _set_validators(make_response('', 304), etag, None, weak=True)
+        return _set_validators(response, etag, None, weak=True)
+    return wrapper
@@ -0,0 +1,82 @@
+"""JSON Provider - fast JSON encoding for API responses
+
+The app's JSON provider encodes every (dict, status) route result. With
+orjson installed, OrjsonProvider encodes straight to bytes in C; otherwise
+StdlibJSONProvider uses the json module. Both encode datetimes as ISO-8601,
+UUIDs as strings and model objects through their to_dict().
+"""
+import json
+import uuid
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+PROVIDERS = ('auto', 'orjson', 'stdlib')
+
+
+def _default(o: Any):
+    """Encode the types neither encoder handles natively"""
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if isinstance(o, Decimal):
+        return float(o)
+    if isinstance(o, (set, frozenset, tuple)):
+        return list(o)
+    if hasattr(o, 'to_dict'):
+        return o.to_dict()
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """json-module provider with the same type handling as OrjsonProvider"""
+
+    default = staticmethod(_default)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """orjson-backed provider; responses are built from bytes without a str round trip"""
+
+    def _option(self) -> int:
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=self._option())
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            # Callers asking for json-module options (indent, ...) get the stdlib encoder
+            kwargs.setdefault('default', _default)
+            return json.dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode()
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+
+def make_json_provider(app, name: str = 'auto') -> DefaultJSONProvider:
+    """Build the configured provider: 'orjson', 'stdlib', or 'auto' (orjson when installed)"""
+    if name not in PROVIDERS:
+        raise ValueError(f"JSON provider must be one of: {', '.join(PROVIDERS)}")
+    if name == 'orjson' and orjson is None:
+        print("⚠  orjson is not installed — using the stdlib JSON provider")
+    if name != 'stdlib' and orjson is not None:
+        return OrjsonProvider(app)
+    return StdlibJSONProvider(app)
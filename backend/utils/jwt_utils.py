@@ -28,12 +28,35 @@ class JWTUtils:
         """Decode and validate JWT token"""
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            # Single-purpose tokens (e.g. set-password) never authenticate requests
+            if payload.get('purpose'):
+                return None
             return payload
         except jwt.ExpiredSignatureError:
             return None
         except jwt.InvalidTokenError:
             return None
     
+    def generate_password_token(self, user_id: str, fingerprint: str,
+                                expires_in_hours: int = 24) -> str:
+        """Generate a token that lets a user set their password once"""
+        payload = {
+            'user_id': user_id,
+            'purpose': 'set_password',
+            'fingerprint': fingerprint,
+            'iat': datetime.utcnow(),
+            'exp': datetime.utcnow() + timedelta(hours=expires_in_hours)
+        }
+        return jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
+    
+    def decode_password_token(self, token: str) -> Optional[Dict]:
+        """Decode and validate a set-password token"""
+        try:
+            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except jwt.InvalidTokenError:
+            return None
+        return payload if payload.get('purpose') == 'set_password' else None
+    
     def refresh_token(self, token: str, expires_in_hours: int = 24) -> Optional[str]:
         """Refresh an existing token"""
         payload = self.decode_token(token)
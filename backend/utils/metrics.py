@@ -0,0 +1,53 @@
+"""Metrics - in-process counters and gauges for background components"""
+import threading
+from typing import Dict, Union
+
+Number = Union[int, float]
+
+
+class Metrics:
+    """Thread-safe counters and gauges for one component"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._values: Dict[str, Number] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, key: str, value: Number = 1):
+        """Increment a counter"""
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, key: str, value: Number):
+        """Set a gauge"""
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, key: str, default: Number = 0) -> Number:
+        """Current value of a counter or gauge"""
+        with self._lock:
+            return self._values.get(key, default)
+
+    def snapshot(self) -> Dict[str, Number]:
+        """Copy of all values"""
+        with self._lock:
+            return dict(self._values)
+
+
+_registry: Dict[str, Metrics] = {}
+_registry_lock = threading.Lock()
+
+
+def get_metrics(name: str) -> Metrics:
+    """Get (or create) the process-wide Metrics for a component"""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = Metrics(name)
+        return _registry[name]
+
+
+def snapshot_all() -> Dict[str, Dict[str, Number]]:
+    """Snapshot of every registered component"""
+    with _registry_lock:
+        components = list(_registry.values())
+    return {m.name: m.snapshot() for m in components}
@@ -0,0 +1,48 @@
+"""Pagination - opaque cursors for keyset (seek) pagination"""
+import base64
+import json
+from typing import List, Optional
+
+
+def encode_cursor(*values) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor"""
+    raw = json.dumps(list(values), separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[List]:
+    """Decode a cursor into its sort key values; None if absent or malformed"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+def keyset_filter(sort_column: str, tie_column: str, sort_value, tie_value,
+                  descending: bool = False) -> str:
+    """
+    PostgREST or-filter selecting rows after (sort_value, tie_value) in
+    (sort_column, tie_column) order. Values are quoted because timestamps
+    contain reserved characters.
+    """
+    op = 'lt' if descending else 'gt'
+    return (f'{sort_column}.{op}."{sort_value}",'
+            f'and({sort_column}.eq."{sort_value}",{tie_column}.{op}."{tie_value}")')
+
+
+def after_keyset(query, sort_column: str, tie_column: str, sort_value, tie_value,
+                 descending: bool = False):
+    """
+    Restrict a postgrest-py query to rows after a cursor with keyset_filter.
+    postgrest-py 0.10 (pinned by supabase 1.0) has no or_() and its filter()
+    always prepends an operator, so the or parameter is added directly.
+    """
+    expression = keyset_filter(sort_column, tie_column, sort_value, tie_value, descending)
+    query.params = query.params.add('or', f'({expression})')
+    return query
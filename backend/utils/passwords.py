@@ -0,0 +1,144 @@
+"""Passwords - scrypt hashing in a bounded worker pool
+
+Hashes are stored as 'scrypt$<n>$<r>$<p>$<salt>$<key>' (base64 salt and
+key), so each one records the cost it was made with. The KDF is
+deliberately slow, so PasswordHasher runs it in a process pool of its own
+(created lazily per process, like MLExecutor) and admits at most
+max_pending hashes at a time; beyond that callers get PasswordHasherBusy
+instead of queueing behind other logins. A slot stays taken until its job
+finishes, even when the caller gave up waiting for it.
+
+    python backend/benchmarks/password_benchmark.py    # throughput per cost
+"""
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from typing import Optional, Tuple
+
+SCHEME = 'scrypt'
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when max_pending hashes are already running or queued, or one timed out"""
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def _unb64(text: str) -> bytes:
+    return base64.b64decode(text + '=' * (-len(text) % 4))
+
+
+def scrypt_key(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    """Derive the key (module-level so it can be shipped to a pool process)"""
+    return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r * p + 1024 * 1024, dklen=KEY_BYTES)
+
+
+def hash_fingerprint(encoded: Optional[str]) -> str:
+    """Short digest of a stored hash (or of no hash), to pin one-time tokens to it"""
+    return hashlib.sha256((encoded or '').encode('utf-8')).hexdigest()[:16]
+
+
+def parse_hash(encoded: str) -> Optional[Tuple[int, int, int, bytes, bytes]]:
+    """(n, r, p, salt, key) of a stored hash, or None if it is not one"""
+    try:
+        scheme, n, r, p, salt, key = (encoded or '').split('$')
+        if scheme != SCHEME:
+            return None
+        return int(n), int(r), int(p), _unb64(salt), _unb64(key)
+    except ValueError:
+        return None
+
+
+class PasswordHasher:
+    """
+    scrypt with configurable cost (n: CPU/memory cost, a power of two; r:
+    block size; p: parallelism). workers=0 hashes in the calling thread.
+    """
+
+    def __init__(self, n: int = 2 ** 14, r: int = 8, p: int = 1, workers: Optional[int] = None,
+                 max_pending: int = 64, timeout: float = 10.0):
+        if n < 2 or n & (n - 1):
+            raise ValueError('scrypt n must be a power of two greater than 1')
+        self.n = n
+        self.r = r
+        self.p = p
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """Get the pool for the current process, creating it on first use"""
+        if self.workers <= 0:
+            return None
+        if self._executor is not None and self._pid == os.getpid():
+            return self._executor
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._pid = os.getpid()
+        return self._executor
+
+    def _derive(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy('Too many password hashes in progress')
+        try:
+            executor = self._get_executor()
+            future = executor.submit(scrypt_key, password, salt, n, r, p) if executor else None
+        except BaseException:
+            self._slots.release()
+            raise
+        if future is None:
+            try:
+                return scrypt_key(password, salt, n, r, p)
+            finally:
+                self._slots.release()
+        # The job keeps its slot until it is done, not just while we wait for it
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel()  # still queued: drop it
+            raise PasswordHasherBusy('Password hashing timed out')
+
+    def hash(self, password: str) -> str:
+        """Hash a password with the current cost parameters"""
+        salt = os.urandom(SALT_BYTES)
+        key = self._derive(password, salt, self.n, self.r, self.p)
+        return f'{SCHEME}${self.n}${self.r}${self.p}${_b64(salt)}${_b64(key)}'
+
+    def verify(self, password: str, encoded: str) -> bool:
+        """Check a password against a stored hash, using the hash's own cost"""
+        parsed = parse_hash(encoded)
+        if parsed is None:
+            return False
+        n, r, p, salt, key = parsed
+        return hmac.compare_digest(self._derive(password, salt, n, r, p), key)
+
+    def dummy_verify(self, password: str) -> bool:
+        """Take as long as verify() when there is no hash (unknown user); always False"""
+        self._derive(password, bytes(SALT_BYTES), self.n, self.r, self.p)
+        return False
+
+    def needs_rehash(self, encoded: str) -> bool:
+        """Whether a stored hash was made with other cost parameters"""
+        parsed = parse_hash(encoded)
+        return parsed is None or parsed[:3] != (self.n, self.r, self.p) or len(parsed[4]) != KEY_BYTES
+
+    def shutdown(self, wait: bool = True):
+        """Shut down the pool owned by this process"""
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=wait)
+            self._executor = None
+            self._pid = None
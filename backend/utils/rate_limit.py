@@ -0,0 +1,244 @@
+"""Rate Limit - token buckets per client and latency-based admission control
+
+RateLimiter charges each request a per-route cost against two token
+buckets: one per user (from the JWT) and one per IP address. Buckets live
+in a RateLimitBackend; InMemoryRateLimitBackend is per process, and a shared
+store (e.g. Redis running the same refill arithmetic in a script) can
+implement the interface so limits hold across workers.
+
+AdmissionController caps the requests handled at once. It watches the
+latency of every Supabase call and, while latency stays above a threshold,
+lowers the cap multiplicatively (raising it again by one once latency
+recovers), so excess requests are shed with a 503 instead of queueing on a
+struggling database. Failed calls (connection errors, timeouts, 5xx) count
+as at least failure_penalty_ms, so a database that errors fast still
+lowers the cap.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import httpx
+
+from backend.utils.metrics import get_metrics
+
+# Endpoints never shed by admission control (long-lived streams, probes)
+ADMISSION_EXEMPT = ('health', 'metrics', 'event_stream')
+
+# Relative cost of routes by Flask endpoint name; unlisted routes cost 1
+DEFAULT_ROUTE_COSTS = {
+    'health': 0,
+    'metrics': 0,
+    'event_stream': 1,
+    'dashboard': 10,
+    'list_agents': 5,
+    'agent_stats': 3,
+    'search_tickets': 3,
+    'duplicate_clusters': 5,
+    'list_audit_logs': 3,
+    'bulk_update_status': 10,
+    'bulk_assign': 10,
+    'upload_attachment': 5,
+    'login': 5,
+    'register': 5,
+    'set_password': 5,
+}
+
+
+def parse_route_costs(spec: str) -> Dict[str, float]:
+    """'dashboard=10,search_tickets=3' -> DEFAULT_ROUTE_COSTS with overrides"""
+    costs = dict(DEFAULT_ROUTE_COSTS)
+    for item in (spec or '').split(','):
+        endpoint, _, cost = item.partition('=')
+        if endpoint.strip() and cost.strip():
+            costs[endpoint.strip()] = float(cost)
+    return costs
+
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets"""
+
+    @abstractmethod
+    def consume(self, key: str, cost: float, rate: float, burst: float) -> Tuple[bool, float]:
+        """
+        Take cost tokens from the bucket at key, which refills at rate tokens
+        per second up to burst. Returns (allowed, seconds until it would be).
+        """
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Process-local buckets; the least recently used are evicted past max_keys"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: 'OrderedDict[str, list]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, cost: float, rate: float, burst: float) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [burst, now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return True, 0.0
+            return False, (cost - bucket[0]) / rate if rate > 0 else float('inf')
+
+
+class RateLimiter:
+    """Per-user and per-IP token buckets with per-route costs"""
+
+    def __init__(self, backend: RateLimitBackend = None, user_rate: float = 10.0,
+                 user_burst: float = 60.0, ip_rate: float = 20.0, ip_burst: float = 120.0,
+                 route_costs: Dict[str, float] = None):
+        self.backend = backend or InMemoryRateLimitBackend()
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.ip_rate = ip_rate
+        self.ip_burst = ip_burst
+        self.route_costs = DEFAULT_ROUTE_COSTS if route_costs is None else route_costs
+        self.metrics = get_metrics('rate_limit')
+
+    def cost(self, endpoint: Optional[str]) -> float:
+        return self.route_costs.get(endpoint, 1)
+
+    def check(self, endpoint: Optional[str], user_id: Optional[str],
+              ip_address: Optional[str]) -> Tuple[bool, float]:
+        """Charge a request; returns (allowed, retry_after seconds)"""
+        cost = self.cost(endpoint)
+        if cost <= 0:
+            return True, 0.0
+        buckets = []
+        if ip_address:
+            buckets.append((f'ip:{ip_address}', self.ip_rate, self.ip_burst))
+        if user_id:
+            buckets.append((f'user:{user_id}', self.user_rate, self.user_burst))
+        for key, rate, burst in buckets:
+            allowed, retry_after = self.backend.consume(key, cost, rate, burst)
+            if not allowed:
+                self.metrics.incr(f"limited_{key.split(':', 1)[0]}")
+                return False, retry_after
+        return True, 0.0
+
+
+class _FailureTimingTransport(httpx.BaseTransport):
+    """Reports requests that fail without a response (event hooks never see them)"""
+
+    def __init__(self, transport: httpx.BaseTransport, on_failure: Callable[[httpx.Request], None]):
+        self.transport = transport
+        self.on_failure = on_failure
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        try:
+            return self.transport.handle_request(request)
+        except httpx.TransportError:  # connection errors and timeouts
+            self.on_failure(request)
+            raise
+
+    def close(self):
+        self.transport.close()
+
+
+class AdmissionController:
+    """
+    Concurrency limit that adapts to database latency (AIMD).
+    Attach it to the Supabase client by assigning .db; it then times every
+    PostgREST call through the client's httpx event hooks and transport.
+    """
+
+    def __init__(self, latency_threshold_ms: float = 500.0, max_concurrency: int = 64,
+                 min_concurrency: int = 4, decrease_factor: float = 0.75,
+                 adjust_interval: float = 1.0, smoothing: float = 0.2,
+                 failure_penalty_ms: Optional[float] = None):
+        self.latency_threshold = latency_threshold_ms / 1000.0
+        # A failed call counts as at least this slow (default: twice the threshold)
+        self.failure_penalty = (2 * latency_threshold_ms if failure_penalty_ms is None
+                                else failure_penalty_ms) / 1000.0
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.decrease_factor = decrease_factor
+        self.adjust_interval = adjust_interval
+        self.smoothing = smoothing
+        self.limit = float(max_concurrency)
+        self.latency = 0.0  # smoothed seconds
+        self.metrics = get_metrics('admission')
+        self._in_flight = 0
+        self._adjusted_at = 0.0
+        self._lock = threading.Lock()
+        self._db = None
+
+    @property
+    def db(self):
+        return self._db
+
+    @db.setter
+    def db(self, client):
+        """Time the new client's requests (also called after reconnecting)"""
+        self._db = client
+        session = getattr(getattr(client, 'postgrest', None), 'session', None)
+        if session is not None and self._on_db_request not in session.event_hooks['request']:
+            session.event_hooks['request'].append(self._on_db_request)
+            session.event_hooks['response'].append(self._on_db_response)
+        transport = getattr(session, '_transport', None)
+        if transport is not None and not isinstance(transport, _FailureTimingTransport):
+            session._transport = _FailureTimingTransport(transport, self._on_db_failure)
+
+    def _on_db_request(self, request):
+        request.extensions['supportpilot_started'] = time.perf_counter()
+
+    def _elapsed(self, request) -> Optional[float]:
+        started = request.extensions.get('supportpilot_started')
+        return None if started is None else time.perf_counter() - started
+
+    def _on_db_response(self, response):
+        elapsed = self._elapsed(response.request)
+        if elapsed is None:
+            return
+        if response.status_code >= 500:
+            self.metrics.incr('db_failures')
+            elapsed = max(elapsed, self.failure_penalty)
+        self.observe(elapsed)
+
+    def _on_db_failure(self, request):
+        elapsed = self._elapsed(request)
+        self.metrics.incr('db_failures')
+        self.observe(max(elapsed or 0.0, self.failure_penalty))
+
+    def observe(self, latency: float):
+        """Record one database call's latency and adjust the limit"""
+        now = time.monotonic()
+        with self._lock:
+            self.latency += self.smoothing * (latency - self.latency)
+            if now - self._adjusted_at < self.adjust_interval:
+                return
+            self._adjusted_at = now
+            if self.latency > self.latency_threshold:
+                self.limit = max(self.min_concurrency, self.limit * self.decrease_factor)
+            elif self.latency < self.latency_threshold / 2:
+                self.limit = min(self.max_concurrency, self.limit + 1)
+            self.metrics.set('limit', round(self.limit, 1))
+            self.metrics.set('db_latency_ms', round(self.latency * 1000, 1))
+
+    def try_acquire(self) -> bool:
+        """Admit a request if under the current limit; pair with release()"""
+        with self._lock:
+            if self._in_flight >= int(self.limit):
+                self.metrics.incr('shed')
+                return False
+            self._in_flight += 1
+            self.metrics.set('in_flight', self._in_flight)
+            return True
+
+    def release(self):
+        with self._lock:
+            self._in_flight = max(self._in_flight - 1, 0)
+            self.metrics.set('in_flight', self._in_flight)
@@ -0,0 +1,11 @@
+"""Serialization - helpers shared by the model classes"""
+from datetime import date
+from typing import Optional, Union
+
+
+def to_iso(value: Union[date, str, None]) -> Optional[str]:
+    """ISO-8601 string for a datetime; strings (timestamps as read from the
+    database) pass through without a parse/format round trip"""
+    if value is None or isinstance(value, str):
+        return value
+    return value.isoformat()
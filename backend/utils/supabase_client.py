@@ -1,5 +1,14 @@
 """Supabase Client - database connection and utilities"""
-from supabase import create_client, Client
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+
+def create_client(url: str, key: str) -> 'Client':
+    """Create a Supabase client; the supabase package is imported on first use"""
+    from supabase import create_client as _create_client
+    return _create_client(url, key)
 
 
 class SupabaseClient:
@@ -15,7 +24,7 @@ class SupabaseClient:
                 cls._instance.client = create_client(url, key)
         return cls._instance
     
-    def get_client(self) -> Client:
+    def get_client(self) -> 'Client':
         """Get Supabase client"""
         if not hasattr(self, 'client') or self.client is None:
             raise Exception("Supabase client not initialized. Call init_client() first.")
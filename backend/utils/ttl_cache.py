@@ -0,0 +1,64 @@
+"""TTL Cache - bounded, thread-safe LRU cache with per-entry expiry"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """LRU cache holding at most max_size entries, each for at most ttl seconds"""
+
+    _MISSING = object()
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Cached value, or default if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is self._MISSING:
+                return default
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """Cache a value, evicting the least recently used entry if full"""
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def update(self, key: Hashable, fn: Callable[[Any], Any]) -> Optional[Any]:
+        """Atomically replace a cached value with fn(value), keeping its expiry.
+        Missing keys are left missing (the next read repopulates them)."""
+        with self._lock:
+            entry = self._data.get(key, self._MISSING)
+            if entry is self._MISSING:
+                return None
+            value = fn(entry[0])
+            self._data[key] = (value, entry[1])
+            return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove and return a cached value"""
+        with self._lock:
+            entry = self._data.pop(key, self._MISSING)
+            return default if entry is self._MISSING else entry[0]
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
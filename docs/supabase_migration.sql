@@ -8,6 +8,7 @@ CREATE TABLE IF NOT EXISTS users (
   name VARCHAR(255) NOT NULL,
   role VARCHAR(50) NOT NULL DEFAULT 'customer',
   is_active BOOLEAN DEFAULT TRUE,
+  password_hash TEXT,  -- 'scrypt$n$r$p$salt$key' (backend/utils/passwords.py); NULL cannot log in
   created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -27,6 +28,8 @@ CREATE TABLE IF NOT EXISTS tickets (
   sentiment_score FLOAT,
   category VARCHAR(100),
   tags TEXT[] DEFAULT ARRAY[]::TEXT[],
+  first_response_at TIMESTAMP WITH TIME ZONE,  -- first comment by someone other than the customer
+  resolved_at TIMESTAMP WITH TIME ZONE,        -- first move to resolved/closed
   created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
@@ -35,6 +38,7 @@ CREATE INDEX idx_tickets_customer ON tickets(customer_id);
 CREATE INDEX idx_tickets_agent ON tickets(assigned_agent_id);
 CREATE INDEX idx_tickets_status ON tickets(status);
 CREATE INDEX idx_tickets_priority ON tickets(priority);
+CREATE INDEX idx_tickets_updated_at ON tickets(updated_at);  -- search index catch-up
 
 -- Create comments table
 CREATE TABLE IF NOT EXISTS comments (
@@ -48,7 +52,10 @@ CREATE TABLE IF NOT EXISTS comments (
 );
 
 CREATE INDEX idx_comments_ticket ON comments(ticket_id);
+CREATE INDEX idx_comments_ticket_updated ON comments(ticket_id, updated_at DESC);  -- comment list ETags
+CREATE INDEX idx_comments_ticket_thread ON comments(ticket_id, created_at, comment_id);  -- thread pages
 CREATE INDEX idx_comments_author ON comments(author_id);
+CREATE INDEX idx_comments_created_at ON comments(created_at);  -- search index catch-up
 
 -- Create attachments table
 CREATE TABLE IF NOT EXISTS attachments (
@@ -59,10 +66,12 @@ CREATE TABLE IF NOT EXISTS attachments (
   file_url TEXT NOT NULL,
   file_size INTEGER,
   mime_type VARCHAR(100),
+  content_sha256 CHAR(64),  -- blob under UPLOAD_FOLDER, shared by identical uploads
   created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX idx_attachments_ticket ON attachments(ticket_id);
+CREATE INDEX idx_attachments_ticket ON attachments(ticket_id, created_at);  -- a ticket's attachments in one scan
+CREATE INDEX idx_attachments_content ON attachments(content_sha256);  -- is a blob still referenced?
 
 -- Create agent_performance table
 CREATE TABLE IF NOT EXISTS agent_performance (
@@ -72,25 +81,103 @@ CREATE TABLE IF NOT EXISTS agent_performance (
   average_resolution_time FLOAT DEFAULT 0,
   customer_satisfaction_score FLOAT DEFAULT 0,
   total_assigned_tickets INTEGER DEFAULT 0,
+  -- Running statistics (count, mean, sum of squared deviations) in seconds;
+  -- the averages above are the means, tickets_resolved the resolution count
+  response_count INTEGER DEFAULT 0,
+  response_time_m2 FLOAT DEFAULT 0,
+  resolution_time_m2 FLOAT DEFAULT 0,
   created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
--- Create audit_logs table
+-- Create audit_logs table: append-only, range partitioned by month.
+-- The partition key must be part of the primary key. user_id has no foreign
+-- key so appends skip the lookup and deleting a user never rewrites history.
 CREATE TABLE IF NOT EXISTS audit_logs (
-  log_id VARCHAR(255) PRIMARY KEY,
-  user_id VARCHAR(255) REFERENCES users(user_id) ON DELETE SET NULL,
+  log_id VARCHAR(255) NOT NULL,
+  user_id VARCHAR(255),
   action VARCHAR(100) NOT NULL,
   entity_type VARCHAR(100) NOT NULL,
   entity_id VARCHAR(255) NOT NULL,
   changes JSONB,
   ip_address VARCHAR(50),
   user_agent TEXT,
-  created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
-);
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (log_id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Indexes are created on every partition; each serves time-ordered keyset scans
+CREATE INDEX idx_audit_logs_entity ON audit_logs(entity_type, entity_id, created_at, log_id);
+CREATE INDEX idx_audit_logs_user ON audit_logs(user_id, created_at, log_id);
+CREATE INDEX idx_audit_logs_created ON audit_logs(created_at, log_id);
+
+-- Rows outside every monthly partition land here instead of failing the insert
+CREATE TABLE IF NOT EXISTS audit_logs_default PARTITION OF audit_logs DEFAULT;
+
+-- Create the partitions audit_logs_yYYYYmMM from this month to months_ahead
+-- months ahead; returns the ones created. Run monthly (e.g. with pg_cron).
+CREATE OR REPLACE FUNCTION create_audit_log_partitions(months_ahead INTEGER DEFAULT 3)
+RETURNS SETOF TEXT AS $$
+DECLARE
+  month_start DATE;
+  partition_name TEXT;
+BEGIN
+  FOR i IN 0..months_ahead LOOP
+    month_start := (date_trunc('month', now() AT TIME ZONE 'UTC') + make_interval(months => i))::DATE;
+    partition_name := 'audit_logs_' || to_char(month_start, '"y"YYYY"m"MM');
+    IF to_regclass(partition_name) IS NULL THEN
+      EXECUTE format(
+        'CREATE TABLE %I PARTITION OF audit_logs FOR VALUES FROM (%L) TO (%L)',
+        partition_name, month_start::TIMESTAMPTZ, (month_start + INTERVAL '1 month')::TIMESTAMPTZ
+      );
+      RETURN NEXT partition_name;
+    END IF;
+  END LOOP;
+END;
+$$ LANGUAGE plpgsql;
 
-CREATE INDEX idx_audit_logs_user ON audit_logs(user_id);
-CREATE INDEX idx_audit_logs_entity ON audit_logs(entity_type, entity_id);
+SELECT create_audit_log_partitions(3);
+
+-- Retention: drop whole monthly partitions older than retain_months (export
+-- them first, see AuditLogStore); returns the dropped partitions, or with
+-- dry_run the ones that would be dropped. With partition_names only those
+-- (the ones just exported) are dropped, even if more expired meanwhile.
+DROP FUNCTION IF EXISTS drop_audit_log_partitions(INTEGER, BOOLEAN);
+CREATE OR REPLACE FUNCTION drop_audit_log_partitions(retain_months INTEGER, dry_run BOOLEAN DEFAULT FALSE,
+                                                     partition_names TEXT[] DEFAULT NULL)
+RETURNS SETOF TEXT AS $$
+DECLARE
+  cutoff DATE := (date_trunc('month', now() AT TIME ZONE 'UTC') - make_interval(months => retain_months))::DATE;
+  partition_name TEXT;
+BEGIN
+  FOR partition_name IN
+    SELECT c.relname FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE i.inhparent = 'audit_logs'::regclass
+      AND c.relname ~ '^audit_logs_y[0-9]{4}m[0-9]{2}$'
+    ORDER BY c.relname
+  LOOP
+    IF to_date(substring(partition_name FROM 12), '"y"YYYY"m"MM') < cutoff
+       AND (partition_names IS NULL OR partition_name = ANY(partition_names)) THEN
+      IF NOT dry_run THEN
+        EXECUTE format('DROP TABLE %I', partition_name);
+      END IF;
+      RETURN NEXT partition_name;
+    END IF;
+  END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Append-only: rows can be inserted and expired with their partition, never changed
+CREATE OR REPLACE FUNCTION reject_audit_log_change() RETURNS TRIGGER AS $$
+BEGIN
+  RAISE EXCEPTION 'audit_logs is append-only';
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_audit_logs_append_only
+BEFORE UPDATE OR DELETE ON audit_logs
+FOR EACH ROW EXECUTE FUNCTION reject_audit_log_change();
 
 -- Create notifications table
 CREATE TABLE IF NOT EXISTS notifications (
@@ -104,8 +191,142 @@ CREATE TABLE IF NOT EXISTS notifications (
   created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX idx_notifications_user ON notifications(user_id);
-CREATE INDEX idx_notifications_is_read ON notifications(is_read);
+-- Serves per-user listing (newest first, keyset by notification_id) and unread filtering
+CREATE INDEX idx_notifications_user_unread ON notifications(user_id, is_read, created_at DESC, notification_id DESC);
+
+-- Per-user unread counter for notification badges, kept current by a trigger
+CREATE TABLE IF NOT EXISTS notification_unread_counts (
+  user_id VARCHAR(255) PRIMARY KEY REFERENCES users(user_id) ON DELETE CASCADE,
+  unread_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION maintain_notification_unread_count() RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') AND NOT COALESCE(OLD.is_read, FALSE) THEN
+    UPDATE notification_unread_counts
+      SET unread_count = GREATEST(unread_count - 1, 0)
+      WHERE user_id = OLD.user_id;
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') AND NOT COALESCE(NEW.is_read, FALSE) THEN
+    INSERT INTO notification_unread_counts (user_id, unread_count) VALUES (NEW.user_id, 1)
+    ON CONFLICT (user_id) DO UPDATE
+      SET unread_count = notification_unread_counts.unread_count + 1;
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_notification_unread_count
+AFTER INSERT OR DELETE OR UPDATE OF is_read, user_id ON notifications
+FOR EACH ROW EXECUTE FUNCTION maintain_notification_unread_count();
+
+-- Seed the counters from the notifications that existed before the trigger
+INSERT INTO notification_unread_counts (user_id, unread_count)
+SELECT user_id, COUNT(*) FROM notifications WHERE NOT is_read GROUP BY user_id
+ON CONFLICT (user_id) DO UPDATE SET unread_count = EXCLUDED.unread_count;
+
+-- Comment counts for a list of tickets in one call (CommentService.comment_counts)
+CREATE OR REPLACE FUNCTION comment_counts(ticket_ids TEXT[], include_internal BOOLEAN DEFAULT TRUE)
+RETURNS TABLE (ticket_id VARCHAR, comment_count BIGINT) AS $$
+  SELECT c.ticket_id, COUNT(*)
+  FROM comments c
+  WHERE c.ticket_id = ANY(ticket_ids)
+    AND (include_internal OR NOT c.is_internal)
+  GROUP BY c.ticket_id;
+$$ LANGUAGE sql STABLE;
+
+-- Agent metrics (AgentMetricsProcessor). Stamps first responses and
+-- resolutions on tickets, once per ticket even with many API workers, and
+-- returns the durations to credit: (agent_id, kind, seconds).
+-- responses: [{ticket_id, author_id, at}], resolutions: [{ticket_id, at}]
+CREATE OR REPLACE FUNCTION record_ticket_milestones(responses JSONB, resolutions JSONB)
+RETURNS TABLE (agent_id VARCHAR, kind TEXT, seconds DOUBLE PRECISION) AS $$
+BEGIN
+  RETURN QUERY
+  WITH candidates AS (
+    SELECT DISTINCT ON (r.ticket_id) r.ticket_id, r.author_id, r.at
+    FROM jsonb_to_recordset(responses) AS r(ticket_id VARCHAR, author_id VARCHAR, at TIMESTAMPTZ)
+    JOIN tickets t ON t.ticket_id = r.ticket_id
+    WHERE r.author_id <> t.customer_id
+    ORDER BY r.ticket_id, r.at
+  ), stamped AS (
+    UPDATE tickets t SET first_response_at = c.at
+    FROM candidates c
+    WHERE t.ticket_id = c.ticket_id AND t.first_response_at IS NULL
+    RETURNING COALESCE(t.assigned_agent_id, c.author_id) AS agent_id,
+              EXTRACT(EPOCH FROM c.at - t.created_at)::DOUBLE PRECISION AS seconds
+  )
+  SELECT s.agent_id, 'response'::TEXT, s.seconds FROM stamped s;
+
+  RETURN QUERY
+  WITH candidates AS (
+    SELECT r.ticket_id, MIN(r.at) AS at
+    FROM jsonb_to_recordset(resolutions) AS r(ticket_id VARCHAR, at TIMESTAMPTZ)
+    GROUP BY r.ticket_id
+  ), stamped AS (
+    UPDATE tickets t SET resolved_at = c.at
+    FROM candidates c
+    WHERE t.ticket_id = c.ticket_id AND t.resolved_at IS NULL AND t.assigned_agent_id IS NOT NULL
+    RETURNING t.assigned_agent_id AS agent_id,
+              EXTRACT(EPOCH FROM c.at - t.created_at)::DOUBLE PRECISION AS seconds
+  )
+  SELECT s.agent_id, 'resolution'::TEXT, s.seconds FROM stamped s;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Merge per-agent partial statistics into agent_performance with the
+-- parallel (Chan et al.) update of count, mean and M2, so concurrent
+-- flushes from several workers combine exactly.
+-- stats: [{agent_id, assigned, response_n, response_mean, response_m2,
+--          resolution_n, resolution_mean, resolution_m2}]
+CREATE OR REPLACE FUNCTION merge_agent_performance(stats JSONB) RETURNS VOID AS $$
+  INSERT INTO agent_performance AS p (
+    agent_id, total_assigned_tickets,
+    response_count, average_response_time, response_time_m2,
+    tickets_resolved, average_resolution_time, resolution_time_m2, updated_at
+  )
+  SELECT s.agent_id, s.assigned, s.response_n, s.response_mean, s.response_m2,
+         s.resolution_n, s.resolution_mean, s.resolution_m2, now()
+  FROM jsonb_to_recordset(stats) AS s(
+    agent_id VARCHAR, assigned INTEGER,
+    response_n INTEGER, response_mean DOUBLE PRECISION, response_m2 DOUBLE PRECISION,
+    resolution_n INTEGER, resolution_mean DOUBLE PRECISION, resolution_m2 DOUBLE PRECISION
+  )
+  ON CONFLICT (agent_id) DO UPDATE SET
+    total_assigned_tickets = COALESCE(p.total_assigned_tickets, 0) + EXCLUDED.total_assigned_tickets,
+    average_response_time = CASE WHEN EXCLUDED.response_count = 0 THEN p.average_response_time
+      ELSE COALESCE(p.average_response_time, 0) + (EXCLUDED.average_response_time - COALESCE(p.average_response_time, 0))
+           * EXCLUDED.response_count / (COALESCE(p.response_count, 0) + EXCLUDED.response_count) END,
+    response_time_m2 = CASE WHEN EXCLUDED.response_count = 0 THEN p.response_time_m2
+      ELSE COALESCE(p.response_time_m2, 0) + EXCLUDED.response_time_m2
+           + (EXCLUDED.average_response_time - COALESCE(p.average_response_time, 0)) ^ 2
+             * COALESCE(p.response_count, 0) * EXCLUDED.response_count
+             / (COALESCE(p.response_count, 0) + EXCLUDED.response_count) END,
+    response_count = COALESCE(p.response_count, 0) + EXCLUDED.response_count,
+    average_resolution_time = CASE WHEN EXCLUDED.tickets_resolved = 0 THEN p.average_resolution_time
+      ELSE COALESCE(p.average_resolution_time, 0) + (EXCLUDED.average_resolution_time - COALESCE(p.average_resolution_time, 0))
+           * EXCLUDED.tickets_resolved / (COALESCE(p.tickets_resolved, 0) + EXCLUDED.tickets_resolved) END,
+    resolution_time_m2 = CASE WHEN EXCLUDED.tickets_resolved = 0 THEN p.resolution_time_m2
+      ELSE COALESCE(p.resolution_time_m2, 0) + EXCLUDED.resolution_time_m2
+           + (EXCLUDED.average_resolution_time - COALESCE(p.average_resolution_time, 0)) ^ 2
+             * COALESCE(p.tickets_resolved, 0) * EXCLUDED.tickets_resolved
+             / (COALESCE(p.tickets_resolved, 0) + EXCLUDED.tickets_resolved) END,
+    tickets_resolved = COALESCE(p.tickets_resolved, 0) + EXCLUDED.tickets_resolved,
+    updated_at = now();
+$$ LANGUAGE sql;
+
+-- Backfill: stamp first_response_at / resolved_at on tickets that predate
+-- the processor (resolution time falls back to the last update)
+CREATE OR REPLACE FUNCTION backfill_ticket_milestones() RETURNS VOID AS $$
+  UPDATE tickets t SET first_response_at = (
+    SELECT MIN(c.created_at) FROM comments c
+    WHERE c.ticket_id = t.ticket_id AND c.author_id <> t.customer_id
+  )
+  WHERE t.first_response_at IS NULL;
+
+  UPDATE tickets SET resolved_at = updated_at
+  WHERE resolved_at IS NULL AND status IN ('resolved', 'closed');
+$$ LANGUAGE sql;
 
 -- Enable Row Level Security (RLS) for production
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;
@@ -115,3 +336,4 @@ ALTER TABLE attachments ENABLE ROW LEVEL SECURITY;
 ALTER TABLE agent_performance ENABLE ROW LEVEL SECURITY;
 ALTER TABLE audit_logs ENABLE ROW LEVEL SECURITY;
 ALTER TABLE notifications ENABLE ROW LEVEL SECURITY;
+ALTER TABLE notification_unread_counts ENABLE ROW LEVEL SECURITY;